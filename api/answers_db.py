@@ -0,0 +1,64 @@
+"""
+Banco próprio para participações e respostas.
+
+Com `settings.ANSWERS_DATABASE` configurado, as tabelas de ModelParticipation e
+ModelAnswer (o grosso das escritas no dia de prova) ficam em um alias separado,
+com suas próprias configurações de conexão, enquanto usuários, provas, questões
+e rankings continuam no banco principal. Consultas entre os dois grupos não
+podem usar JOIN: as relações são carregadas com prefetch_related e os filtros
+usam listas de IDs obtidas em cada banco.
+
+Só com a separação as chaves de participações e respostas para o catálogo
+perdem a restrição no banco (`catalog_key`), e a exclusão em cascata passa a
+depender dos sinais de api/signals.py. Em uma instalação com um único banco, as
+chaves continuam com a restrição e com CASCADE.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+
+ANSWERS_MODELS = {"modelparticipation", "modelanswer"}
+
+
+def answers_alias():
+    """Alias do banco de participações e respostas, ou None quando não está separado."""
+    return getattr(settings, "ANSWERS_DATABASE", None)
+
+
+def catalog_key(to, **kwargs):
+    """
+    Chave de participações e respostas para o catálogo: com o banco de respostas separado, sem
+    restrição no banco e sem cascata (feita pelos sinais); senão, uma chave comum com CASCADE.
+    """
+    if answers_alias():
+        return models.ForeignKey(to, on_delete=models.DO_NOTHING, db_constraint=False, **kwargs)
+    return models.ForeignKey(to, on_delete=models.CASCADE, **kwargs)
+
+
+class AnswersRouter:
+    """Envia leituras e escritas de participações e respostas para ANSWERS_DATABASE."""
+
+    def _route(self, model):
+        alias = answers_alias()
+        if alias and model._meta.app_label == "api" and model._meta.model_name in ANSWERS_MODELS:
+            return alias
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True if answers_alias() else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        alias = answers_alias()
+        if not alias:
+            return None
+        is_answers_model = app_label == "api" and model_name in ANSWERS_MODELS
+        if db == alias:
+            return is_answers_model
+        if db == DEFAULT_DB_ALIAS and is_answers_model:
+            return False
+        return None
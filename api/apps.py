@@ -6,5 +6,8 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     def ready(self):
+        import api.metrics
+        import api.sqlite
+        import api.signals
         if not settings.TESTING:
             import api.tasks
@@ -0,0 +1,140 @@
+"""
+Montagem de provas a partir do banco de questões: sorteio e cópia.
+
+Sortear com `order_by("?")` ordena o banco inteiro a cada prova. Aqui, cada
+questão é sorteada por faixa de IDs: escolhe-se um ponto aleatório entre o menor
+e o maior ID do estrato e busca-se a primeira questão a partir dele, uma busca
+no índice (`tag, id` ou `difficulty, id`) em vez de uma varredura. Os sorteios
+pendentes vão ao banco em lote, uma consulta por rodada com uma subconsulta por
+sorteio. Sorteios repetidos são descartados; estratos pequenos, ou em que os
+sorteios se repetem demais, são lidos por inteiro e amostrados em memória.
+
+A amostra é uniforme quando os IDs do estrato são densos; lacunas grandes (por
+exemplo, depois de muitas exclusões) favorecem a questão logo depois delas.
+
+Com `stratify_by`, o total é dividido entre os valores do campo (assunto ou
+dificuldade) proporcionalmente ao número de questões de cada um, pelo método
+dos maiores restos.
+
+A cópia de uma prova (`clone_exam`) grava a prova, os vínculos e, na cópia
+profunda, as questões e alternativas com um bulk_create por tabela, em uma
+transação, qualquer que seja o tamanho da prova.
+"""
+import random
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Subquery
+from ninja.errors import HttpError
+
+from api import sync
+from api.models import ModelChange, ModelChoice, ModelExam, ModelQuestion
+
+STRATA_FIELDS = ("tag", "difficulty")
+# Estratos com até SCAN_FACTOR vezes o número de questões pedidas são lidos por inteiro.
+SCAN_FACTOR = 4
+# Rodadas de sorteios em lote antes de recorrer à leitura do estrato.
+MAX_ROUNDS = 4
+
+
+def allocate(counts, size):
+    """Divide `size` entre os estratos, proporcionalmente a `counts` ({valor: questões})."""
+    total = sum(counts.values())
+    quotas = {value: size * count / total for value, count in counts.items()}
+    allocation = {value: int(quota) for value, quota in quotas.items()}
+    remaining = size - sum(allocation.values())
+    by_remainder = sorted(counts, key=lambda value: quotas[value] - allocation[value], reverse=True)
+    for value in by_remainder:
+        if remaining == 0:
+            break
+        if allocation[value] < counts[value]:
+            allocation[value] += 1
+            remaining -= 1
+    return allocation
+
+
+def sample_ids(questions, size, rng):
+    """
+    Sorteia `size` IDs distintos do queryset `questions`, por faixas de IDs.
+
+    Custa uma agregação e, no máximo, MAX_ROUNDS consultas com uma busca no índice por
+    questão que ainda falta, mais uma leitura do restante do estrato se os sorteios se
+    repetirem demais; um estrato pequeno custa a agregação e a sua leitura.
+    """
+    if size <= 0:
+        return []
+    ids = questions.order_by("id").values_list("id", flat=True)
+    stats = questions.aggregate(count=Count("id"), low=Min("id"), high=Max("id"))
+    if stats["count"] <= size * SCAN_FACTOR:
+        return rng.sample(list(ids), size)
+
+    picked = []
+    seen = set()
+    for _ in range(MAX_ROUNDS):
+        # Um sorteio por questão que falta: a consulta devolve no máximo esse número de IDs.
+        probes = [
+            Subquery(ids.filter(id__gte=rng.randint(stats["low"], stats["high"]))[:1])
+            for _ in range(size - len(picked))
+        ]
+        for question_id in questions.filter(id__in=probes).order_by("id").values_list("id", flat=True):
+            if question_id not in seen:
+                seen.add(question_id)
+                picked.append(question_id)
+        if len(picked) == size:
+            return picked
+
+    rest = list(ids.exclude(id__in=seen))
+    return picked + rng.sample(rest, size - len(picked))
+
+
+def pick_questions(size, stratify_by=None, seed=None):
+    """
+    IDs de `size` questões sorteadas do banco, estratificadas por `stratify_by` quando indicado.
+    A mesma semente sorteia as mesmas questões enquanto o banco não mudar.
+    """
+    if size < 1:
+        raise HttpError(422, "A prova deve ter ao menos uma questão")
+    if stratify_by is not None and stratify_by not in STRATA_FIELDS:
+        raise HttpError(422, f"Estratificação inválida: use {' ou '.join(STRATA_FIELDS)}")
+
+    rng = random.Random(seed)
+    questions = ModelQuestion.objects.all()
+    if stratify_by is None:
+        counts = {None: questions.count()}
+    else:
+        counts = dict(questions.order_by().values_list(stratify_by).annotate(count=Count("id")))
+    if sum(counts.values()) < size:
+        raise HttpError(422, f"O banco tem apenas {sum(counts.values())} questões")
+
+    picked = []
+    for value, stratum_size in allocate(counts, size).items():
+        stratum = questions if stratify_by is None else questions.filter(**{stratify_by: value})
+        picked.extend(sample_ids(stratum, stratum_size, rng))
+    return picked
+
+
+def clone_exam(exam, name, created_by, deep=False):
+    """
+    Copia a prova com os seus vínculos. Com `deep`, as questões e as alternativas também são
+    copiadas e a nova prova passa a usar as cópias; senão, ela compartilha as questões.
+    """
+    with transaction.atomic():
+        # Lidos na transação da cópia: um vínculo removido antes dela não é copiado.
+        question_ids = list(exam.questions.order_by("id").values_list("id", flat=True))
+        clone = ModelExam.objects.create(name=name, created_by=created_by)
+        if deep:
+            sources = list(ModelQuestion.objects.filter(id__in=question_ids).order_by("id"))
+            copies = ModelQuestion.objects.bulk_create(
+                ModelQuestion(text=question.text, tag=question.tag, difficulty=question.difficulty) for question in sources
+            )
+            new_ids = {source.id: copy.id for source, copy in zip(sources, copies)}
+            choices = ModelChoice.objects.bulk_create(
+                ModelChoice(question_id=new_ids[choice.question_id], text=choice.text, is_correct=choice.is_correct)
+                for choice in ModelChoice.objects.filter(question_id__in=new_ids).order_by("id")
+            )
+            # O bulk_create não dispara sinais: as alternativas entram no feed da sincronização aqui.
+            # As questões copiadas entram pelos sinais dos vínculos, logo abaixo.
+            sync.record(ModelChange.CHOICE, [choice.id for choice in choices])
+            question_ids = list(new_ids.values())
+        # Uma única inserção na tabela intermediária, com os sinais dos vínculos (api/signals.py).
+        clone.questions.add(*question_ids)
+    return clone
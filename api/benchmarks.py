@@ -0,0 +1,363 @@
+"""
+Micro-benchmarks de serialização, paginação, cache, correção e ranking.
+
+As medições rodam sobre o banco configurado no momento da chamada. O comando
+`python manage.py benchmark` cria um SQLite em memória e um cache local para
+que os resultados sejam repetíveis e não dependam de serviços externos.
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import django
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils.timezone import now
+from ninja.responses import NinjaJSONEncoder
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import renderers
+from api.fieldsets import serializer
+from api.models import ModelAnswer, ModelExam, ModelParticipation, ModelQuestion, User
+from api.schemas import AnswerSchema, ExamSchema, QuestionSchema
+from api.seeding import bulk_insert, create_questions, create_users, link_questions
+from api.sqlite import run_write, stop_writers
+from api.tasks import calculate_score, generate_ranking
+from api.utils import (
+    add_cache_key,
+    answers_with_details,
+    clear_list_exams_cache,
+    exams_with_details,
+    paginate_queryset,
+    questions_with_details,
+)
+
+ANSWER_PAGE_SIZE = 10
+
+
+def build_dataset(size, seed=0):
+    """
+    Cria uma prova com `size` questões (4 alternativas cada), `size` participantes que a
+    finalizaram e `size` respostas do primeiro participante.
+    """
+    rng = random.Random(seed)
+    admin_id, = create_users(1, "bench-admin", "bench123", is_admin=True)
+    user_ids = create_users(size, "bench", "bench123")
+    exam = ModelExam.objects.create(name="Benchmark", created_by_id=admin_id)
+    question_ids, choices = create_questions(size, 4, rng=rng)
+    link_questions(exam.id, question_ids)
+
+    participation_ids = bulk_insert(ModelParticipation, (
+        ModelParticipation(user_id=user_id, exam_id=exam.id, score=rng.uniform(0, 100), finished_at=now())
+        for user_id in user_ids
+    ))
+    bulk_insert(ModelAnswer, (
+        ModelAnswer(participation_id=participation_ids[0], question_id=question_id, choice_id=rng.choice(choices[question_id][0]))
+        for question_id in question_ids
+    ))
+    return {"exam_id": exam.id, "participation_id": participation_ids[0]}
+
+
+def measure(name, func, rounds=10, warmup=1, setup=None):
+    """
+    Executa `func` `rounds` vezes e retorna as estatísticas de tempo (em segundos) e o pico
+    de memória alocada (em bytes) de uma execução. `setup` roda antes de cada execução e não
+    entra na medição.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "rounds": rounds,
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "ops": 1 / statistics.mean(timings) if statistics.mean(timings) else 0.0,
+        "peak_memory": peak,
+    }
+
+
+def benchmark_cases(size, seed=0):
+    """
+    Semeia o banco e retorna os casos de benchmark como pares (nome, função, setup).
+    """
+    dataset = build_dataset(size, seed)
+    exam_id = dataset["exam_id"]
+    participation_id = dataset["participation_id"]
+    cache_keys = [f"list_exams:bench:{i}" for i in range(size)]
+
+    def serialize_exam():
+        exam = exams_with_details().get(id=exam_id)
+        ExamSchema.model_validate(exam).model_dump_json()
+
+    def serialize_questions():
+        for question in questions_with_details().filter(exams__id=exam_id):
+            QuestionSchema.model_validate(question).model_dump_json()
+
+    def serialize_answers():
+        answers = answers_with_details().filter(participation_id=participation_id)[:ANSWER_PAGE_SIZE]
+        for answer in answers:
+            AnswerSchema.model_validate(answer).model_dump_json()
+
+    # Montagem das respostas a partir de objetos já carregados: validação dos schemas versus a
+    # projeção direta em dicionários usada pelas rotas de leitura (api/fieldsets.py).
+    loaded_exam = exams_with_details().get(id=exam_id)
+    loaded_questions = list(questions_with_details().filter(exams__id=exam_id))
+    loaded_answers = list(answers_with_details().filter(participation_id=participation_id)[:ANSWER_PAGE_SIZE])
+
+    def validate_page(schema, objects):
+        return lambda: renderers.dumps([schema.model_validate(obj).model_dump() for obj in objects])
+
+    def project_page(resource, objects):
+        serialize = serializer(resource)
+        return lambda: renderers.dumps([serialize(obj) for obj in objects])
+
+    exam_payload = ExamSchema.model_validate(exams_with_details().get(id=exam_id)).model_dump()
+    exam_body = renderers.dumps(exam_payload)
+
+    def render_exam_json():
+        json.dumps(exam_payload, cls=NinjaJSONEncoder).encode()
+
+    def render_exam_orjson():
+        renderers.dumps(exam_payload)
+
+    def parse_exam_json():
+        json.loads(exam_body)
+
+    def parse_exam_orjson():
+        renderers.loads(exam_body)
+
+    def paginate():
+        last_page = max(size // 10, 1)
+        list(paginate_queryset(ModelQuestion.objects.order_by("-created_at"), last_page, 10))
+
+    def cache_helpers():
+        for key in cache_keys:
+            add_cache_key(key)
+        clear_list_exams_cache()
+
+    def reset_participation():
+        ModelParticipation.objects.filter(id=participation_id).update(finished_at=None)
+
+    def score():
+        with patch.object(generate_ranking, "delay"):
+            calculate_score(participation_id)
+
+    def ranking():
+        generate_ranking(exam_id)
+
+    return [
+        ("exam_schema", serialize_exam, None),
+        ("question_schema", serialize_questions, None),
+        ("answer_schema", serialize_answers, None),
+        ("exam_validate", validate_page(ExamSchema, [loaded_exam]), None),
+        ("exam_project", project_page("exam", [loaded_exam]), None),
+        ("question_page_validate", validate_page(QuestionSchema, loaded_questions), None),
+        ("question_page_project", project_page("question", loaded_questions), None),
+        ("answer_page_validate", validate_page(AnswerSchema, loaded_answers), None),
+        ("answer_page_project", project_page("answer", loaded_answers), None),
+        ("exam_render_json", render_exam_json, None),
+        ("exam_render_orjson", render_exam_orjson, None),
+        ("exam_parse_json", parse_exam_json, None),
+        ("exam_parse_orjson", parse_exam_orjson, None),
+        ("paginate_queryset", paginate, None),
+        ("cache_helpers", cache_helpers, None),
+        ("calculate_score", score, reset_participation),
+        ("generate_ranking", ranking, None),
+    ]
+
+
+def run_benchmarks(size=1000, rounds=10, warmup=1, seed=0, only=None):
+    """
+    Roda os benchmarks sobre um conjunto sintético de `size` linhas e retorna o relatório.
+    """
+    results = []
+    for name, func, setup in benchmark_cases(size, seed):
+        if only and name not in only:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(measure(name, func, rounds=rounds, warmup=warmup, setup=setup))
+
+    return {
+        "meta": {
+            "commit": _current_commit(),
+            "created_at": datetime.now(tz=timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "size": size,
+            "rounds": rounds,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+@contextlib.contextmanager
+def temporary_file_database(db_options, conn_max_age=0, **overrides):
+    """
+    Cria um banco de testes SQLite em arquivo (e não em memória, para que conexões e locks
+    se comportem como em produção) com as OPTIONS indicadas e um cache local.
+    """
+    test_caches = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    database = settings.DATABASES["default"]
+    saved = {key: database.get(key) for key in ("NAME", "OPTIONS", "TEST", "CONN_MAX_AGE")}
+    with tempfile.TemporaryDirectory() as directory:
+        database["OPTIONS"] = dict(db_options)
+        database["CONN_MAX_AGE"] = conn_max_age
+        database["TEST"] = {**(saved["TEST"] or {}), "NAME": os.path.join(directory, "bench.sqlite3")}
+        connection.close()
+        try:
+            with override_settings(CACHES=test_caches, **overrides):
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    yield
+                finally:
+                    stop_writers()
+                    connection.close()
+                    connection.creation.destroy_test_db(saved["NAME"], verbosity=0)
+        finally:
+            database.update(saved)
+
+
+def run_connection_benchmark(requests=1000):
+    """
+    Mede o custo por requisição de obter a conexão com o banco: primeiro o ciclo isolado
+    (conectar, consultar e fechar, como ao fim de cada requisição) e depois requisições
+    completas a GET /api/users/{id}/.
+    """
+    admin_id, = create_users(1, "bench-admin", "bench123", is_admin=True)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(User.objects.get(id=admin_id))}"}
+    client = Client()
+    connection.close()
+
+    def connection_cycle():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.close()
+
+    def request():
+        response = client.get(f"/api/users/{admin_id}/", **headers)
+        assert response.status_code == 200, response.status_code
+        # O Client de testes não fecha a conexão ao fim da requisição; os handlers WSGI/ASGI fecham.
+        close_old_connections()
+
+    results = {}
+    for name, func in (("connection_cycle", connection_cycle), ("request", request)):
+        results[name] = measure(name, func, rounds=requests, warmup=10)
+    return results
+
+
+def run_write_benchmark(threads=8, writes=100, use_queue=True, seed=0):
+    """
+    Dispara `threads` participantes concorrentes, cada um gravando `writes` respostas, e mede
+    a vazão de escrita. Com `use_queue`, as escritas passam pela fila do processo; sem ela,
+    cada thread grava diretamente, como o `create_answer` fazia.
+    """
+    dataset = build_dataset(threads, seed)
+    participation_ids = list(
+        ModelParticipation.objects.filter(exam_id=dataset["exam_id"]).order_by("id").values_list("id", flat=True)
+    )
+    sheet = list(ModelAnswer.objects.filter(participation_id=dataset["participation_id"]).values_list("question_id", "choice_id"))
+    errors = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def participant(index):
+        barrier.wait()
+        try:
+            for i in range(writes):
+                question_id, choice_id = sheet[i % len(sheet)]
+                fields = {"participation_id": participation_ids[index], "question_id": question_id, "choice_id": choice_id}
+                try:
+                    if use_queue:
+                        run_write(ModelAnswer.objects.create, **fields)
+                    else:
+                        ModelAnswer.objects.create(**fields)
+                except OperationalError:
+                    errors[index] += 1
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=participant, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    total = threads * writes
+    return {
+        "threads": threads,
+        "writes": total,
+        "errors": sum(errors),
+        "elapsed": elapsed,
+        "throughput": (total - sum(errors)) / elapsed if elapsed else 0.0,
+    }
+
+
+def compare(current, baseline):
+    """
+    Compara a mediana de cada benchmark com a de uma execução anterior.
+    Retorna tuplas (nome, mediana anterior, mediana atual, variação relativa).
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        change = (result["median"] - old["median"]) / old["median"] if old["median"] else 0.0
+        rows.append((result["name"], old["median"], result["median"], change))
+    return rows
+
+
+def _current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
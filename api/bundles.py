@@ -0,0 +1,127 @@
+"""
+Pacote offline da prova e folha de respostas enviada de uma vez.
+
+Em vez de uma requisição por resposta, mais a conclusão e a consulta do
+progresso, o participante baixa uma única vez o pacote da sua participação: o
+caderno da prova na ordem da participação (api/papers.py) e um token assinado com o HMAC do
+`SECRET_KEY` (django.core.signing), que identifica a participação, a prova e o
+conteúdo corrigido do caderno e vence em `EXAM_BUNDLE_MAX_AGE` segundos. O cliente responde offline e
+envia a folha inteira com o token; o servidor confere a assinatura sem consultar
+o banco, valida a folha contra o mapa de alternativas em cache, grava as
+respostas e a pontuação em uma única escrita e finaliza a participação.
+
+A folha só é aceita se as questões, as alternativas e o gabarito ainda são os
+do token (`papers.paper_digest`), e não a versão da prova, que também muda com
+vínculos de outras provas ou com o perfil do autor; e uma única vez: a
+participação é finalizada na mesma transação que grava as respostas.
+"""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core import signing
+from django.db import router
+from django.utils.timezone import now
+from ninja.errors import HttpError
+
+from api import papers, renderers
+from api.models import ModelAnswer, ModelExam, ModelParticipation
+from api.sqlite import run_write
+from api.utils import decode_cached_body
+
+SALT = "api.bundles"
+
+
+def issue_token(participation, version):
+    """Token assinado da participação para o conteúdo da versão indicada da prova."""
+    return signing.dumps(
+        {
+            "participation": participation.id,
+            "user": participation.user_id,
+            "exam": participation.exam_id,
+            "digest": papers.paper_digest(participation.exam_id, version),
+        },
+        salt=SALT,
+    )
+
+
+def read_token(token):
+    """Dados do token, conferidos pela assinatura e pela validade, sem consultar o banco."""
+    try:
+        return signing.loads(token, salt=SALT, max_age=settings.EXAM_BUNDLE_MAX_AGE)
+    except signing.SignatureExpired:
+        raise HttpError(403, "O pacote da prova expirou")
+    except signing.BadSignature:
+        raise HttpError(403, "Pacote da prova inválido")
+
+
+async def abuild_bundle(participation, version):
+    """
+    Monta o corpo JSON do pacote. O caderno já renderizado, na ordem da participação, é
+    emendado no corpo como está.
+    """
+    paper = await papers.aget_exam_paper(participation.exam_id, version)
+    if settings.EXAM_PAPER_SHUFFLE:
+        paper = papers.shuffle_paper(paper, participation.exam_id, participation.id)
+    else:
+        paper = decode_cached_body(paper)
+    head = renderers.dumps({
+        "participation_id": participation.id,
+        "expires_at": now() + timedelta(seconds=settings.EXAM_BUNDLE_MAX_AGE),
+        "token": await sync_to_async(issue_token)(participation, version),
+    })
+    return head[:-1] + b',"paper":' + paper + b"}"
+
+
+def grade(exam_id, version, answers):
+    """
+    Valida a folha (cada questão da prova respondida no máximo uma vez, com uma das suas
+    alternativas) e retorna a pontuação, como em calculate_score.
+    """
+    choice_questions = papers.get_choice_questions(exam_id, version)
+    answered = set()
+    for answer in answers:
+        if choice_questions.get(answer.choice_id) != answer.question_id:
+            raise HttpError(422, f"A alternativa {answer.choice_id} não pertence à questão {answer.question_id} da prova")
+        if answer.question_id in answered:
+            raise HttpError(422, f"A questão {answer.question_id} foi respondida mais de uma vez")
+        answered.add(answer.question_id)
+
+    total_questions, correct_choices = papers.get_answer_key(exam_id, version)
+    correct_choices = set(correct_choices)
+    correct_answers = sum(1 for answer in answers if answer.choice_id in correct_choices)
+    return (correct_answers / total_questions) * 100 if total_questions > 0 else 0
+
+
+def save_sheet(claims, answers, score):
+    """Finaliza a participação e grava as respostas; retorna False se ela já estava finalizada."""
+    finished = ModelParticipation.objects.filter(
+        id=claims["participation"], user_id=claims["user"], exam_id=claims["exam"], finished_at__isnull=True
+    ).update(score=score, finished_at=now())
+    if not finished:
+        return False
+    # Respostas enviadas uma a uma antes do pacote são substituídas pela folha.
+    ModelAnswer.objects.filter(participation_id=claims["participation"]).delete()
+    ModelAnswer.objects.bulk_create(
+        ModelAnswer(participation_id=claims["participation"], question_id=answer.question_id, choice_id=answer.choice_id)
+        for answer in answers
+    )
+    return True
+
+
+def submit(claims, exam_id, answers):
+    """Corrige e grava a folha de respostas do token; retorna a pontuação."""
+    if claims["exam"] != exam_id:
+        raise HttpError(403, "O pacote não pertence a esta prova")
+    try:
+        version = papers.exam_version(exam_id)
+    except ModelExam.DoesNotExist:
+        raise HttpError(404, "Prova não encontrada")
+    if papers.paper_digest(exam_id, version) != claims["digest"]:
+        raise HttpError(409, "A prova mudou depois do download do pacote")
+
+    score = grade(exam_id, version, answers)
+    if not run_write(save_sheet, claims, answers, score, using=router.db_for_write(ModelParticipation)):
+        raise HttpError(403, "Prova ja finalizada")
+    return score
@@ -0,0 +1,545 @@
+"""
+Cache em dois níveis: um L1 em memória, por processo, na frente de outro cache (L2, o Redis).
+
+As leituras de chaves com um dos prefixos de `L1_PREFIXES` são atendidas pelo L1
+quando possível, sem ida ao Redis; as demais chaves (locks, registros de chaves,
+pins da réplica) vão sempre ao L2. O L1 é um LRU limitado em número de entradas
+(`L1_MAX_ENTRIES`) e em tempo (`L1_TIMEOUT`), compartilhado pelas threads do
+processo.
+
+Toda escrita ou remoção de uma chave do L1 é publicada no canal `CHANNEL` do
+Redis (pub/sub), e cada processo web ou worker do Celery descarta a sua cópia
+local ao recebê-la. Enquanto o processo não está inscrito no canal, o L1 não é
+usado: sem as invalidações, ele poderia servir dados antigos. Quando o L2 não é
+um Redis (como nos testes), não há canal e a invalidação é apenas local. Nos
+métodos assíncronos, a publicação roda em uma thread, fora do event loop.
+
+Se o L2 falha (timeout ou conexão recusada) `BREAKER_FAILURES` vezes seguidas,
+um circuit breaker deixa de chamá-lo por `BREAKER_COOLDOWN` segundos: leituras
+viram falhas do cache (ou acertos do L1, usado como fallback local mesmo sem o
+canal) e escritas ficam só no L1, de forma que as requisições não esperam o
+timeout do socket a cada acesso. Vencido o prazo, uma única chamada testa o
+Redis; se ela passar, o circuito fecha e, se escritas foram perdidas no
+período, as chaves dos prefixos do L1 são removidas do Redis, pois podem ter
+perdido invalidações.
+
+O L1 devolve o próprio objeto guardado, sem copiá-lo: os prefixos devem cobrir
+apenas valores imutáveis, como os corpos já renderizados das listagens e do
+caderno de prova.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "api.cache_backends.tiered.TieredCache",
+            "LOCATION": "redis",  # alias do cache L2
+            "OPTIONS": {
+                "L1_PREFIXES": ["exam_paper:"], "L1_MAX_ENTRIES": 1024, "L1_TIMEOUT": 30,
+                "BREAKER_FAILURES": 3, "BREAKER_COOLDOWN": 10,
+            },
+        },
+        "redis": {"BACKEND": "django_redis.cache.RedisCache", ...},
+    }
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from api import metrics, renderers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPTIONS = {
+    "L1_PREFIXES": (),
+    "L1_MAX_ENTRIES": 1024,
+    "L1_TIMEOUT": 30,
+    "CHANNEL": "cache_invalidation",
+    "RECONNECT_INTERVAL": 1,
+    "BREAKER_FAILURES": 3,
+    "BREAKER_COOLDOWN": 10,
+}
+
+# Falhas que indicam o L2 indisponível (e não um erro de uso, como incr de uma chave ausente).
+UNAVAILABLE_ERRORS = (ConnectionInterrupted, RedisConnectionError, RedisTimeoutError, OSError)
+
+# Mensagem de invalidação que descarta o L1 inteiro (cache.clear()).
+CLEAR_ALL = "*"
+
+_MISSING = object()
+
+
+class LocalTier:
+    """LRU limitado em número de entradas, com prazo por entrada."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        # Incrementada a cada invalidação; impede que uma leitura do L2 iniciada antes
+        # de uma invalidação grave no L1 o valor já substituído.
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, generation=None):
+        """
+        Guarda o valor pelo prazo do L1, ou pelo `timeout` da escrita, se menor. Com `generation`,
+        a gravação é ignorada se alguma invalidação chegou desde que o valor foi lido do L2.
+        """
+        ttl = self.timeout if timeout is DEFAULT_TIMEOUT or timeout is None else min(timeout, self.timeout)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CircuitBreaker:
+    """
+    Abre após `failures` falhas seguidas do L2. Aberto, recusa as chamadas por `cooldown`
+    segundos; depois disso, deixa passar uma chamada de teste, que o fecha ou o reabre.
+    """
+
+    def __init__(self, failures, cooldown):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._count = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def success(self):
+        """Registra uma chamada bem-sucedida. Retorna True se ela fechou o circuito."""
+        with self._lock:
+            closed = self._opened_at is not None
+            self._count = 0
+            self._opened_at = None
+            self._probing = False
+        if closed:
+            logger.warning("Cache L2 disponível novamente; circuito fechado.")
+        return closed
+
+    def release(self):
+        """Libera a chamada de teste interrompida por algo que não é uma falha do L2 (um cancelamento)."""
+        with self._lock:
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self._count += 1
+            self._probing = False
+            opened = self._opened_at is None and self._count >= self.failures
+            if opened or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+        if opened:
+            logger.warning("Cache L2 indisponível; circuito aberto por %s s.", self.cooldown)
+
+
+class InvalidationBus:
+    """
+    Estado do L1 compartilhado pelas threads do processo: as entradas locais, o circuit
+    breaker do L2 e a inscrição no canal de invalidação do Redis, mantida por uma thread própria.
+    """
+
+    def __init__(self, l2_alias, channel, tier, breaker, reconnect_interval):
+        self.l2_alias = l2_alias
+        self.channel = channel
+        self.tier = tier
+        self.breaker = breaker
+        self.reconnect_interval = reconnect_interval
+        # Indica que escritas no L2 foram perdidas com o circuito aberto.
+        self.dropped_writes = False
+        self.sender = uuid.uuid4().hex
+        self.subscribed = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def uses_redis(self):
+        """Indica se o L2 é um Redis, sem abrir conexão."""
+        return getattr(caches[self.l2_alias], "client", None) is not None
+
+    def redis(self):
+        """Conexão com o Redis do L2, ou None quando o L2 não é um Redis."""
+        return caches[self.l2_alias].client.get_client(write=True) if self.uses_redis() else None
+
+    def active(self):
+        """
+        Indica se o L1 pode ser usado: sem Redis, sempre; com Redis, com a inscrição ativa
+        ou, como fallback local, com o circuito aberto. Não faz I/O: pode ser chamado no event loop.
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    if not self.uses_redis():
+                        self.subscribed.set()
+                        self._thread = False
+                    else:
+                        self._thread = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+                        self._thread.start()
+        return self.subscribed.is_set() or self.breaker.open
+
+    def publish(self, keys):
+        """Descarta as chaves no L1 deste processo e avisa os demais processos."""
+        if CLEAR_ALL in keys:
+            self.tier.clear()
+        else:
+            self.tier.delete(keys)
+        connection = self.redis()
+        if connection is None:
+            return
+        if not self.breaker.allow():
+            self.dropped_writes = True
+            return
+        try:
+            connection.publish(self.channel, renderers.dumps({"sender": self.sender, "keys": list(keys)}))
+        except UNAVAILABLE_ERRORS:
+            # Os outros processos descartam a cópia quando o prazo do L1 vencer.
+            logger.exception("Falha ao publicar a invalidação de %s", keys)
+            self.breaker.failure()
+            self.dropped_writes = True
+        except BaseException:
+            self.breaker.release()
+            raise
+        else:
+            self.breaker.success()
+
+    def handle(self, data):
+        """Aplica uma mensagem de invalidação recebida pelo canal."""
+        message = renderers.loads(data)
+        if message["sender"] == self.sender:
+            return
+        if CLEAR_ALL in message["keys"]:
+            self.tier.clear()
+        else:
+            self.tier.delete(message["keys"])
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Invalidações publicadas antes da inscrição foram perdidas.
+                self.tier.clear()
+                self.subscribed.set()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.handle(message["data"])
+            except Exception:
+                logger.exception("Inscrição no canal %s interrompida", self.channel)
+            finally:
+                if self.subscribed.is_set():
+                    self.subscribed.clear()
+                    self.tier.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(self.reconnect_interval)
+
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+
+def _bus(l2_alias, options):
+    key = (l2_alias, options["CHANNEL"])
+    bus = _buses.get(key)
+    if bus is None:
+        with _buses_lock:
+            bus = _buses.get(key)
+            if bus is None:
+                tier = LocalTier(options["L1_MAX_ENTRIES"], options["L1_TIMEOUT"])
+                breaker = CircuitBreaker(options["BREAKER_FAILURES"], options["BREAKER_COOLDOWN"])
+                bus = _buses[key] = InvalidationBus(
+                    l2_alias, options["CHANNEL"], tier, breaker, options["RECONNECT_INTERVAL"]
+                )
+    return bus
+
+
+def reset():
+    """Descarta o L1 e o estado do circuit breaker deste processo."""
+    _buses.clear()
+
+
+# O processo filho (worker do Celery) não herda a thread de inscrição nem deve confiar no L1 do pai.
+os.register_at_fork(after_in_child=reset)
+
+
+class TieredCache(BaseCache):
+    """Backend de cache com um L1 em memória na frente do cache de alias LOCATION."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.l2_alias = location
+        self.options = {**DEFAULT_OPTIONS, **params.get("OPTIONS", {})}
+        self.prefixes = tuple(self.options["L1_PREFIXES"])
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    @property
+    def bus(self):
+        return _bus(self.l2_alias, self.options)
+
+    @property
+    def l1(self):
+        return self.bus.tier
+
+    def _local(self, key, version=None):
+        return version is None and key.startswith(self.prefixes)
+
+    def _call_l2(self, fallback, method, *args, write=False, **kwargs):
+        """Chama o L2 sob o circuit breaker; com o circuito aberto ou em uma falha, retorna `fallback`."""
+        bus = self.bus
+        if not bus.breaker.allow():
+            metrics.record_cache_tier("l2", "bypass")
+            bus.dropped_writes = bus.dropped_writes or write
+            return fallback
+        try:
+            result = getattr(self.l2, method)(*args, **kwargs)
+        except UNAVAILABLE_ERRORS:
+            logger.exception("Falha no cache L2 (%s)", method)
+            metrics.record_cache_tier("l2", "error")
+            bus.breaker.failure()
+            bus.dropped_writes = bus.dropped_writes or write
+            return fallback
+        except BaseException:
+            # Erros de uso ou o cancelamento da requisição não fecham nem reabrem o circuito,
+            # mas a chamada de teste precisa ser liberada para que outra possa ocorrer.
+            bus.breaker.release()
+            raise
+        self._l2_succeeded(bus)
+        return result
+
+    async def _acall_l2(self, fallback, method, *args, write=False, **kwargs):
+        """Versão assíncrona de `_call_l2`."""
+        bus = self.bus
+        if not bus.breaker.allow():
+            metrics.record_cache_tier("l2", "bypass")
+            bus.dropped_writes = bus.dropped_writes or write
+            return fallback
+        try:
+            result = await getattr(self.l2, method)(*args, **kwargs)
+        except UNAVAILABLE_ERRORS:
+            logger.exception("Falha no cache L2 (%s)", method)
+            metrics.record_cache_tier("l2", "error")
+            bus.breaker.failure()
+            bus.dropped_writes = bus.dropped_writes or write
+            return fallback
+        except BaseException:
+            # Erros de uso ou o cancelamento da requisição não fecham nem reabrem o circuito,
+            # mas a chamada de teste precisa ser liberada para que outra possa ocorrer.
+            bus.breaker.release()
+            raise
+        if self._l2_recovered(bus):
+            # A limpeza fala com o Redis de forma síncrona: roda fora do event loop.
+            await sync_to_async(self._discard_local_keys, thread_sensitive=False)(bus)
+        return result
+
+    def _l2_recovered(self, bus):
+        """Registra o sucesso no breaker; indica se o circuito fechou com escritas perdidas."""
+        return bus.breaker.success() and bus.dropped_writes
+
+    def _l2_succeeded(self, bus):
+        if self._l2_recovered(bus):
+            self._discard_local_keys(bus)
+
+    def _discard_local_keys(self, bus):
+        # Invalidações podem ter sido perdidas durante a falha: as chaves do L1 são descartadas.
+        bus.dropped_writes = False
+        delete_pattern = getattr(self.l2, "delete_pattern", None)
+        if delete_pattern is not None:
+            for prefix in self.prefixes:
+                self._call_l2(None, "delete_pattern", f"{prefix}*")
+        bus.publish([CLEAR_ALL])
+
+    def _read_l1(self, key):
+        """Valor do L1 e a geração atual, ou (_MISSING, None) quando o L1 não se aplica."""
+        if not self.bus.active():
+            return _MISSING, None
+        generation = self.l1.generation
+        value = self.l1.get(key)
+        metrics.record_cache_tier("l1", "miss" if value is _MISSING else "hit")
+        return value, generation
+
+    def _record_l2(self, value):
+        metrics.record_cache_tier("l2", "miss" if value is _MISSING else "hit")
+
+    def _written(self, keys, value=_MISSING, timeout=DEFAULT_TIMEOUT):
+        keys = [key for key in keys if self._local(key)]
+        if not keys:
+            return
+        self.bus.publish(keys)
+        if value is not _MISSING and self.bus.active():
+            self.l1.set(keys[0], value, timeout)
+
+    async def _awritten(self, keys, value=_MISSING, timeout=DEFAULT_TIMEOUT):
+        """Versão assíncrona de `_written`: a publicação no Redis roda fora do event loop."""
+        if any(self._local(key) for key in keys):
+            await sync_to_async(self._written, thread_sensitive=False)(keys, value, timeout)
+
+    def _filled(self, key, value, generation, default):
+        self._record_l2(value)
+        if value is _MISSING:
+            return default
+        if generation is not None:
+            self.l1.set(key, value, generation=generation)
+        return value
+
+    def get(self, key, default=None, version=None):
+        if self._local(key, version):
+            value, generation = self._read_l1(key)
+            if value is not _MISSING:
+                return value
+            return self._filled(key, self._call_l2(_MISSING, "get", key, _MISSING), generation, default)
+        value = self._call_l2(_MISSING, "get", key, _MISSING, version=version)
+        self._record_l2(value)
+        return default if value is _MISSING else value
+
+    async def aget(self, key, default=None, version=None):
+        if self._local(key, version):
+            # Um acerto no L1 não passa pela thread do cache síncrono.
+            value, generation = self._read_l1(key)
+            if value is not _MISSING:
+                return value
+            return self._filled(key, await self._acall_l2(_MISSING, "aget", key, _MISSING), generation, default)
+        value = await self._acall_l2(_MISSING, "aget", key, _MISSING, version=version)
+        self._record_l2(value)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        for key in keys:
+            value = self._read_l1(key)[0] if self._local(key, version) else _MISSING
+            if value is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        if remaining:
+            from_l2 = self._call_l2({}, "get_many", remaining, version=version)
+            for key in remaining:
+                self._record_l2(from_l2.get(key, _MISSING))
+            found.update(from_l2)
+        return found
+
+    def has_key(self, key, version=None):
+        if self._local(key, version) and self._read_l1(key)[0] is not _MISSING:
+            return True
+        return self._call_l2(False, "has_key", key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._call_l2(None, "set", key, value, timeout=timeout, version=version, write=True)
+        if version is None:
+            self._written([key], value, timeout)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        await self._acall_l2(None, "aset", key, value, timeout=timeout, version=version, write=True)
+        if version is None:
+            await self._awritten([key], value, timeout)
+
+    # Sem o L2 não há como coordenar processos: `add` responde como se tivesse obtido o lock,
+    # e cada processo segue por conta própria em vez de esperar por um dono que não existe.
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._call_l2(True, "add", key, value, timeout=timeout, version=version, write=True)
+        if added and version is None:
+            self._written([key], value, timeout)
+        return added
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = await self._acall_l2(True, "aadd", key, value, timeout=timeout, version=version, write=True)
+        if added and version is None:
+            await self._awritten([key], value, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._call_l2(list(data), "set_many", data, timeout=timeout, version=version, write=True)
+        if version is None:
+            self._written(list(data))
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call_l2(False, "touch", key, timeout=timeout, version=version, write=True)
+
+    def delete(self, key, version=None):
+        deleted = self._call_l2(False, "delete", key, version=version, write=True)
+        self._written([key])
+        return deleted
+
+    async def adelete(self, key, version=None):
+        deleted = await self._acall_l2(False, "adelete", key, version=version, write=True)
+        await self._awritten([key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._call_l2(None, "delete_many", keys, version=version, write=True)
+        self._written(keys)
+
+    def incr(self, key, delta=1, version=None):
+        value = self._call_l2(None, "incr", key, delta, version=version, write=True)
+        self._written([key])
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self._call_l2(None, "decr", key, delta, version=version, write=True)
+        self._written([key])
+        return value
+
+    def clear(self):
+        self._call_l2(None, "clear", write=True)
+        self.bus.publish([CLEAR_ALL])
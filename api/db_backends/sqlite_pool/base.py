@@ -0,0 +1,169 @@
+"""
+Backend SQLite com um pool de conexões limitado por processo.
+
+O Django só oferece pool nativo para o PostgreSQL. Aqui, as conexões fechadas
+pelo Django (ao fim de cada requisição ou tarefa do Celery) voltam para um pool
+do processo, compartilhado por todas as threads, em vez de serem encerradas; a
+próxima requisição reaproveita uma conexão já aberta e configurada. O pool é
+limitado por `OPTIONS["pool"]["max_size"]`: quem não consegue uma conexão em
+`timeout` segundos recebe um OperationalError. Após um fork (workers do
+Celery), o processo filho começa com um pool vazio. O backend também ativa as
+consultas por tuplas nos prefetches (`DatabaseFeatures`).
+
+    'OPTIONS': {'pool': {'max_size': 20, 'timeout': 10}}
+"""
+import os
+import threading
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+DEFAULT_POOL_OPTIONS = {"max_size": 20, "timeout": 10}
+
+
+class ConnectionPool:
+    """Pool limitado de conexões sqlite3, com verificação de saúde na retirada."""
+
+    def __init__(self, factory, max_size, timeout):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def getconn(self):
+        """Retorna uma conexão ociosa saudável ou abre uma nova, respeitando o limite do pool."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(f"Pool de conexões esgotado ({self.max_size} conexões em uso).")
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return self.factory(), False
+                if self._is_healthy(connection):
+                    return connection, True
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection):
+        """Devolve a conexão ao pool, desfazendo qualquer transação deixada aberta."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            with self._lock:
+                self._idle.append(connection)
+        except Exception:
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def _is_healthy(self, connection):
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _reset_pools_after_fork():
+    # Conexões SQLite não podem ser compartilhadas entre processos: o filho abre as suas.
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def close_pools():
+    """Fecha as conexões ociosas de todos os pools do processo."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+class DatabaseFeatures(base.DatabaseFeatures):
+    # Sem tuplas, o Django 5.2 busca as chaves estrangeiras de um prefetch com um OR por
+    # objeto, e uma página de mil linhas passa do limite de profundidade de expressão do
+    # SQLite. Todas as chaves do projeto têm uma só coluna, e `(coluna) IN ((1), (2))` é
+    # aceito pelo SQLite; listas de tuplas com mais de uma coluna não são.
+    supports_tuple_lookups = True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    features_class = DatabaseFeatures
+    # Indica ao hook de PRAGMAs (api/sqlite.py) que a conexão já veio configurada do pool.
+    connection_reused = False
+    # Pool de onde a conexão atual foi retirada; o NAME pode mudar enquanto ela está aberta.
+    connection_pool = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        pool_options = params.pop("pool", None)
+        if pool_options is True:
+            pool_options = {}
+        self.pool_options = {**DEFAULT_POOL_OPTIONS, **pool_options} if pool_options is not None else None
+        return params
+
+    @property
+    def pool(self):
+        if not self.pool_options or self.is_in_memory_db():
+            return None
+        key = (self.alias, str(self.settings_dict["NAME"]))
+        with _pools_lock:
+            if key not in _pools:
+                params = self.get_connection_params()
+                _pools[key] = ConnectionPool(
+                    lambda: super(DatabaseWrapper, self).get_new_connection(params),
+                    max_size=self.pool_options["max_size"],
+                    timeout=self.pool_options["timeout"],
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        self.connection_pool = pool = self.pool
+        if pool is None:
+            self.connection_reused = False
+            return super().get_new_connection(conn_params)
+        connection, self.connection_reused = pool.getconn()
+        return connection
+
+    def is_usable(self):
+        try:
+            self.connection.execute("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    def _close(self):
+        pool, self.connection_pool = self.connection_pool, None
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
@@ -0,0 +1,213 @@
+"""
+Campos esparsos e expansão de relações nas rotas de leitura.
+
+Os parâmetros de consulta `fields` e `expand` recebem listas separadas por
+vírgula, com caminhos pontuados para os níveis aninhados:
+
+    /api/exams/{id}/participants/?fields=id,score,user.username&expand=exam
+
+`fields` restringe os campos devolvidos (por padrão, todos os do schema da
+rota). `expand` indica quais relações vêm embutidas; as que não forem
+expandidas são devolvidas apenas pelo ID (ou pela lista de IDs). Um campo
+aninhado em `fields` (como `user.username`) expande a sua relação.
+
+Sem nenhum dos dois parâmetros, as rotas continuam devolvendo o schema
+completo. Campos em `hidden` (como o gabarito, para participantes) nunca são
+devolvidos, nem quando pedidos. Com eles, a consulta carrega só as colunas pedidas (`only()`) e só
+as relações que serão usadas (`Prefetch`), sempre por prefetch, pois o
+catálogo e as respostas podem estar em bancos diferentes.
+
+As respostas são montadas como dicionários direto dos objetos do ORM, sem
+passar pela validação do Pydantic: os dados vêm do nosso próprio banco, e os
+schemas de api/schemas.py continuam descrevendo as rotas no OpenAPI. Para o
+schema completo, `serializer` usa uma seleção com todas as relações expandidas.
+"""
+import functools
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from ninja.errors import HttpError
+
+from api import renderers
+from api.models import ModelAnswer, ModelChoice, ModelExam, ModelParticipation, ModelQuestion
+
+# `resource` é o recurso embutido quando a relação é expandida, ou None quando ela só
+# pode ser devolvida como lista de IDs. `attr` é a relação do model, quando o nome
+# do campo no schema é outro.
+Relation = namedtuple("Relation", ["resource", "many", "attr"], defaults=[False, None])
+Resource = namedtuple("Resource", ["model", "fields"])
+
+# Campos de cada recurso, na ordem dos schemas em api/schemas.py (None indica um campo simples).
+RESOURCES = {
+    "user": Resource(get_user_model(), {
+        "id": None, "username": None, "email": None, "is_admin": None, "is_participant": None,
+    }),
+    "choice": Resource(ModelChoice, {"id": None, "text": None, "is_correct": None}),
+    "question": Resource(ModelQuestion, {
+        "id": None,
+        "text": None,
+        "tag": None,
+        "difficulty": None,
+        "created_at": None,
+        "choices": Relation("choice", many=True),
+        "exam_ids": Relation(None, many=True, attr="exams"),
+    }),
+    "exam": Resource(ModelExam, {
+        "id": None,
+        "name": None,
+        "created_by": Relation("user"),
+        "created_at": None,
+        "questions": Relation("question", many=True),
+    }),
+    "participation": Resource(ModelParticipation, {
+        "id": None,
+        "user": Relation("user"),
+        "exam": Relation("exam"),
+        "started_at": None,
+        "finished_at": None,
+        "score": None,
+    }),
+    "answer": Resource(ModelAnswer, {
+        "id": None,
+        "participation": Relation("participation"),
+        "question": Relation("question"),
+        "choice": Relation("choice"),
+        "answered_at": None,
+    }),
+}
+
+
+def _split(value):
+    return [path.strip() for path in (value or "").split(",") if path.strip()]
+
+
+def _group(paths):
+    """Agrupa caminhos pontuados pelo primeiro nível: {"user": ["username"], "id": []}."""
+    groups = {}
+    for path in paths:
+        head, _, rest = path.partition(".")
+        groups.setdefault(head, [])
+        if rest:
+            groups[head].append(rest)
+    return groups
+
+
+class Selection:
+    """Campos e relações expandidas pedidos para um recurso (e, recursivamente, para os aninhados)."""
+
+    def __init__(self, resource, field_paths, expand_paths, prefix="", expand_all=False, hidden=()):
+        self.resource = RESOURCES[resource]
+        self.model = self.resource.model
+        fields = _group(field_paths) if field_paths else None
+        expand = _group(expand_paths)
+
+        for name in list(fields or ()) + list(expand):
+            if name not in self.resource.fields:
+                raise HttpError(422, f"Campo desconhecido: {prefix}{name}")
+        for name in expand:
+            relation = self.resource.fields[name]
+            if relation is None or relation.resource is None:
+                raise HttpError(422, f"Campo não expansível: {prefix}{name}")
+
+        hidden = _group(hidden)
+        self.fields = [
+            name for name in self.resource.fields
+            if (fields is None or name in fields) and not (name in hidden and not hidden[name])
+        ]
+        self.children = {}
+        for name in self.fields:
+            relation = self.resource.fields[name]
+            nested_fields = fields.get(name) if fields else None
+            if relation is None or relation.resource is None or not (expand_all or name in expand or nested_fields):
+                continue
+            self.children[name] = Selection(
+                relation.resource, nested_fields, expand.get(name, []), prefix=f"{prefix}{name}.",
+                expand_all=expand_all, hidden=hidden.get(name, ()),
+            )
+
+        # Plano de serialização: (campo, atributo do objeto, se é lista, seleção aninhada).
+        # Relações não expandidas de um só objeto são lidas pela coluna da chave (`user_id`).
+        self._plan = []
+        for name in self.fields:
+            if self.resource.fields[name] is None:
+                self._plan.append((name, name, None, None))
+                continue
+            relation, field = self._field(name)
+            child = self.children.get(name)
+            attr = field.attname if not relation.many and child is None else field.name
+            self._plan.append((name, attr, relation.many, child))
+
+    def _field(self, name):
+        relation = self.resource.fields[name]
+        return relation, self.model._meta.get_field(relation.attr or name)
+
+    def queryset(self, queryset=None, extra_fields=()):
+        """Aplica `only()` e os `Prefetch` necessários ao queryset (por padrão, o do model)."""
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        only = {"id", *extra_fields}
+        prefetches = []
+        for name in self.fields:
+            if self.resource.fields[name] is None:
+                only.add(name)
+                continue
+            relation, field = self._field(name)
+            if field.many_to_one:
+                only.add(field.name)
+            # Alternativas são ligadas à questão pela própria chave, que precisa ser carregada.
+            remote = [field.field.name] if field.one_to_many else []
+            child = self.children.get(name)
+            if child is not None:
+                prefetches.append(Prefetch(field.name, queryset=child.queryset(extra_fields=remote)))
+            elif field.many_to_one:
+                continue
+            else:
+                prefetches.append(Prefetch(field.name, queryset=field.related_model._default_manager.only("id", *remote)))
+        return queryset.only(*only).prefetch_related(*prefetches)
+
+    def serialize(self, obj):
+        """Monta o dicionário de resposta com os campos pedidos."""
+        data = {}
+        prefetched = getattr(obj, "_prefetched_objects_cache", {})
+        for name, attr, many, child in self._plan:
+            if many:
+                # Lê direto do cache do prefetch, sem criar um manager e um queryset por objeto.
+                items = prefetched[attr] if attr in prefetched else getattr(obj, attr).all()
+                data[name] = [child.serialize(item) for item in items] if child else [item.id for item in items]
+                continue
+            value = getattr(obj, attr)
+            if child is not None and value is not None:
+                data[name] = child.serialize(value)
+            else:
+                data[name] = value
+        return data
+
+
+def parse_selection(resource, fields=None, expand=None, hidden=()):
+    """
+    Interpreta os parâmetros `fields` e `expand` de uma rota. Retorna None quando nenhum
+    dos dois foi enviado, e a rota deve devolver o schema completo.
+    """
+    if fields is None and expand is None:
+        return None
+    selection = Selection(resource, _split(fields), _split(expand), hidden=hidden)
+    selection.key = f"{fields}:{expand}"
+    return selection
+
+
+@functools.lru_cache(maxsize=None)
+def full_selection(resource, hidden=()):
+    """Seleção com todos os campos e todas as relações expandidas, equivalente ao schema da rota."""
+    return Selection(resource, None, [], expand_all=True, hidden=hidden)
+
+
+def serializer(resource, selection=None, hidden=()):
+    """Função que monta a resposta de um objeto: pela seleção pedida ou pelo schema completo."""
+    return (selection or full_selection(resource, hidden)).serialize
+
+
+def selection_response(data):
+    """Resposta JSON para os dados já montados por `Selection.serialize`."""
+    return HttpResponse(renderers.dumps(data), content_type="application/json; charset=utf-8")
@@ -0,0 +1,114 @@
+"""
+Cache das listagens com revalidação em segundo plano (stale-while-revalidate).
+
+Cada entrada guarda o corpo já renderizado (ver encode_cached_json) junto com
+o instante em que deixa de ser fresca. Até LIST_CACHE_SOFT_TTL a entrada é
+servida normalmente; entre o prazo brando e LIST_CACHE_HARD_TTL (o timeout da
+chave) ela continua sendo servida, mas a primeira requisição que a encontra
+vencida agenda a tarefa `refresh_list_cache` do Celery, que monta a página de
+novo. Um lock no cache garante uma única reconstrução por entrada.
+
+A página é montada por uma função assíncrona de módulo (o "builder" da rota),
+chamada com parâmetros serializáveis em JSON, para que o worker do Celery
+possa reconstruí-la pelo caminho da função.
+"""
+import logging
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from api import tasks
+from api.metrics import record_cache_event
+from api.replica import reading_from_replica
+from api.utils import add_answer_cache_key, add_cache_key, add_question_cache_key, add_user_cache_key
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_KEY = "list_refresh_lock:{}"
+
+# Registro das chaves de cada família, usado na invalidação após escritas (api/utils.py).
+KEY_REGISTRIES = {
+    "exams": add_cache_key,
+    "questions": add_question_cache_key,
+    "users": add_user_cache_key,
+    "answers": add_answer_cache_key,
+}
+
+
+def _entry(payload):
+    return (time.time() + settings.LIST_CACHE_SOFT_TTL, payload)
+
+
+def store(family, key, payload):
+    cache.set(key, _entry(payload), timeout=settings.LIST_CACHE_HARD_TTL)
+    KEY_REGISTRIES[family](key)
+
+
+async def astore(family, key, payload):
+    await cache.aset(key, _entry(payload), timeout=settings.LIST_CACHE_HARD_TTL)
+    await sync_to_async(KEY_REGISTRIES[family])(key)
+
+
+async def aget_cached_list(family, key, build, **params):
+    """
+    Retorna o corpo da listagem guardado em `key`, montando-o com `build(**params)` quando
+    não há entrada. Entradas vencidas são servidas enquanto a reconstrução é agendada.
+    """
+    entry = await cache.aget(key)
+    if entry is not None:
+        soft_expires_at, payload = entry
+        if time.time() < soft_expires_at:
+            record_cache_event(family, "hit")
+        else:
+            record_cache_event(family, "stale")
+            await aschedule_refresh(family, key, build, params)
+        return payload
+
+    record_cache_event(family, "miss")
+    payload = await build(**params)
+    await astore(family, key, payload)
+    return payload
+
+
+async def aschedule_refresh(family, key, build, params):
+    """Agenda a reconstrução da entrada, se nenhuma outra já estiver em andamento."""
+    lock_key = REFRESH_LOCK_KEY.format(key)
+    if not await cache.aadd(lock_key, True, timeout=settings.LIST_CACHE_REFRESH_LOCK_TIMEOUT):
+        return
+    try:
+        await sync_to_async(tasks.refresh_list_cache.delay)(
+            family, key, f"{build.__module__}.{build.__qualname__}", params
+        )
+    except Exception:
+        # Sem o broker, a entrada vencida continua sendo servida até o prazo final.
+        logger.exception("Falha ao agendar a atualização de %s", key)
+        await cache.adelete(lock_key)
+
+
+def warm(family, key, build, **params):
+    """Monta a entrada `key` se ela não estiver no cache (api/warming.py). Retorna se ela foi montada."""
+    if cache.get(key) is not None:
+        return False
+    store(family, key, async_to_sync(build)(**params))
+    return True
+
+
+def refresh(family, key, build_path, params):
+    """
+    Reconstrói a entrada `key` com o builder indicado. Entradas invalidadas por uma escrita
+    enquanto a tarefa esperava na fila não são recriadas: a próxima requisição as monta.
+    """
+    try:
+        if cache.get(key) is None:
+            return False
+        with reading_from_replica():
+            payload = async_to_sync(import_string(build_path))(**params)
+        if cache.get(key) is None:
+            return False
+        store(family, key, payload)
+        return True
+    finally:
+        cache.delete(REFRESH_LOCK_KEY.format(key))
@@ -0,0 +1,249 @@
+"""
+Simulador de carga do "dia de prova".
+
+Prepara uma prova com participantes diretamente no banco e, em seguida, dispara
+concorrentemente contra uma instância em execução o fluxo completo de cada
+participante: login, busca do caderno de prova, envio das respostas,
+finalização e acompanhamento da correção. Ao final, um administrador consulta o
+ranking. O caderno não traz o gabarito: as alternativas corretas ficam no plano
+da simulação, para que `correct_rate` valha.
+"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+
+from api.models import ModelExam, ModelParticipation, ModelQuestion
+from api.seeding import bulk_insert, create_questions, create_users, link_questions
+
+User = get_user_model()
+
+STEPS = ("token", "exam", "answer", "conclusion", "progress", "ranking")
+
+
+def percentile(values, fraction):
+    """Percentil pelo método do posto mais próximo; `fraction` entre 0 e 1."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class StepStats:
+    """Acumula latências e erros por etapa do fluxo, de forma segura entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, step, latency, status, ok):
+        with self._lock:
+            self.latencies[step].append(latency)
+            self.statuses[step][status] += 1
+            if not ok:
+                self.errors[step] += 1
+
+    def summary(self, elapsed):
+        report = {}
+        for step in STEPS:
+            latencies = self.latencies.get(step, [])
+            if not latencies:
+                continue
+            report[step] = {
+                "requests": len(latencies),
+                "errors": self.errors.get(step, 0),
+                "error_rate": self.errors.get(step, 0) / len(latencies),
+                "throughput": len(latencies) / elapsed if elapsed else 0.0,
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "statuses": {str(status): count for status, count in self.statuses[step].items()},
+            }
+        return report
+
+
+class Client:
+    """Cliente HTTP com conexão persistente por thread."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            connection = self._local.connection = factory(self.host, self.port, timeout=self.timeout)
+        return connection
+
+    def request(self, method, path, payload=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(payload) if payload is not None else None
+        connection = self._connection()
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+        data = json.loads(content) if content else None
+        return response.status, data
+
+
+def prepare_exam_day(participants, questions, choices_per_question=4, password="examday123"):
+    """
+    Cria no banco um administrador, uma prova com `questions` questões e `participants`
+    participantes já inscritos, todos com a mesma senha pré-processada.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    prefix = f"examday-{run_id}"
+    admin_id, = create_users(1, f"{prefix}-admin", password, is_admin=True, is_participant=False)
+    user_ids = create_users(participants, prefix, password)
+    exam = ModelExam.objects.create(name=f"Dia de prova {run_id}", created_by_id=admin_id)
+    question_ids, choices = create_questions(questions, choices_per_question)
+    link_questions(exam.id, question_ids)
+    participation_ids = bulk_insert(ModelParticipation, (
+        ModelParticipation(user_id=user_id, exam_id=exam.id) for user_id in user_ids
+    ))
+    return {
+        "run_id": run_id,
+        "exam_id": exam.id,
+        "question_ids": question_ids,
+        "correct_choice_ids": sorted(correct for _, correct in choices.values()),
+        "admin": f"{prefix}-admin-0",
+        "password": password,
+        "participants": [(f"{prefix}-{i}", participation_id) for i, participation_id in enumerate(participation_ids)],
+    }
+
+
+def cleanup_exam_day(plan):
+    """Remove os dados criados por `prepare_exam_day`."""
+    ModelExam.objects.filter(id=plan["exam_id"]).delete()
+    ModelQuestion.objects.filter(id__in=plan["question_ids"]).delete()
+    User.objects.filter(username__startswith=f"examday-{plan['run_id']}-").delete()
+
+
+class ExamDaySimulation:
+    """Dispara o fluxo de prova de todos os participantes e coleta as estatísticas por etapa."""
+
+    def __init__(self, plan, base_url, concurrency=100, ramp_up=0.0, correct_rate=0.7,
+                 poll_interval=1.0, max_polls=30, timeout=30.0, seed=0):
+        self.plan = plan
+        self.client = Client(base_url, timeout)
+        self.concurrency = concurrency
+        self.ramp_up = ramp_up
+        self.correct_rate = correct_rate
+        self.poll_interval = poll_interval
+        self.max_polls = max_polls
+        self.seed = seed
+        self.stats = StepStats()
+        self.correct_choice_ids = set(plan["correct_choice_ids"])
+
+    def call(self, step, method, path, payload=None, token=None, expected=(200,)):
+        start = time.perf_counter()
+        try:
+            status, data = self.client.request(method, path, payload, token)
+        except (OSError, http.client.HTTPException, ValueError):
+            status, data = "connection_error", None
+        self.stats.record(step, time.perf_counter() - start, status, status in expected)
+        return status, data
+
+    def login(self, username):
+        status, data = self.call("token", "POST", "/api/token/", {"username": username, "password": self.plan["password"]})
+        return data.get("access") if status == 200 and data else None
+
+    def pick_choice(self, question, rng):
+        """Alternativa respondida: a correta com probabilidade `correct_rate`, senão uma errada."""
+        choices = question["choices"]
+        correct = [choice for choice in choices if choice["id"] in self.correct_choice_ids]
+        wrong = [choice for choice in choices if choice["id"] not in self.correct_choice_ids]
+        pool = correct if correct and (rng.random() < self.correct_rate or not wrong) else (wrong or choices)
+        return rng.choice(pool)["id"]
+
+    def participant_journey(self, index, username, participation_id, start_at):
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        rng = random.Random(self.seed * 1_000_003 + index)
+        exam_id = self.plan["exam_id"]
+
+        token = self.login(username)
+        if not token:
+            return
+
+        status, paper = self.call("exam", "GET", f"/api/exams/{exam_id}/paper/", token=token)
+        if status != 200 or not paper:
+            return
+
+        for question in paper.get("questions", []):
+            if not question["choices"]:
+                continue
+            self.call("answer", "POST", "/api/answers/", {
+                "participation_id": participation_id,
+                "question_id": question["id"],
+                "choice_id": self.pick_choice(question, rng),
+            }, token=token, expected=(201,))
+
+        status, _ = self.call("conclusion", "POST", f"/api/exams/{exam_id}/conclusions/", token=token)
+        if status != 200:
+            return
+
+        for _ in range(self.max_polls):
+            status, progress = self.call("progress", "GET", f"/api/exams/{exam_id}/progresses/", token=token)
+            if status != 200 or (progress and progress.get("status") == "completed"):
+                return
+            time.sleep(self.poll_interval)
+
+    def run(self):
+        participants = self.plan["participants"]
+        started = time.monotonic()
+        spacing = self.ramp_up / len(participants) if participants and self.ramp_up else 0.0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                executor.submit(self.participant_journey, index, username, participation_id, started + index * spacing)
+                for index, (username, participation_id) in enumerate(participants)
+            ]
+            for future in futures:
+                future.result()
+
+        # O ranking responde 404 enquanto a correção ainda não gerou nenhuma posição.
+        admin_token = self.login(self.plan["admin"])
+        if admin_token:
+            for _ in range(self.max_polls):
+                status, _ = self.call(
+                    "ranking", "GET", f"/api/rankings/exams/{self.plan['exam_id']}/",
+                    token=admin_token, expected=(200, 404)
+                )
+                if status == 200:
+                    break
+                time.sleep(self.poll_interval)
+
+        elapsed = time.monotonic() - started
+        return {
+            "participants": len(participants),
+            "concurrency": self.concurrency,
+            "elapsed": elapsed,
+            "steps": self.stats.summary(elapsed),
+        }
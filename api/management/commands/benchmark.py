@@ -0,0 +1,56 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from api.benchmarks import compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda os micro-benchmarks de serialização, paginação, cache, correção e ranking "
+        "sobre um SQLite em memória e um cache local, opcionalmente salvando o resultado em JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=1000, help="Quantidade de questões, participantes e respostas.")
+        parser.add_argument("--rounds", type=int, default=10, help="Execuções medidas por benchmark.")
+        parser.add_argument("--warmup", type=int, default=1, help="Execuções de aquecimento por benchmark.")
+        parser.add_argument("--seed", type=int, default=0, help="Semente do gerador de dados sintéticos.")
+        parser.add_argument("--only", nargs="*", help="Nomes dos benchmarks a executar.")
+        parser.add_argument("--output", help="Arquivo JSON em que o resultado será salvo.")
+        parser.add_argument("--compare", help="Arquivo JSON de uma execução anterior para comparação.")
+
+    def handle(self, *args, **options):
+        test_caches = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=test_caches):
+                report = run_benchmarks(
+                    size=options["size"],
+                    rounds=options["rounds"],
+                    warmup=options["warmup"],
+                    seed=options["seed"],
+                    only=options["only"],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'benchmark':<20} {'mediana (ms)':>14} {'média (ms)':>12} {'desvio (ms)':>12} {'pico (KiB)':>12}")
+        for result in report["results"]:
+            self.stdout.write(
+                f"{result['name']:<20} {result['median'] * 1000:>14.3f} {result['mean'] * 1000:>12.3f} "
+                f"{result['stdev'] * 1000:>12.3f} {result['peak_memory'] / 1024:>12.1f}"
+            )
+
+        if options["compare"]:
+            with open(options["compare"]) as baseline_file:
+                baseline = json.load(baseline_file)
+            self.stdout.write(f"\nComparação com {baseline['meta'].get('commit') or options['compare']}:")
+            for name, old, new, change in compare(report, baseline):
+                self.stdout.write(f"{name:<20} {old * 1000:>10.3f} ms -> {new * 1000:>10.3f} ms ({change:+.1%})")
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {options['output']}"))
@@ -0,0 +1,38 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.benchmarks import run_connection_benchmark, temporary_file_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo de conexão com o banco por requisição em um SQLite em arquivo, comparando "
+        "uma conexão nova a cada requisição com o pool de conexões."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Requisições medidas em cada modo.")
+        parser.add_argument("--output", help="Arquivo JSON em que o resultado será salvo.")
+
+    def handle(self, *args, **options):
+        pooled_options = settings.DATABASES["default"]["OPTIONS"]
+        plain_options = {key: value for key, value in pooled_options.items() if key != "pool"}
+        report = {}
+        for name, db_options in (("sem pool", plain_options), ("com pool", pooled_options)):
+            with temporary_file_database(db_options):
+                report[name] = run_connection_benchmark(options["requests"])
+
+        self.stdout.write(f"{'modo':<10} {'caso':<18} {'mediana (ms)':>13} {'média (ms)':>11} {'p/s':>9}")
+        for name, results in report.items():
+            for result in results.values():
+                self.stdout.write(
+                    f"{name:<10} {result['name']:<18} {result['median'] * 1000:>13.3f} "
+                    f"{result['mean'] * 1000:>11.3f} {result['ops']:>9.0f}"
+                )
+        saved = report["sem pool"]["request"]["median"] - report["com pool"]["request"]["median"]
+        self.stdout.write(f"\nCusto de conexão removido por requisição: {saved * 1000:.3f} ms (mediana)")
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {options['output']}"))
@@ -0,0 +1,44 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api.benchmarks import run_write_benchmark, temporary_file_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão de escrita concorrente de respostas em um SQLite em arquivo, comparando a "
+        "configuração padrão com o modo WAL, os PRAGMAs e a fila de escrita."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Participantes gravando ao mesmo tempo.")
+        parser.add_argument("--writes", type=int, default=100, help="Respostas gravadas por participante.")
+        parser.add_argument("--seed", type=int, default=0, help="Semente do gerador de dados sintéticos.")
+        parser.add_argument("--output", help="Arquivo JSON em que o resultado será salvo.")
+
+    def handle(self, *args, **options):
+        modes = [
+            ("padrão", {"SQLITE_PRAGMAS": {}, "SQLITE_WRITE_QUEUE": False}, {}, False),
+            ("otimizado", {}, connection.settings_dict["OPTIONS"], True),
+        ]
+        report = {}
+        for name, overrides, db_options, use_queue in modes:
+            with temporary_file_database(db_options, **overrides):
+                report[name] = run_write_benchmark(
+                    threads=options["threads"], writes=options["writes"], use_queue=use_queue, seed=options["seed"]
+                )
+
+        self.stdout.write(f"{'modo':<12} {'escritas':>9} {'erros':>7} {'tempo (s)':>10} {'escritas/s':>12}")
+        for name, result in report.items():
+            self.stdout.write(
+                f"{name:<12} {result['writes']:>9} {result['errors']:>7} "
+                f"{result['elapsed']:>10.2f} {result['throughput']:>12.1f}"
+            )
+        baseline = report["padrão"]["throughput"]
+        if baseline:
+            self.stdout.write(f"\nGanho de vazão: {report['otimizado']['throughput'] / baseline:.1f}x")
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {options['output']}"))
@@ -0,0 +1,57 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.seeding import DEFAULT_CHUNK_SIZE, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera um conjunto de dados sintético e determinístico (usuários, provas, questões, alternativas, "
+        "participações, respostas e rankings) com bulk_create em lotes e uma senha compartilhada já processada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Quantidade de participantes.")
+        parser.add_argument("--admins", type=int, default=1, help="Quantidade de administradores (autores das provas).")
+        parser.add_argument("--exams", type=int, default=10, help="Quantidade de provas.")
+        parser.add_argument("--questions-per-exam", type=int, default=50, help="Questões criadas para cada prova.")
+        parser.add_argument("--choices-per-question", type=int, default=4, help="Alternativas de cada questão.")
+        parser.add_argument("--participations-per-exam", type=int, default=100, help="Participantes inscritos em cada prova.")
+        parser.add_argument("--answers-min", type=int, help="Mínimo de questões respondidas por participação (padrão: todas).")
+        parser.add_argument("--answers-max", type=int, help="Máximo de questões respondidas por participação (padrão: todas).")
+        parser.add_argument("--correct-rate", type=float, default=0.6, help="Probabilidade de cada resposta estar correta.")
+        parser.add_argument("--finished-rate", type=float, default=0.9, help="Probabilidade de cada participação estar finalizada.")
+        parser.add_argument("--prefix", default="seed", help="Prefixo dos nomes de usuário e das provas.")
+        parser.add_argument("--password", default="seed123", help="Senha compartilhada por todos os usuários.")
+        parser.add_argument("--seed", type=int, default=0, help="Semente do gerador de dados.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Registros por lote de inserção.")
+
+    def handle(self, *args, **options):
+        if options["admins"] < 1:
+            raise CommandError("É necessário ao menos um administrador para criar as provas.")
+        for option in ("correct_rate", "finished_rate"):
+            if not 0 <= options[option] <= 1:
+                raise CommandError(f"--{option.replace('_', '-')} deve estar entre 0 e 1.")
+
+        start = time.perf_counter()
+        counts = seed_dataset(
+            users=options["users"],
+            admins=options["admins"],
+            exams=options["exams"],
+            questions_per_exam=options["questions_per_exam"],
+            choices_per_question=options["choices_per_question"],
+            participations_per_exam=options["participations_per_exam"],
+            answers_min=options["answers_min"],
+            answers_max=options["answers_max"],
+            correct_rate=options["correct_rate"],
+            finished_rate=options["finished_rate"],
+            prefix=options["prefix"],
+            password=options["password"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            log=self.stdout.write,
+        )
+        elapsed = time.perf_counter() - start
+
+        total = sum(counts.values())
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"{total} registros criados em {elapsed:.1f}s ({summary})"))
@@ -0,0 +1,65 @@
+import json
+from django.core.management.base import BaseCommand
+from api.loadtest import ExamDaySimulation, STEPS, cleanup_exam_day, prepare_exam_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula o dia de prova contra uma instância em execução: prepara a prova e os participantes "
+        "no banco e dispara concorrentemente login, busca da prova, respostas, finalização, "
+        "acompanhamento da correção e ranking, reportando vazão, latências p50/p95/p99 e taxa de erro "
+        "por etapa. Para a correção terminar sem um worker, suba o servidor com CELERY_TASK_ALWAYS_EAGER=1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000", help="Endereço da instância em execução.")
+        parser.add_argument("--participants", type=int, default=1000, help="Quantidade de participantes.")
+        parser.add_argument("--questions", type=int, default=20, help="Quantidade de questões da prova.")
+        parser.add_argument("--concurrency", type=int, default=100, help="Participantes simultâneos.")
+        parser.add_argument("--ramp-up", type=float, default=0.0, help="Janela, em segundos, em que os participantes começam.")
+        parser.add_argument("--correct-rate", type=float, default=0.7, help="Probabilidade de acertar cada questão.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Intervalo entre consultas de progresso e ranking.")
+        parser.add_argument("--max-polls", type=int, default=30, help="Máximo de consultas de progresso e ranking.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Tempo limite de cada requisição.")
+        parser.add_argument("--seed", type=int, default=0, help="Semente das escolhas dos participantes.")
+        parser.add_argument("--output", help="Arquivo JSON em que o relatório será salvo.")
+        parser.add_argument("--keep-data", action="store_true", help="Mantém a prova e os participantes criados.")
+
+    def handle(self, *args, **options):
+        plan = prepare_exam_day(options["participants"], options["questions"])
+        self.stdout.write(f"Prova {plan['exam_id']} preparada com {options['participants']} participantes.")
+
+        simulation = ExamDaySimulation(
+            plan,
+            options["base_url"],
+            concurrency=options["concurrency"],
+            ramp_up=options["ramp_up"],
+            correct_rate=options["correct_rate"],
+            poll_interval=options["poll_interval"],
+            max_polls=options["max_polls"],
+            timeout=options["timeout"],
+            seed=options["seed"],
+        )
+        try:
+            report = simulation.run()
+        finally:
+            if not options["keep_data"]:
+                cleanup_exam_day(plan)
+
+        self.stdout.write(f"\nDuração total: {report['elapsed']:.2f}s")
+        self.stdout.write(
+            f"{'etapa':<12} {'reqs':>8} {'req/s':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'erros':>8}"
+        )
+        for step in STEPS:
+            stats = report["steps"].get(step)
+            if not stats:
+                continue
+            self.stdout.write(
+                f"{step:<12} {stats['requests']:>8} {stats['throughput']:>9.1f} {stats['p50'] * 1000:>10.1f} "
+                f"{stats['p95'] * 1000:>10.1f} {stats['p99'] * 1000:>10.1f} {stats['error_rate']:>8.1%}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Relatório salvo em {options['output']}"))
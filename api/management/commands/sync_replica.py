@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.replica import sync_replica
+
+
+class Command(BaseCommand):
+    help = "Copia o banco principal (SQLite) para a réplica de leitura configurada em DATABASE_REPLICA_NAME."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Repete a cópia a cada N segundos até ser interrompido (0 copia uma única vez)."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                pages = sync_replica()
+            except ValueError as error:
+                raise CommandError(str(error))
+            self.stdout.write(self.style.SUCCESS(f"Réplica sincronizada: {pages} páginas."))
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
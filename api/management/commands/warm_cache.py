@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from api import warming
+from api.models import ModelExam
+
+
+class Command(BaseCommand):
+    help = (
+        "Monta as entradas ausentes do cache: as primeiras páginas das listagens e o caderno e o "
+        "gabarito das provas em aberto (ou das indicadas com --exam). Use antes de abrir uma prova "
+        "e depois de deploys ou de um flush do Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exam", type=int, action="append", dest="exam_ids",
+            help="ID de uma prova a aquecer; pode ser repetido (padrão: provas com participações em aberto)."
+        )
+        parser.add_argument("--pages", type=int, help="Páginas de cada listagem (padrão: CACHE_WARM_LIST_PAGES).")
+        parser.add_argument(
+            "--concurrency", type=int, help="Trabalhos simultâneos (padrão: CACHE_WARM_CONCURRENCY)."
+        )
+
+    def handle(self, *args, **options):
+        exam_ids = options["exam_ids"]
+        if exam_ids:
+            missing = set(exam_ids) - set(ModelExam.objects.filter(id__in=exam_ids).values_list("id", flat=True))
+            if missing:
+                raise CommandError(f"Provas não encontradas: {', '.join(map(str, sorted(missing)))}.")
+
+        result = warming.warm(exam_ids, pages=options["pages"], concurrency=options["concurrency"])
+        message = f"Cache aquecido: {result['built']} entradas montadas, {result['failed']} falhas."
+        if result["failed"]:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
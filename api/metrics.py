@@ -0,0 +1,230 @@
+"""
+Coleta de métricas da API no formato texto do Prometheus.
+
+Cada processo (web ou worker do Celery) acumula suas métricas em memória e,
+periodicamente, grava um snapshot no cache compartilhado. O endpoint /metrics
+soma os snapshots de todos os processos, de forma que a coleta não custa
+nenhuma ida ao Redis por requisição.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_PROCESS_SET = "metrics_processes"
+METRICS_PROCESS_KEY = "metrics:process:{}"
+METRICS_PROCESS_TIMEOUT = 60 * 60 * 24
+
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = defaultdict(float)
+_gauges = {}
+_task_starts = {}
+_last_flush = 0.0
+
+
+def _new_histogram():
+    # Contagem por bucket (não acumulada), seguida de soma e total de observações.
+    return [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+
+
+def observe_request(route, method, status, duration):
+    """Registra a latência e o status de uma requisição atendida por uma rota."""
+    with _lock:
+        histogram = _histograms.get((route, method))
+        if histogram is None:
+            histogram = _histograms[(route, method)] = _new_histogram()
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                histogram[index] += 1
+                break
+        histogram[-2] += duration
+        histogram[-1] += 1
+        _counters[("api_requests_total", (("route", route), ("method", method), ("status", str(status))))] += 1
+
+
+def record_cache_event(family, event):
+    """Registra um acerto (hit), falha (miss), entrada vencida (stale) ou invalidação de uma família de cache."""
+    with _lock:
+        _counters[("api_cache_events_total", (("family", family), ("event", event)))] += 1
+
+
+def record_cache_tier(tier, event):
+    """
+    Registra um evento em um nível do cache, l1 (em memória) ou l2 (Redis): acerto (hit), falha (miss)
+    e, no L2, erro de conexão (error) ou chamada evitada pelo circuito aberto (bypass).
+    """
+    with _lock:
+        _counters[("api_cache_tier_total", (("tier", tier), ("event", event)))] += 1
+
+
+def observe_task(task_name, duration=None, lag=None):
+    """Atualiza os gauges de duração e de atraso na fila de uma tarefa do Celery."""
+    now = time.time()
+    with _lock:
+        if duration is not None:
+            _gauges[("celery_task_duration_seconds", (("task", task_name),))] = (duration, now)
+        if lag is not None:
+            _gauges[("celery_task_queue_lag_seconds", (("task", task_name),))] = (lag, now)
+
+
+def _snapshot():
+    with _lock:
+        return {
+            "histograms": {key: list(value) for key, value in _histograms.items()},
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+        }
+
+
+def flush():
+    """Grava o snapshot deste processo no cache compartilhado."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    try:
+        cache.set(METRICS_PROCESS_KEY.format(PROCESS_ID), _snapshot(), timeout=METRICS_PROCESS_TIMEOUT)
+        processes = cache.get(METRICS_PROCESS_SET, set())
+        if PROCESS_ID not in processes:
+            processes.add(PROCESS_ID)
+            cache.set(METRICS_PROCESS_SET, processes, timeout=None)
+    except Exception:
+        logger.exception("Falha ao gravar as métricas do processo %s", PROCESS_ID)
+
+
+def flush_due():
+    """Indica se o intervalo configurado entre gravações já passou."""
+    return time.monotonic() - _last_flush >= getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+
+
+def maybe_flush():
+    """Grava o snapshot apenas se o intervalo configurado já tiver passado."""
+    if flush_due():
+        flush()
+
+
+def collect():
+    """Soma os snapshots de todos os processos registrados no cache."""
+    flush()
+    processes = cache.get(METRICS_PROCESS_SET, set())
+    snapshots = cache.get_many([METRICS_PROCESS_KEY.format(process) for process in processes])
+
+    histograms = {}
+    counters = defaultdict(float)
+    gauges = {}
+    for snapshot in snapshots.values():
+        for key, values in snapshot["histograms"].items():
+            merged = histograms.setdefault(key, _new_histogram())
+            for index, value in enumerate(values):
+                merged[index] += value
+        for key, value in snapshot["counters"].items():
+            counters[key] += value
+        for key, (value, timestamp) in snapshot["gauges"].items():
+            if key not in gauges or gauges[key][1] < timestamp:
+                gauges[key] = (value, timestamp)
+
+    expired = {process for process in processes if METRICS_PROCESS_KEY.format(process) not in snapshots}
+    if expired:
+        cache.set(METRICS_PROCESS_SET, processes - expired, timeout=None)
+
+    return histograms, counters, gauges
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Gera o corpo de resposta do endpoint /metrics."""
+    histograms, counters, gauges = collect()
+    lines = [
+        "# HELP api_request_duration_seconds Latência das requisições por rota.",
+        "# TYPE api_request_duration_seconds histogram",
+    ]
+    for (route, method), values in sorted(histograms.items()):
+        labels = (("route", route), ("method", method))
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            cumulative += count
+            lines.append(f"api_request_duration_seconds_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"api_request_duration_seconds_bucket{_labels(labels + (('le', '+Inf'),))} {values[-1]}")
+        lines.append(f"api_request_duration_seconds_sum{_labels(labels)} {_number(values[-2])}")
+        lines.append(f"api_request_duration_seconds_count{_labels(labels)} {values[-1]}")
+
+    help_texts = {
+        "api_requests_total": ("counter", "Requisições atendidas por rota, método e status."),
+        "api_cache_events_total": ("counter", "Acertos, falhas, entradas vencidas e invalidações por família de cache."),
+        "api_cache_tier_total": ("counter", "Acessos ao cache por nível (l1, em memória no processo; l2, Redis) e resultado (hit, miss, error, bypass)."),
+        "celery_task_duration_seconds": ("gauge", "Duração da última execução de cada tarefa."),
+        "celery_task_queue_lag_seconds": ("gauge", "Tempo que a última execução de cada tarefa esperou na fila."),
+    }
+    series = defaultdict(list)
+    for (name, labels), value in counters.items():
+        series[name].append((labels, value))
+    for (name, labels), (value, _) in gauges.items():
+        series[name].append((labels, value))
+
+    for name, (kind, help_text) in help_texts.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series[name]):
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Descarta as métricas locais e os snapshots compartilhados."""
+    global _last_flush
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _gauges.clear()
+        _task_starts.clear()
+    _last_flush = 0.0
+    processes = cache.get(METRICS_PROCESS_SET, set())
+    cache.delete_many([METRICS_PROCESS_KEY.format(process) for process in processes])
+    cache.delete(METRICS_PROCESS_SET)
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    published_at = getattr(task.request, "published_at", None)
+    if published_at:
+        observe_task(task.name, lag=max(time.time() - published_at, 0.0))
+    _task_starts[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, **kwargs):
+    started_at = _task_starts.pop(task_id, None)
+    if started_at is not None:
+        observe_task(task.name, duration=time.perf_counter() - started_at)
+    maybe_flush()
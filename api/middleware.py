@@ -1,28 +1,132 @@
 import jwt
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.utils.functional import SimpleLazyObject
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
+from api import metrics
+from api.replica import ais_pinned, apin_user, is_pinned, pin_user, pinned_to_primary, replica_alias
 
 User = get_user_model()
 
-def get_user_from_token(request):
+def get_user_id_from_token(request):
     auth_header = request.headers.get('Authorization')
     if not auth_header or not auth_header.startswith('Bearer '):
-        return AnonymousUser()
-    
+        return None
+
     token = auth_header.split(' ')[1]
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        user_id = payload.get('user_id')
-        return User.objects.get(id=user_id)
-    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, User.DoesNotExist):
-        return AnonymousUser()
+        return payload.get('user_id')
+    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+        return None
+
+def get_user_from_token(request):
+    if not hasattr(request, '_jwt_user'):
+        user_id = get_user_id_from_token(request)
+        try:
+            # O usuário do token sempre vem do principal: um cadastro recente pode não estar na réplica.
+            with pinned_to_primary():
+                request._jwt_user = User.objects.get(id=user_id) if user_id else AnonymousUser()
+        except User.DoesNotExist:
+            request._jwt_user = AnonymousUser()
+    return request._jwt_user
+
+async def aget_user_from_token(request):
+    if not hasattr(request, '_jwt_user'):
+        user_id = get_user_id_from_token(request)
+        try:
+            with pinned_to_primary():
+                request._jwt_user = await User.objects.aget(id=user_id) if user_id else AnonymousUser()
+        except User.DoesNotExist:
+            request._jwt_user = AnonymousUser()
+    return request._jwt_user
     
 class JWTMiddleware:
+    """Autentica a requisição pelo token JWT.
+    Em views assíncronas o usuário deve ser obtido com `await request.auser()`."""
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
         request.user = SimpleLazyObject(lambda: get_user_from_token(request))
-        return self.get_response(request)    
\ No newline at end of file
+        request.auser = lambda: aget_user_from_token(request)
+        return self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """Fixa no banco principal, por alguns segundos, o usuário que acabou de fazer uma escrita."""
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user_id = get_user_id_from_token(request) if replica_alias() else None
+        if not user_id:
+            return self.get_response(request)
+        if request.method in self.safe_methods:
+            with pinned_to_primary(is_pinned(user_id)):
+                return self.get_response(request)
+        response = self.get_response(request)
+        if response.status_code < 400:
+            pin_user(user_id)
+        return response
+
+    async def __acall__(self, request):
+        user_id = get_user_id_from_token(request) if replica_alias() else None
+        if not user_id:
+            return await self.get_response(request)
+        if request.method in self.safe_methods:
+            with pinned_to_primary(await ais_pinned(user_id)):
+                return await self.get_response(request)
+        response = await self.get_response(request)
+        if response.status_code < 400:
+            await apin_user(user_id)
+        return response
+
+
+class MetricsMiddleware:
+    """Mede a latência e o status de cada requisição por rota."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, start)
+        if metrics.flush_due():
+            metrics.flush()
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start)
+        if metrics.flush_due():
+            await sync_to_async(metrics.flush)()
+        return response
+
+    def observe(self, request, response, start):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-19 01:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# As chaves para o catálogo só perdem a restrição no banco quando participações e respostas
+# ficam em um banco próprio (api/answers_db.py); com um único banco, nada muda.
+SPLIT = bool(getattr(settings, "ANSWERS_DATABASE", None))
+
+
+def catalog_key(to, related_name):
+    return models.ForeignKey(
+        db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name=related_name, to=to
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='modelanswer',
+            name='choice',
+            field=catalog_key('api.modelchoice', 'answers'),
+        ),
+        migrations.AlterField(
+            model_name='modelanswer',
+            name='question',
+            field=catalog_key('api.modelquestion', 'answers'),
+        ),
+        migrations.AlterField(
+            model_name='modelparticipation',
+            name='exam',
+            field=catalog_key('api.modelexam', 'participations'),
+        ),
+        migrations.AlterField(
+            model_name='modelparticipation',
+            name='user',
+            field=catalog_key(settings.AUTH_USER_MODEL, 'participations'),
+        ),
+    ] if SPLIT else []
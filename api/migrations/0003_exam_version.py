@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_answers_without_catalog_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelexam',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
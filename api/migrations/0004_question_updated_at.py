@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_exam_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelquestion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+def record_existing_catalog(apps, schema_editor):
+    # O feed começa com o catálogo atual, para que um cliente sem cursor receba tudo.
+    db = schema_editor.connection.alias
+    ModelChange = apps.get_model("api", "ModelChange")
+    ModelExam = apps.get_model("api", "ModelExam")
+    ModelQuestion = apps.get_model("api", "ModelQuestion")
+    ModelChoice = apps.get_model("api", "ModelChoice")
+
+    sources = [
+        ("exam", ModelExam.objects.using(db).order_by("id").values_list("id", flat=True)),
+        ("question", ModelQuestion.objects.using(db).order_by("id").values_list("id", flat=True)),
+        ("choice", ModelChoice.objects.using(db).order_by("id").values_list("id", flat=True)),
+    ]
+    for entity, ids in sources:
+        ModelChange.objects.using(db).bulk_create(
+            (ModelChange(entity=entity, object_id=object_id) for object_id in ids.iterator()), batch_size=1000
+        )
+    links = ModelExam.questions.through.objects.using(db).order_by("id").values_list("modelexam_id", "modelquestion_id")
+    ModelChange.objects.using(db).bulk_create(
+        (
+            ModelChange(entity="exam_question", object_id=exam_id, related_id=question_id)
+            for exam_id, question_id in links.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_question_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('exam', 'Prova'), ('question', 'Questão'), ('choice', 'Alternativa'), ('exam_question', 'Vínculo')], max_length=16)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('related_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='modelchoice',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='modelexam',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(record_existing_catalog, migrations.RunPython.noop, hints={'model_name': 'modelchange'}),
+    ]
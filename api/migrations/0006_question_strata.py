@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_sync_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelquestion',
+            name='difficulty',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelquestion',
+            name='tag',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='modelquestion',
+            index=models.Index(fields=['tag', 'id'], name='question_tag_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='modelquestion',
+            index=models.Index(fields=['difficulty', 'id'], name='question_difficulty_id_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-19 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_question_strata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelChangeCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('floor', models.PositiveBigIntegerField()),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('compacted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='modelchange',
+            index=models.Index(fields=['entity', 'object_id', 'id'], name='change_entity_object_idx'),
+        ),
+    ]
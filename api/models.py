@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group, Permission
 from django.db import models
 
+from api.answers_db import catalog_key
+
 class CustomUserManager(BaseUserManager):
     """
     Custom manager for User to use email as the unique identifier.
@@ -59,13 +61,29 @@ class ModelExam(models.Model):
     participants = models.ManyToManyField(User, through="ModelParticipation", related_name="exams")
     questions = models.ManyToManyField('ModelQuestion', related_name="exams")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Incrementada a cada mudança no conteúdo da prova (api/signals.py); identifica o caderno em cache.
+    version = models.PositiveIntegerField(default=1)
+
+    def save(self, *args, **kwargs):
+        # A versão só é alterada por bump_exam_versions; uma instância carregada antes de um
+        # incremento não pode sobrescrevê-la com o valor antigo.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "version"
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+# Participações e respostas podem ficar em um banco próprio (api/answers_db.py). Nesse caso, as
+# chaves para o catálogo (usuários, provas, questões e alternativas) não têm restrição no banco
+# e a exclusão em cascata é feita pelos sinais em api/signals.py.
 class ModelParticipation(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="participations")
-    exam = models.ForeignKey(ModelExam, on_delete=models.CASCADE, related_name="participations")
+    user = catalog_key(User, related_name="participations")
+    exam = catalog_key(ModelExam, related_name="participations")
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     score = models.FloatField(default=0.0)
@@ -75,7 +93,19 @@ class ModelParticipation(models.Model):
 
 class ModelQuestion(models.Model):
     text = models.TextField()
+    # Assunto e dificuldade, usados como estratos na montagem aleatória de provas (api/assembly.py).
+    tag = models.CharField(max_length=64, blank=True, default="")
+    difficulty = models.PositiveSmallIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Também atualizada quando mudam as alternativas ou as provas vinculadas (api/signals.py); origem do ETag.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # A amostragem percorre os IDs de cada estrato por faixas.
+        indexes = [
+            models.Index(fields=["tag", "id"], name="question_tag_id_idx"),
+            models.Index(fields=["difficulty", "id"], name="question_difficulty_id_idx"),
+        ]
 
     def __str__(self):
         exam_names = ", ".join(exam.name for exam in self.exams.all())
@@ -85,14 +115,52 @@ class ModelChoice(models.Model):
     question = models.ForeignKey(ModelQuestion, on_delete=models.CASCADE, related_name="choices")
     text = models.CharField(max_length=255)
     is_correct = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.question.text[:50]} - {self.text}"
 
+class ModelChange(models.Model):
+    """
+    Registro de mudanças do catálogo para a sincronização incremental (api/sync.py). O ID é o
+    cursor do feed; exclusões ficam registradas como tombstones (`deleted`).
+    """
+    EXAM = "exam"
+    QUESTION = "question"
+    CHOICE = "choice"
+    EXAM_QUESTION = "exam_question"
+    ENTITIES = [(EXAM, "Prova"), (QUESTION, "Questão"), (CHOICE, "Alternativa"), (EXAM_QUESTION, "Vínculo")]
+
+    entity = models.CharField(max_length=16, choices=ENTITIES)
+    object_id = models.PositiveBigIntegerField()
+    # Nos vínculos, object_id é a prova e related_id a questão.
+    related_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # A compactação (api/sync.py) procura, para cada linha, uma mudança posterior do mesmo registro.
+        indexes = [models.Index(fields=["entity", "object_id", "id"], name="change_entity_object_idx")]
+
+    def __str__(self):
+        return f"{self.id} - {self.entity} {self.object_id}{' (excluído)' if self.deleted else ''}"
+
+class ModelChangeCompaction(models.Model):
+    """
+    Compactações do log de mudanças. O maior `floor` é o menor cursor aceito pelo feed: abaixo
+    dele, exclusões podem ter sido descartadas e o cliente precisa sincronizar tudo de novo.
+    """
+    floor = models.PositiveBigIntegerField()
+    removed = models.PositiveIntegerField(default=0)
+    compacted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Compactação até {self.floor} ({self.removed} removidas)"
+
 class ModelAnswer(models.Model):
     participation = models.ForeignKey(ModelParticipation, on_delete=models.CASCADE, related_name="answers")
-    question = models.ForeignKey(ModelQuestion, on_delete=models.CASCADE, related_name="answers")
-    choice = models.ForeignKey(ModelChoice, on_delete=models.CASCADE, related_name="answers")
+    question = catalog_key(ModelQuestion, related_name="answers")
+    choice = catalog_key(ModelChoice, related_name="answers")
     answered_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
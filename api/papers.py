@@ -0,0 +1,203 @@
+"""
+Caderno de prova dos participantes.
+
+O caderno é a prova com as suas questões e alternativas, sem o gabarito. Ele é
+montado uma única vez por versão da prova (`ModelExam.version`) e guardado no
+cache já renderizado, como as listagens. Quando a prova abre e todos os
+participantes pedem o caderno ao mesmo tempo, só quem obtém o lock no cache o
+monta; os demais esperam que ele apareça, em vez de repetir as consultas.
+
+O gabarito usado na correção (`calculate_score`) e o mapa das alternativas de
+cada questão, que valida as folhas de resposta enviadas de uma vez
+(api/bundles.py), também são guardados por versão.
+
+Com `EXAM_PAPER_SHUFFLE`, cada participante recebe as questões e as alternativas
+em uma ordem própria, derivada de um HMAC da participação com uma chave da prova
+(obtida do `SECRET_KEY`, sem nada guardado no banco). A ordem é recalculada a cada
+pedido sobre o caderno compartilhado em cache, que continua único por versão. Os
+detalhes da prova vistos pelo participante (`shuffle_exam`) seguem a mesma ordem,
+para que a ordem original não fique exposta por outra rota.
+"""
+import asyncio
+import hashlib
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from api import renderers
+from api.metrics import record_cache_event
+from api.models import ModelChoice, ModelExam, ModelQuestion
+from api.utils import decode_cached_body, encode_cached_body
+
+EXAM_PAPER_KEY = "exam_paper:{}:{}"
+EXAM_PAPER_LOCK_KEY = "exam_paper_lock:{}:{}"
+EXAM_ANSWER_KEY = "exam_answer_key:{}:{}"
+EXAM_CHOICES_KEY = "exam_choices:{}:{}"
+SHUFFLE_SALT = "api.papers.shuffle"
+
+
+def exam_version(exam_id):
+    """Versão atual da prova; levanta ModelExam.DoesNotExist se ela não existe."""
+    return ModelExam.objects.values_list("version", flat=True).get(id=exam_id)
+
+
+async def abuild_exam_paper(exam_id):
+    """Monta o caderno da prova e retorna o corpo pronto para o cache (ver encode_cached_body)."""
+    exam = await ModelExam.objects.only("id", "name", "version").aget(id=exam_id)
+    questions = {}
+    async for question_id, text in (
+        ModelQuestion.objects.filter(exams__id=exam_id).order_by("id").values_list("id", "text")
+    ):
+        questions[question_id] = {"id": question_id, "text": text, "choices": []}
+    async for choice_id, question_id, text in (
+        ModelChoice.objects.filter(question__exams__id=exam_id).order_by("id").values_list("id", "question_id", "text")
+    ):
+        questions[question_id]["choices"].append({"id": choice_id, "text": text})
+
+    paper = {"id": exam.id, "name": exam.name, "version": exam.version, "questions": list(questions.values())}
+    return encode_cached_body(renderers.dumps(paper))
+
+
+async def aget_exam_paper(exam_id, version):
+    """
+    Retorna o caderno da versão indicada, montando-o se necessário. Em uma falha do cache,
+    apenas um processo monta o caderno por vez; se o dono do lock não terminar dentro de
+    EXAM_PAPER_LOCK_TIMEOUT, quem espera monta o caderno por conta própria.
+    """
+    key = EXAM_PAPER_KEY.format(exam_id, version)
+    payload = await cache.aget(key)
+    if payload is not None:
+        record_cache_event("exam_paper", "hit")
+        return payload
+    record_cache_event("exam_paper", "miss")
+
+    lock_key = EXAM_PAPER_LOCK_KEY.format(exam_id, version)
+    deadline = time.monotonic() + settings.EXAM_PAPER_LOCK_TIMEOUT
+    locked = await cache.aadd(lock_key, True, timeout=settings.EXAM_PAPER_LOCK_TIMEOUT)
+    while not locked and time.monotonic() < deadline:
+        await asyncio.sleep(settings.EXAM_PAPER_WAIT_INTERVAL)
+        payload = await cache.aget(key)
+        if payload is not None:
+            return payload
+        locked = await cache.aadd(lock_key, True, timeout=settings.EXAM_PAPER_LOCK_TIMEOUT)
+
+    try:
+        # O dono anterior do lock pode ter terminado entre a primeira leitura e o lock.
+        payload = await cache.aget(key)
+        if payload is None:
+            payload = await abuild_exam_paper(exam_id)
+            await cache.aset(key, payload, timeout=settings.EXAM_PAPER_CACHE_TIMEOUT)
+        return payload
+    finally:
+        if locked:
+            await cache.adelete(lock_key)
+
+
+def shuffle_key(exam_id, participation_id):
+    """Semente da ordem do caderno da participação: HMAC da participação com a chave da prova."""
+    exam_secret = salted_hmac(SHUFFLE_SALT, f"exam:{exam_id}").digest()
+    return salted_hmac(SHUFFLE_SALT, f"participation:{participation_id}", secret=exam_secret).digest()
+
+
+def _shuffled(items, key, *scope, ids=None):
+    # Ordena pelo hash de cada ID com a semente: a ordem não depende da versão do Python e a
+    # posição relativa dos itens se mantém quando a prova ganha ou perde questões.
+    ids = [item["id"] for item in items] if ids is None else ids
+    def rank(index):
+        return hashlib.blake2b(":".join(map(str, (*scope, ids[index]))).encode(), key=key, digest_size=8).digest()
+    return [items[index] for index in sorted(range(len(items)), key=rank)]
+
+
+def shuffle_paper(payload, exam_id, participation_id):
+    """
+    Corpo JSON do caderno em cache (ver encode_cached_body) com as questões e as alternativas
+    na ordem da participação.
+    """
+    paper = renderers.loads(decode_cached_body(payload))
+    key = shuffle_key(exam_id, participation_id)
+    paper["questions"] = _shuffled(paper["questions"], key)
+    for question in paper["questions"]:
+        question["choices"] = _shuffled(question["choices"], key, question["id"])
+    return renderers.dumps(paper)
+
+
+def shuffle_exam(data, exam, participation_id):
+    """
+    Prova montada por api/fieldsets.py a partir de `exam`, com as questões e as alternativas
+    na mesma ordem do caderno da participação. Os IDs vêm dos objetos já carregados, pois a
+    seleção pode ter deixado o campo `id` de fora.
+    """
+    if "questions" not in data:
+        return data
+    key = shuffle_key(exam.id, participation_id)
+    questions = list(exam.questions.all())
+    for item, question in zip(data["questions"], questions):
+        if isinstance(item, dict) and "choices" in item:
+            item["choices"] = _shuffled(item["choices"], key, question.id, ids=[choice.id for choice in question.choices.all()])
+    data["questions"] = _shuffled(data["questions"], key, ids=[question.id for question in questions])
+    return data
+
+
+def build_answer_key(exam_id):
+    """Total de questões da prova e IDs das alternativas corretas."""
+    total_questions = ModelQuestion.objects.filter(exams__id=exam_id).count()
+    correct_choices = (
+        ModelChoice.objects.filter(is_correct=True, question__exams__id=exam_id).order_by("id").values_list("id", flat=True)
+    )
+    return total_questions, tuple(correct_choices)
+
+
+def build_choice_questions(exam_id):
+    """Questão de cada alternativa da prova, como {id da alternativa: id da questão}."""
+    return dict(ModelChoice.objects.filter(question__exams__id=exam_id).values_list("id", "question_id"))
+
+
+def _get_versioned(family, key, build, exam_id):
+    value = cache.get(key)
+    if value is not None:
+        record_cache_event(family, "hit")
+        return value
+    record_cache_event(family, "miss")
+    value = build(exam_id)
+    cache.set(key, value, timeout=settings.EXAM_PAPER_CACHE_TIMEOUT)
+    return value
+
+
+def get_answer_key(exam_id, version):
+    """Gabarito da versão indicada, como em build_answer_key, montando-o se necessário."""
+    return _get_versioned("answer_key", EXAM_ANSWER_KEY.format(exam_id, version), build_answer_key, exam_id)
+
+
+def get_choice_questions(exam_id, version):
+    """Mapa da versão indicada, como em build_choice_questions, montando-o se necessário."""
+    return _get_versioned("exam_choices", EXAM_CHOICES_KEY.format(exam_id, version), build_choice_questions, exam_id)
+
+
+def paper_digest(exam_id, version):
+    """
+    Resumo do que a correção usa na versão indicada: o mapa das alternativas e o gabarito.
+    Não muda com alterações que não afetam a folha, como o nome da prova ou o seu autor.
+    """
+    content = (sorted(get_choice_questions(exam_id, version).items()), get_answer_key(exam_id, version))
+    return hashlib.blake2b(repr(content).encode(), digest_size=16).hexdigest()
+
+
+def warm_exam(exam_id):
+    """
+    Monta o caderno e o gabarito da versão atual da prova que ainda não estiverem no cache
+    (api/warming.py). Retorna quantas entradas foram montadas.
+    """
+    version = exam_version(exam_id)
+    built = 0
+    paper_key = EXAM_PAPER_KEY.format(exam_id, version)
+    if cache.get(paper_key) is None:
+        cache.set(paper_key, async_to_sync(abuild_exam_paper)(exam_id), timeout=settings.EXAM_PAPER_CACHE_TIMEOUT)
+        built += 1
+    answer_key = EXAM_ANSWER_KEY.format(exam_id, version)
+    if cache.get(answer_key) is None:
+        cache.set(answer_key, build_answer_key(exam_id), timeout=settings.EXAM_PAPER_CACHE_TIMEOUT)
+        built += 1
+    return built
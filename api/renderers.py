@@ -0,0 +1,39 @@
+"""
+Renderização e leitura de JSON com orjson.
+
+O `NinjaAPI` usa `ORJSONRenderer` e `ORJSONParser` no lugar dos padrões do Ninja,
+baseados no módulo json. Datas e horas são serializadas nativamente pelo orjson
+(ISO 8601 com sufixo "Z" em UTC); os demais tipos que ele não conhece (modelos
+do Pydantic, Decimal, URLs, textos traduzíveis) caem no `NinjaJSONEncoder`.
+As respostas pré-renderizadas do cache usam o mesmo `dumps`, de modo que o
+corpo servido do cache é idêntico ao renderizado pela rota.
+"""
+import orjson
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_fallback_encoder = NinjaJSONEncoder()
+
+
+def dumps(data):
+    """Serializa `data` em JSON (bytes UTF-8)."""
+    return orjson.dumps(data, default=_fallback_encoder.default, option=ORJSON_OPTIONS)
+
+
+def loads(body):
+    return orjson.loads(body)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):
+        return dumps(data)
+
+
+class ORJSONParser(Parser):
+    def parse_body(self, request):
+        return loads(request.body)
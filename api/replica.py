@@ -0,0 +1,132 @@
+"""
+Roteamento de leituras para uma réplica do banco.
+
+As escritas e as leituras comuns vão sempre para o banco principal. Apenas as
+rotas marcadas com `replica_reads` (listagens e ranking) leem da réplica
+configurada em `settings.REPLICA_DATABASE`. Depois de uma escrita, o usuário
+fica fixado no banco principal por `REPLICA_STICKY_SECONDS`, para que sempre
+enxergue o que acabou de gravar, mesmo que a réplica esteja atrasada.
+
+Para testes locais, a réplica pode ser um segundo arquivo SQLite, copiado do
+principal por `sync_replica` (comando `manage.py sync_replica` ou tarefa
+periódica do Celery).
+"""
+import contextlib
+import functools
+import sqlite3
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+REPLICA_PIN_KEY = "replica_pin:{}"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_pinned = ContextVar("replica_pinned", default=False)
+
+
+def replica_alias():
+    """Alias da réplica, ou None quando nenhuma está configurada."""
+    return getattr(settings, "REPLICA_DATABASE", None)
+
+
+@contextlib.contextmanager
+def reading_from_replica():
+    """Permite que as leituras do bloco sejam atendidas pela réplica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextlib.contextmanager
+def pinned_to_primary(pinned=True):
+    """Força as leituras do bloco a irem para o banco principal."""
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def replica_reads(view):
+    """Marca uma view (síncrona ou assíncrona) cujas leituras podem ir para a réplica."""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            with reading_from_replica():
+                return await view(*args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with reading_from_replica():
+                return view(*args, **kwargs)
+    return wrapper
+
+
+def pin_user(user_id):
+    """Fixa o usuário no banco principal após uma escrita."""
+    cache.set(REPLICA_PIN_KEY.format(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(REPLICA_PIN_KEY.format(user_id)))
+
+
+async def apin_user(user_id):
+    await cache.aset(REPLICA_PIN_KEY.format(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+async def ais_pinned(user_id):
+    return bool(await cache.aget(REPLICA_PIN_KEY.format(user_id)))
+
+
+class ReplicaRouter:
+    """Envia para a réplica apenas as leituras permitidas de usuários não fixados no principal."""
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if alias and _replica_reads.get() and not _pinned.get():
+            return alias
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema junto com os dados, pela replicação.
+        return db != replica_alias()
+
+
+def sync_replica():
+    """
+    Copia o banco principal para a réplica com a API de backup do SQLite, que pode rodar
+    com as duas bases em uso. Retorna o número de páginas copiadas.
+    """
+    alias = replica_alias()
+    if not alias:
+        raise ValueError("Nenhuma réplica configurada em REPLICA_DATABASE.")
+    primary, replica = connections["default"].settings_dict, connections[alias].settings_dict
+    for database in (primary, replica):
+        if database["ENGINE"] != "django.db.backends.sqlite3":
+            raise ValueError("A sincronização local só é suportada entre bancos SQLite.")
+
+    return copy_sqlite(primary["NAME"], replica["NAME"])
+
+
+def copy_sqlite(source_path, target_path):
+    """Copia um arquivo SQLite para outro pela API de backup e retorna o número de páginas."""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+        return source.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+        source.close()
@@ -1,12 +1,16 @@
 from ninja import Router
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, aget_object_or_404
 from api.models import ModelChoice, ModelQuestion, ModelAnswer, ModelParticipation
 from api.schemas import ErrorSchema, AnswerSchema, AnswerCreateSchema, AnswerUpdateSchema
-from api.utils import is_authenticated, order_queryset, paginate_queryset, clear_list_answers_cache, add_answer_cache_key
+from api.utils import aload_user, is_authenticated, order_queryset, paginate_queryset, clear_list_answers_cache, answers_with_details, encode_cached_json, cached_json_response
 from ninja.errors import HttpError
 from django.db.models import Q
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from api.fieldsets import parse_selection, selection_response, serializer
+from api.list_cache import aget_cached_list
+from api.replica import replica_reads
+from api.sqlite import run_write
+from django.db import router as db_router
 
 User = get_user_model()
 
@@ -25,19 +29,21 @@ def create_answer(request, payload: AnswerCreateSchema):
 
     question = get_object_or_404(ModelQuestion, id=payload.question_id)
 
-    if not question.exams.filter(id=participation.exam.id).exists():
+    if not question.exams.filter(id=participation.exam_id).exists():
         raise HttpError(403, "Apenas participantes podem responder questões da prova.")
 
     choice = get_object_or_404(ModelChoice, id=payload.choice_id, question=question)
 
 
-    answer = ModelAnswer.objects.create(
+    answer = run_write(
+        ModelAnswer.objects.create,
         participation=participation,
         question=question,
-        choice = choice
+        choice = choice,
+        using=db_router.db_for_write(ModelAnswer)
     )
     clear_list_answers_cache()
-    return 201, AnswerSchema.model_validate(answer)
+    return 201, AnswerSchema.model_validate(answers_with_details().get(id=answer.id))
 
 @router.patch("/{answer_id}/", response={200: AnswerSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def update_answer(request, answer_id: int, payload: AnswerUpdateSchema):
@@ -46,7 +52,7 @@ def update_answer(request, answer_id: int, payload: AnswerUpdateSchema):
     
     is_authenticated(request)
 
-    answer = get_object_or_404(ModelAnswer, id=answer_id)
+    answer = get_object_or_404(answers_with_details(), id=answer_id)
 
     if answer.participation.user != request.user:
         raise HttpError(403, "Apenas o autor da resposta pode atualizá-la.")
@@ -60,58 +66,85 @@ def update_answer(request, answer_id: int, payload: AnswerUpdateSchema):
     return 200, AnswerSchema.model_validate(answer)
 
 @router.get("/participants/{participation_id}/", response={200: list[AnswerSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
-def list_answers(
+@replica_reads
+async def list_answers(
     request,
     participation_id: int,
     query: str = None,
     order_by: str = "-id",
     page: int = 1,
     page_size: int = 10,
+    fields: str = None,
+    expand: str = None,
 ):
     """
     Lista todas as respostas com busca, ordenação e paginação opcionais.
     É possível ordená-las por meio do campo "id" por meio da rota: /api/answers/participants/{participation_id}/?order_by=-id
     A páginação é feita por meio da rota: /api/answers/participants/{participation_id}/?page=<int>&page_size=<int>, em que os parâmetros page e page_size podem ser alterados.
     A busca por string é feita pelo campo text e pode ser testada acessando a rota: /api/answers/participants/{participation_id}/?query=
+    Os campos e as relações embutidas podem ser escolhidos com /api/answers/participants/{participation_id}/?fields=id,question,choice&expand=choice
     """
+    await aload_user(request)
     is_authenticated(request)
 
+    selection = parse_selection("answer", fields, expand)
     cache_key = f"answers-{participation_id}-{request.user.id}-{query}-{order_by}-{page}-{page_size}"
-    cached_data = cache.get(cache_key)
-
-    if cached_data:
-        return cached_data 
+    if selection:
+        cache_key += f"-{selection.key}"
+    payload = await aget_cached_list(
+        "answers", cache_key, build_answers_page,
+        participation_id=participation_id, user_id=request.user.id, query=query, order_by=order_by,
+        page=page, page_size=page_size, fields=fields, expand=expand,
+    )
+    return cached_json_response(request, payload)
 
-    participation = get_object_or_404(ModelParticipation, id=participation_id, user=request.user)
+async def build_answers_page(participation_id, user_id, query, order_by, page, page_size, fields=None, expand=None):
+    """Monta uma página das respostas de uma participação, pronta para o cache (api/list_cache.py)."""
+    selection = parse_selection("answer", fields, expand)
+    participation = await aget_object_or_404(ModelParticipation, id=participation_id, user_id=user_id)
 
-    answers = ModelAnswer.objects.filter(participation=participation)
+    answers = (selection.queryset() if selection else answers_with_details()).filter(participation=participation)
 
     if query:
-        answers = answers.filter(Q(question__text__icontains=query) | Q(choice__text__icontains=query))
+        # Questões e alternativas podem estar em outro banco: a busca é feita lá e filtrada por IDs.
+        question_ids = [
+            question_id async for question_id in ModelQuestion.objects.filter(
+                exams__id=participation.exam_id, text__icontains=query
+            ).values_list("id", flat=True)
+        ]
+        choice_ids = [
+            choice_id async for choice_id in ModelChoice.objects.filter(
+                question__exams__id=participation.exam_id, text__icontains=query
+            ).values_list("id", flat=True)
+        ]
+        answers = answers.filter(Q(question_id__in=question_ids) | Q(choice_id__in=choice_ids))
 
     answers = order_queryset(answers, order_by)
     answers = paginate_queryset(answers, page, page_size)
 
-    results = [AnswerSchema.model_validate(answer) for answer in answers]
-
-    cache.set(cache_key, results, timeout=300)
-    add_answer_cache_key(cache_key)
-
-    return results
+    serialize = serializer("answer", selection)
+    return encode_cached_json([serialize(answer) async for answer in answers])
 
 @router.get("/{answer_id}/", response={200: AnswerSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
-def get_answer_details(request, answer_id: int):
+def get_answer_details(request, answer_id: int, fields: str = None, expand: str = None):
 
     """Recupera detalhes de uma resposta por meio do ID.
-    Lembre-se de estar autenticado com o participante"""
+    Lembre-se de estar autenticado com o participante
+    Os campos e as relações embutidas podem ser escolhidos com ?fields=id,question,choice&expand=question.choices"""
     is_authenticated(request)
 
-    answer = get_object_or_404(ModelAnswer, id=answer_id)
+    selection = parse_selection("answer", fields, expand)
+    if selection:
+        answer = get_object_or_404(selection.queryset(), id=answer_id)
+        author_id = ModelParticipation.objects.filter(id=answer.participation_id).values_list("user_id", flat=True).first()
+    else:
+        answer = get_object_or_404(answers_with_details(), id=answer_id)
+        author_id = answer.participation.user_id
 
-    if answer.participation.user != request.user:
+    if author_id != request.user.id:
         raise HttpError(403, "Apenas o autor da resposta pode obter seus detalhes.")
 
-    return AnswerSchema.model_validate(answer)
+    return selection_response(serializer("answer", selection)(answer))
 
 @router.delete("/{answer_id}/", response={204: None, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def delete_answer(request, answer_id: int):
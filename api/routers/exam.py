@@ -1,10 +1,16 @@
 from ninja import Router
-from django.core.cache import cache
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from api.fieldsets import parse_selection, selection_response, serializer
+from api.list_cache import aget_cached_list
+from api.papers import aget_exam_paper, shuffle_exam, shuffle_paper
+from api.replica import replica_reads
+from django.shortcuts import get_object_or_404, aget_object_or_404
 from api.models import ModelExam, ModelParticipation
-from api.schemas import ExamSchema, ExamCreateSchema, ExamUpdateSchema, ErrorSchema, ParticipationSchema, ParticipationCreateSchema, ParticipationUpdateSchema
-from api.tasks import calculate_score
-from api.utils import is_authenticated, is_admin, order_queryset, paginate_queryset, clear_list_exams_cache, add_cache_key
+from api.schemas import AnswerSheetSchema, ExamAssembleSchema, ExamCloneSchema, ExamBundleSchema, ExamPaperSchema, SubmissionSchema, ExamSchema, ExamCreateSchema, ExamUpdateSchema, ErrorSchema, ParticipationSchema, ParticipationCreateSchema, ParticipationUpdateSchema
+from api.tasks import calculate_score, generate_ranking
+from api.utils import aload_user, is_authenticated, is_admin, order_queryset, paginate_queryset, clear_list_exams_cache, clear_list_questions_cache, clear_list_answers_cache, exams_with_details, participations_with_details, encode_cached_body, encode_cached_json, cached_json_response, make_etag, not_modified, with_etag
+from api import assembly, bundles
+from django.db import transaction
 from ninja.errors import HttpError
 from django.db.models import Q
 from django.contrib.auth import get_user_model
@@ -12,6 +18,11 @@ User = get_user_model()
 
 router = Router(tags=["Exams"])
 
+# Chave de uma página da listagem no cache (também usada pelo aquecimento, api/warming.py).
+LIST_EXAMS_KEY = "list_exams:{}:{}:{}:{}"
+# Gabarito da prova, omitido dos detalhes servidos a participantes.
+ANSWER_KEY_FIELDS = ("questions.choices.is_correct",)
+
 @router.post("/", response={201: ExamSchema, 401: ErrorSchema, 403: ErrorSchema, 422: ErrorSchema})
 def create_exam(request, payload: ExamCreateSchema):
     """Cria uma prova
@@ -25,26 +36,53 @@ def create_exam(request, payload: ExamCreateSchema):
     clear_list_exams_cache()
     return 201, ExamSchema.model_validate(exam)
 
-@router.get("/", response={200: list[ExamSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def list_exams(request, query: str = None, order_by: str = "-name", page: int = 1, page_size: int = 10):
+@router.post("/random/", response={201: ExamSchema, 401: ErrorSchema, 403: ErrorSchema, 422: ErrorSchema})
+def assemble_exam(request, payload: ExamAssembleSchema):
+    """Cria uma prova com `size` questões sorteadas do banco de questões.
+    Com stratify_by=tag ou stratify_by=difficulty, as questões são divididas entre os assuntos ou dificuldades proporcionalmente ao banco.
+    O sorteio usa faixas de IDs no índice em vez de ordenar o banco inteiro; com `seed`, é reproduzível.
+    Apenas administradores podem montar provas."""
+    is_authenticated(request)
+    is_admin(request)
+
+    question_ids = assembly.pick_questions(payload.size, payload.stratify_by, payload.seed)
+    with transaction.atomic():
+        exam = ModelExam.objects.create(name=payload.name, created_by=request.user)
+        # Uma única inserção na tabela intermediária, com os sinais dos vínculos (api/signals.py).
+        exam.questions.add(*question_ids)
+
+    clear_list_exams_cache()
+    clear_list_questions_cache()
+    return 201, ExamSchema.model_validate(exams_with_details().get(id=exam.id))
+
+@router.get("/", response={200: list[ExamSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
+@replica_reads
+async def list_exams(request, query: str = None, order_by: str = "-name", page: int = 1, page_size: int = 10, fields: str = None, expand: str = None):
     """Lista todas as provas com busca, ordenação e paginação opcionais.
     É possível ordená-las por meio do campo created_at por meio da rota: /api/exams/?order_by=-name
     A páginação é feita por meio da rota: /api/exams/?page=<int>&page_size=<int>, em que os parâmetros page e page_size podem ser alterados.
-    A busca por string é feita pelo campo text e pode ser testada acessando a rota: /api/exams/?query="""
+    A busca por string é feita pelo campo text e pode ser testada acessando a rota: /api/exams/?query=
+    Os campos e as relações embutidas podem ser escolhidos com /api/exams/?fields=id,name,questions&expand=created_by"""
+    await aload_user(request)
     is_authenticated(request)
     is_admin(request)
 
-    cache_key = f"list_exams:{query}:{order_by}:{page}:{page_size}"
-    cached_data = cache.get(cache_key)
+    selection = parse_selection("exam", fields, expand)
+    cache_key = LIST_EXAMS_KEY.format(query, order_by, page, page_size)
+    if selection:
+        cache_key += f":{selection.key}"
 
-    if cached_data:
-        return cached_data
+    payload = await aget_cached_list(
+        "exams", cache_key, build_exams_page,
+        query=query, order_by=order_by, page=page, page_size=page_size, fields=fields, expand=expand,
+    )
+    return cached_json_response(request, payload)
+
+async def build_exams_page(query, order_by, page, page_size, fields=None, expand=None):
+    """Monta uma página da listagem de provas, pronta para o cache (api/list_cache.py)."""
+    selection = parse_selection("exam", fields, expand)
+    exams = selection.queryset() if selection else exams_with_details()
 
-    try:    
-        exams = ModelExam.objects.all()
-    except ModelExam.DoesNotExist:
-        raise HttpError(404, "Não foram encontradas provas")
-        
     if query:
         exams = exams.filter(Q(name__icontains=query))
 
@@ -52,24 +90,120 @@ def list_exams(request, query: str = None, order_by: str = "-name", page: int =
 
     exams = paginate_queryset(exams, page, page_size)
 
-    results = [ExamSchema.model_validate(exam) for exam in exams]
-    cache.set(cache_key, results, timeout=300)
-    add_cache_key(cache_key)
-    return results
+    serialize = serializer("exam", selection)
+    return encode_cached_json([serialize(exam) async for exam in exams])
 
 
-@router.get("/{exam_id}/", response={200: ExamSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def get_exam_details(request, exam_id: int):
+@router.get("/{exam_id}/", response={200: ExamSchema, 304: None, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
+async def get_exam_details(request, exam_id: int, fields: str = None, expand: str = None):
     """Recupera detalhes da prova por meio do ID.
-    Participantes podem recuperar informações das provas em que estão inscritos"""
+    Participantes podem recuperar informações das provas em que estão inscritos, sem o campo is_correct das alternativas (veja /api/exams/{exam_id}/paper/)
+    e com as questões e alternativas na mesma ordem do seu caderno de prova.
+    Os campos e as relações embutidas podem ser escolhidos com ?fields=id,name,questions&expand=questions.choices
+    A resposta traz um ETag derivado da versão da prova; com If-None-Match, a rota responde 304 se nada mudou."""
+    await aload_user(request)
+    is_authenticated(request)
+
+    hidden = () if request.user.is_admin else ANSWER_KEY_FIELDS
+    selection = parse_selection("exam", fields, expand, hidden)
+    version = await ModelExam.objects.filter(id=exam_id).values_list("version", flat=True).afirst()
+    if version is None:
+        raise HttpError(404, "Prova não encontrada")
+
+    participation_id = None
+    if not request.user.is_admin:
+        participation_id = await ModelParticipation.objects.filter(user=request.user, exam_id=exam_id).values_list("id", flat=True).afirst()
+        if participation_id is None:
+            raise HttpError(403, "Você não tem permissão para acessar os detalhes desta prova")
+    # Como no caderno, o participante não pode ver a ordem original das questões e alternativas.
+    shuffle = participation_id is not None and settings.EXAM_PAPER_SHUFFLE
+
+    etag = make_etag("exam", exam_id, version, selection.key if selection else None, hidden, participation_id if shuffle else None)
+    if response := not_modified(request, etag):
+        return response
+
+    exam = await aget_object_or_404(selection.queryset() if selection else exams_with_details(), id=exam_id)
+    data = serializer("exam", selection, hidden)(exam)
+    if shuffle:
+        data = shuffle_exam(data, exam, participation_id)
+    return with_etag(selection_response(data), etag)
+
+@router.get("/{exam_id}/paper/", response={200: ExamPaperSchema, 304: None, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
+async def get_exam_paper(request, exam_id: int):
+    """Recupera o caderno de prova: questões e alternativas, sem indicar as alternativas corretas.
+    Participantes podem recuperar o caderno das provas em que estão inscritos.
+    O caderno é montado uma única vez por versão da prova e servido do cache, com um ETag derivado da versão.
+    Cada participante recebe as questões e alternativas embaralhadas em uma ordem própria e estável."""
+    await aload_user(request)
+    is_authenticated(request)
+
+    version = await ModelExam.objects.filter(id=exam_id).values_list("version", flat=True).afirst()
+    if version is None:
+        raise HttpError(404, "Prova não encontrada")
+
+    participation_id = None
+    if not request.user.is_admin:
+        participation_id = await ModelParticipation.objects.filter(user=request.user, exam_id=exam_id).values_list("id", flat=True).afirst()
+        if participation_id is None:
+            raise HttpError(403, "Você não tem permissão para acessar o caderno desta prova")
+    # Administradores veem a ordem original; cada participante, a ordem da sua participação.
+    shuffle = participation_id is not None and settings.EXAM_PAPER_SHUFFLE
+
+    etag = make_etag("exam_paper", exam_id, version, participation_id if shuffle else None)
+    if response := not_modified(request, etag):
+        return response
+    payload = await aget_exam_paper(exam_id, version)
+    if shuffle:
+        payload = encode_cached_body(shuffle_paper(payload, exam_id, participation_id))
+    return with_etag(cached_json_response(request, payload), etag)
+
+@router.get("/{exam_id}/bundle/", response={200: ExamBundleSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
+async def get_exam_bundle(request, exam_id: int):
+    """Recupera o pacote offline da participação do usuário autenticado: o caderno de prova e um token assinado com validade.
+    O participante responde offline e envia todas as respostas de uma vez para /api/exams/{exam_id}/submissions/ com o token.
+    O token vale enquanto as questões, as alternativas e o gabarito da prova não mudarem."""
+    await aload_user(request)
     is_authenticated(request)
 
+    version = await ModelExam.objects.filter(id=exam_id).values_list("version", flat=True).afirst()
+    if version is None:
+        raise HttpError(404, "Prova não encontrada")
+
+    participation = await ModelParticipation.objects.filter(user=request.user, exam_id=exam_id).afirst()
+    if participation is None:
+        raise HttpError(403, "Você não tem permissão para acessar o caderno desta prova")
+    if participation.finished_at:
+        raise HttpError(403, "Prova ja finalizada")
+
+    return cached_json_response(request, encode_cached_body(await bundles.abuild_bundle(participation, version)))
+
+@router.post("/{exam_id}/submissions/", response={200: SubmissionSchema, 403: ErrorSchema, 404: ErrorSchema, 409: ErrorSchema, 422: ErrorSchema})
+def submit_answer_sheet(request, exam_id: int, payload: AnswerSheetSchema):
+    """Envia de uma vez a folha de respostas de um pacote offline, que é corrigida na hora e finaliza a participação.
+    A participação é identificada pelo token assinado do pacote, dispensando o JWT, que pode ter vencido durante a prova offline.
+    Cada participação aceita uma única folha; se a prova mudou depois do download do pacote, a rota responde 409."""
+    claims = bundles.read_token(payload.token)
+    score = bundles.submit(claims, exam_id, payload.answers)
+
+    clear_list_answers_cache()
+    generate_ranking.delay(exam_id)
+    return 200, {"participation_id": claims["participation"], "score": score, "answered": len(payload.answers)}
+
+@router.post("/{exam_id}/clone/", response={201: ExamSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
+def clone_exam(request, exam_id: int, payload: ExamCloneSchema):
+    """Cria uma cópia da prova com os mesmos vínculos com as questões, por padrão com o nome "<nome> (cópia)".
+    Com deep=true, as questões e alternativas também são copiadas, e a nova prova pode ser editada sem alterar a original.
+    A cópia usa inserções em lote em uma única transação, qualquer que seja o tamanho da prova.
+    Apenas administradores podem copiar provas."""
+    is_authenticated(request)
+    is_admin(request)
+
     exam = get_object_or_404(ModelExam, id=exam_id)
+    clone = assembly.clone_exam(exam, payload.name or f"{exam.name} (cópia)", request.user, payload.deep)
 
-    if not request.user.is_admin and not ModelParticipation.objects.filter(user=request.user, exam__id=exam_id).exists():   
-        raise HttpError(403, "Você não tem permissão para acessar os detalhes desta prova")
-    
-    return ExamSchema.model_validate(exam)
+    clear_list_exams_cache()
+    clear_list_questions_cache()
+    return 201, ExamSchema.model_validate(exams_with_details().get(id=clone.id))
 
 @router.patch("/{exam_id}/", response={200: ExamSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def partial_update_exam(request, exam_id: int, payload: ExamUpdateSchema):
@@ -77,7 +211,7 @@ def partial_update_exam(request, exam_id: int, payload: ExamUpdateSchema):
     is_authenticated(request)
     is_admin(request)
 
-    exam = get_object_or_404(ModelExam, id=exam_id)
+    exam = get_object_or_404(exams_with_details(), id=exam_id)
     for attr, value in payload.model_dump(exclude_unset=True).items():
         setattr(exam, attr, value)
     exam.save()
@@ -90,7 +224,7 @@ def update_exam(request, exam_id: int, payload: ExamUpdateSchema):
     is_authenticated(request)
     is_admin(request)
 
-    exam = get_object_or_404(ModelExam, id=exam_id)
+    exam = get_object_or_404(exams_with_details(), id=exam_id)
     exam.name = payload.name
     exam.save()
     clear_list_exams_cache()
@@ -112,37 +246,49 @@ def delete_exam(request, exam_id: int):
     clear_list_exams_cache()
     return 204, None
 
-@router.get("/{exam_id}/participants/", response={200: list[ParticipationSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def list_participants(request,
+@router.get("/{exam_id}/participants/", response={200: list[ParticipationSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
+@replica_reads
+async def list_participants(request,
                     exam_id: int,
                     query: str = None,
                     order_by: str = "-id",
                     page: int = 1,
-                    page_size: int = 10):
+                    page_size: int = 10,
+                    fields: str = None,
+                    expand: str = None):
     """Lista os participantes de uma prova por meio do ID
     Apenas administradores podem listar os participantes de uma prova.
-    Busca, paginação e ordenação são opcionais."""
+    Busca, paginação e ordenação são opcionais.
+    Para não repetir a prova inteira em cada linha, escolha os campos e as relações embutidas: ?fields=id,score,exam&expand=user"""
+    await aload_user(request)
     is_authenticated(request)
     is_admin(request)
 
+    selection = parse_selection("participation", fields, expand)
+
     try:
-        exam = ModelExam.objects.get(id=exam_id)
+        exam = await ModelExam.objects.aget(id=exam_id)
     except ModelExam.DoesNotExist:
         raise HttpError(404, "Prova não encontrada")
     
-    participants = ModelParticipation.objects.filter(exam=exam)
-    if not participants.exists():
+    participants = (selection.queryset() if selection else participations_with_details()).filter(exam=exam)
+    if not await participants.aexists():
         raise HttpError(404, "Participantes nao encontrados")
     
     if query:
-        participants = participants.filter(
-            Q(user__username__icontains=query) | Q(user__email__icontains=query)
-        )
+        # Os usuários podem estar em outro banco: a busca é feita lá e filtrada por IDs.
+        user_ids = [
+            user_id async for user_id in User.objects.filter(
+                Q(username__icontains=query) | Q(email__icontains=query)
+            ).values_list("id", flat=True)
+        ]
+        participants = participants.filter(user_id__in=user_ids)
 
     participants = order_queryset(participants, order_by)
 
     participants = paginate_queryset(participants, page, page_size)
-    return [ParticipationSchema.model_validate(participation) for participation in participants]
+    serialize = serializer("participation", selection)
+    return selection_response([serialize(participation) async for participation in participants])
 
 @router.post("/{exam_id}/participants/", response={201: ParticipationSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def create_participation(request, exam_id: int, payload: ParticipationCreateSchema):
@@ -160,7 +306,7 @@ def create_participation(request, exam_id: int, payload: ParticipationCreateSche
         raise HttpError(404, "Usuário nao encontrado")
 
     try:
-        exam = ModelExam.objects.get(id=payload.exam_id)
+        exam = exams_with_details().get(id=payload.exam_id)
     except ModelExam.DoesNotExist:
         raise HttpError(404, "Prova nao encontrada")
 
@@ -196,13 +342,16 @@ def delete_participation(request, exam_id: int, user_id: int):
 
     return 204, None
 
-@router.get("/{exam_id}/participants/{user_id}/", response={200: ParticipationSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})    
-def get_participation_details(request, exam_id: int, user_id: int):
+@router.get("/{exam_id}/participants/{user_id}/", response={200: ParticipationSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})    
+def get_participation_details(request, exam_id: int, user_id: int, fields: str = None, expand: str = None):
     """Obtem detalhes de uma participação de um usuário em uma prova pelo ID do usuário e o ID da prova.
-    Apenas administradores podem obter detalhes de participações."""
+    Apenas administradores podem obter detalhes de participações.
+    Os campos e as relações embutidas podem ser escolhidos com ?fields=id,score,exam&expand=exam"""
     is_authenticated(request)
     is_admin(request)
 
+    selection = parse_selection("participation", fields, expand)
+
     try:
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
@@ -216,7 +365,8 @@ def get_participation_details(request, exam_id: int, user_id: int):
     if not ModelParticipation.objects.filter(user=user, exam=exam).exists():
         raise HttpError(404, "Participação nao encontrada")
 
-    return ParticipationSchema.model_validate(ModelParticipation.objects.get(user=user, exam=exam))
+    participation = (selection.queryset() if selection else participations_with_details()).get(user=user, exam=exam)
+    return selection_response(serializer("participation", selection)(participation))
 
 @router.patch("/{exam_id}/participants/{user_id}/", response={200: ParticipationSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def update_participation(request, exam_id: int, user_id: int, payload: ParticipationUpdateSchema):
@@ -239,7 +389,7 @@ def update_participation(request, exam_id: int, user_id: int, payload: Participa
     if not ModelParticipation.objects.filter(user=user, exam=exam).exists():
         raise HttpError(404, "Participação nao encontrada")
 
-    participation = ModelParticipation.objects.get(user=user, exam=exam)
+    participation = participations_with_details().get(user=user, exam=exam)
 
     for attr, value in payload.model_dump(exclude_unset=True).items():
         setattr(participation, attr, value)
@@ -277,13 +427,14 @@ def finish_exam(request, exam_id: int):
     return 200, {"detail":"Cálculo da pontuação iniciado"}
 
 @router.get("/{exam_id}/progresses/", response={200:dict, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def check_progress(request, exam_id: int):
+async def check_progress(request, exam_id: int):
     """Verifica o progresso da correção da prova.
     Usuário logado deve ser o usuário que estiver respondendo a prova.
     Se a correção tiver sido finalizada, retornará o score para o participante"""
+    await aload_user(request)
     is_authenticated(request)
     try:
-        participation = ModelParticipation.objects.get(user=request.user, exam_id=exam_id)
+        participation = await ModelParticipation.objects.aget(user=request.user, exam_id=exam_id)
     except ModelParticipation.DoesNotExist:
         raise HttpError(404, "Participação não encontrada")
     
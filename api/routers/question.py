@@ -1,6 +1,6 @@
 from ninja import Router
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from api.models import ModelQuestion, ModelExam, ModelChoice
 from api.schemas import (
     QuestionSchema,
@@ -8,12 +8,17 @@ from api.schemas import (
     QuestionUpdateSchema,
     ErrorSchema,
 )
-from api.utils import is_authenticated, is_admin, order_queryset, paginate_queryset, clear_list_questions_cache, add_question_cache_key
+from api.utils import aload_user, is_authenticated, is_admin, order_queryset, paginate_queryset, clear_list_questions_cache, questions_with_details, encode_cached_json, cached_json_response, make_etag, not_modified, with_etag
 from ninja.errors import HttpError
-from django.core.cache import cache
+from api.fieldsets import parse_selection, selection_response, serializer
+from api.list_cache import aget_cached_list
+from api.replica import replica_reads
 
 router = Router(tags=["Questions"])
 
+# Chave de uma página da listagem no cache (também usada pelo aquecimento, api/warming.py).
+LIST_QUESTIONS_KEY = "list_questions:{}:{}:{}:{}"
+
 @router.post("/", response={201: QuestionSchema, 401: ErrorSchema, 403: ErrorSchema, 422: ErrorSchema})
 def create_question(request, payload: QuestionCreateSchema):
     """
@@ -26,7 +31,7 @@ def create_question(request, payload: QuestionCreateSchema):
     is_authenticated(request)
     is_admin(request)
 
-    question = ModelQuestion.objects.create(text=payload.text)
+    question = ModelQuestion.objects.create(text=payload.text, tag=payload.tag, difficulty=payload.difficulty)
     for choice in payload.choices:
         ModelChoice.objects.create(
                                 question=question, 
@@ -36,53 +41,83 @@ def create_question(request, payload: QuestionCreateSchema):
     clear_list_questions_cache()
     return 201, QuestionSchema.model_validate(question)
 
-@router.get("/", response={200: list[QuestionSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def list_questions(request, 
+@router.get("/", response={200: list[QuestionSchema], 304: None, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
+@replica_reads
+async def list_questions(request, 
                 query: str = None, 
                 order_by: str = "-created_at", 
                 page: int = 1, 
-                page_size: int = 10
+                page_size: int = 10,
+                fields: str = None,
+                expand: str = None
                 ):
     """
     Lista todas as questões com busca, ordenação e paginação opcionais.
     É possível ordená-las por meio do campo created_at por meio da rota: /api/questions/?order_by=-created_at
     A páginação é feita por meio da rota: /api/questions/?page=<int>&page_size=<int>, em que os parâmetros page e page_size podem ser alterados.
     A busca por string é feita pelo campo text e pode ser testada acessando a rota: /api/questions/?query=
+    Os campos e as relações embutidas podem ser escolhidos com /api/questions/?fields=id,text,choices&expand=choices
+    O ETag da listagem deriva do número de questões encontradas e da última atualização entre elas.
     """
+    await aload_user(request)
     is_authenticated(request)
     is_admin(request)
 
-    cache_key = f"list_questions:{query}:{order_by}:{page}:{page_size}"
-    cached_data = cache.get(cache_key)
-
-    if cached_data:
-        return cached_data
-
-    try:
-        questions = ModelQuestion.objects.all()
-    except ModelQuestion.DoesNotExist:   
-        raise HttpError(404, "Nenhuma questão encontrada") 
-    if query:
-        questions = questions.filter(Q(text__icontains=query))
+    selection = parse_selection("question", fields, expand)
+    cache_key = LIST_QUESTIONS_KEY.format(query, order_by, page, page_size)
+    if selection:
+        cache_key += f":{selection.key}"
+
+    # Criar ou alterar uma questão avança a última atualização; excluir uma muda a contagem.
+    stats = await search_questions(ModelQuestion.objects.all(), query).aaggregate(
+        count=Count("id"), updated_at=Max("updated_at")
+    )
+    etag = make_etag("questions", cache_key, stats["count"], stats["updated_at"])
+    if response := not_modified(request, etag):
+        return response
+
+    payload = await aget_cached_list(
+        "questions", cache_key, build_questions_page,
+        query=query, order_by=order_by, page=page, page_size=page_size, fields=fields, expand=expand,
+    )
+    return with_etag(cached_json_response(request, payload), etag)
+
+def search_questions(questions, query):
+    """Filtra as questões pela busca em texto das listagens."""
+    return questions.filter(Q(text__icontains=query)) if query else questions
+
+async def build_questions_page(query, order_by, page, page_size, fields=None, expand=None):
+    """Monta uma página da listagem de questões, pronta para o cache (api/list_cache.py)."""
+    selection = parse_selection("question", fields, expand)
+    questions = search_questions(selection.queryset() if selection else questions_with_details(), query)
 
     questions = order_queryset(questions, order_by)
 
     questions = paginate_queryset(questions, page, page_size)
-    results = [QuestionSchema.model_validate(question) for question in questions]
-    cache.set(cache_key, results, timeout=300)
-    add_question_cache_key(cache_key)
-    return results
+    serialize = serializer("question", selection)
+    return encode_cached_json([serialize(question) async for question in questions])
 
 
-@router.get("/{question_id}", response={200: QuestionSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def get_question_details(request, question_id: int):
+@router.get("/{question_id}", response={200: QuestionSchema, 304: None, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
+def get_question_details(request, question_id: int, fields: str = None, expand: str = None):
     """
     Recupera detalhes da questão por meio do ID.
+    Os campos e as relações embutidas podem ser escolhidos com ?fields=id,text,choices&expand=choices
+    A resposta traz um ETag derivado da última atualização da questão; com If-None-Match, a rota responde 304.
     """
     is_authenticated(request)
     is_admin(request)
-    question = get_object_or_404(ModelQuestion, id=question_id)
-    return QuestionSchema.model_validate(question)
+    selection = parse_selection("question", fields, expand)
+    updated_at = ModelQuestion.objects.filter(id=question_id).values_list("updated_at", flat=True).first()
+    if updated_at is None:
+        raise HttpError(404, "Questão não encontrada")
+
+    etag = make_etag("question", question_id, updated_at, selection.key if selection else None)
+    if response := not_modified(request, etag):
+        return response
+
+    question = get_object_or_404(selection.queryset() if selection else questions_with_details(), id=question_id)
+    return with_etag(selection_response(serializer("question", selection)(question)), etag)
 
 @router.patch("/{question_id}/", response={200: QuestionSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def partial_update_question(request, question_id: int, payload: QuestionUpdateSchema):
@@ -96,6 +131,10 @@ def partial_update_question(request, question_id: int, payload: QuestionUpdateSc
     question = get_object_or_404(ModelQuestion, id=question_id)
     if payload.text:
         question.text = payload.text
+    if payload.tag is not None:
+        question.tag = payload.tag
+    if payload.difficulty is not None:
+        question.difficulty = payload.difficulty
     
     if payload.exam_ids is not None:
         current_exam_ids = set(question.exams.values_list("id", flat=True))
@@ -145,6 +184,8 @@ def update_question(request, question_id: int, payload: QuestionUpdateSchema):
         raise HttpError(422, "O campo 'texto' é necessário para atualização completa")
 
     question.text = payload.text
+    question.tag = payload.tag or ""
+    question.difficulty = payload.difficulty
 
     if payload.exam_ids is None:
         question.exams.clear()
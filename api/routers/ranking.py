@@ -1,35 +1,42 @@
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404
 from ninja import Router
 from api.models import ModelExam, ModelRanking
 from api.schemas import RankingSchema, ErrorSchema
-from api.utils import is_admin, is_authenticated
+from api.utils import aload_user, is_admin, is_authenticated, make_etag, not_modified, with_etag
+from django.db.models import Count, Max
 from ninja.errors import HttpError
+from api.fieldsets import selection_response
+from api.replica import replica_reads
 
 router = Router(tags=["Ranking"])
 
-@router.get("/exams/{exam_id}/", response={200: list[RankingSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def get_ranking(request, exam_id: int):
+# Colunas lidas do banco, na ordem dos campos do RankingSchema.
+RANKING_COLUMNS = ("exam_id", "participant_id", "participant__username", "score", "position")
+
+@router.get("/exams/{exam_id}/", response={200: list[RankingSchema], 304: None, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
+@replica_reads
+async def get_ranking(request, exam_id: int):
     """
     Obtem o ranking de uma prova.
     Apenas administradores tem permissão
+    O ETag deriva do número de posições e da data de geração do ranking, que é regravado por inteiro a cada geração.
     """
 
+    await aload_user(request)
     is_authenticated(request)
     is_admin(request)
 
-    exam = get_object_or_404(ModelExam, id=exam_id) 
+    exam = await aget_object_or_404(ModelExam, id=exam_id) 
     rankings = ModelRanking.objects.filter(exam=exam).order_by("position")
-    if not rankings.exists():
+    stats = await rankings.aaggregate(count=Count("id"), created_at=Max("created_at"))
+    if not stats["count"]:
         raise HttpError(404, "Ranking não encontrado")
-    
-    return [
-    RankingSchema.model_validate({
-        "id": ranking.id,
-        "exam_id": ranking.exam_id,
-        "participant_id": ranking.participant.id,
-        "participant_username": ranking.participant.username,
-        "score": ranking.score,
-        "position": ranking.position,
-    })
-    for ranking in rankings
-    ]   
\ No newline at end of file
+
+    etag = make_etag("ranking", exam_id, stats["count"], stats["created_at"])
+    if response := not_modified(request, etag):
+        return response
+
+    fields = tuple(RankingSchema.model_fields)
+    return with_etag(selection_response([
+        dict(zip(fields, row)) async for row in rankings.values_list(*RANKING_COLUMNS)
+    ]), etag)   
\ No newline at end of file
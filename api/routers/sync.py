@@ -0,0 +1,27 @@
+from ninja import Router
+from ninja.errors import HttpError
+from api.schemas import SyncFeedSchema, ErrorSchema
+from api.utils import is_authenticated, is_admin
+from api.fieldsets import selection_response
+from api.replica import replica_reads
+from api import sync
+
+router = Router(tags=["Sync"])
+
+@router.get("/", response={200: SyncFeedSchema, 401: ErrorSchema, 403: ErrorSchema, 410: ErrorSchema, 422: ErrorSchema})
+@replica_reads
+def list_changes(request, since: int = 0, limit: int = None):
+    """
+    Feed de mudanças de provas, questões, alternativas e vínculos entre provas e questões.
+    Sem cursor, o feed começa do início e traz o catálogo inteiro; depois, o cliente envia o cursor recebido: /api/sync/?since=<cursor>
+    Cada mudança traz a entidade, o registro atual em data e, para exclusões, deleted=true apenas com a identificação.
+    Enquanto has_more for verdadeiro, há mais mudanças depois do cursor retornado.
+    O log é compactado periodicamente; um cursor anterior à compactação recebe 410, e o cliente deve descartar a cópia local e recomeçar com since=0.
+    """
+    is_authenticated(request)
+    is_admin(request)
+    if since < 0 or (limit is not None and limit < 1):
+        raise HttpError(422, "O cursor e o limite devem ser positivos")
+
+    cursor, has_more, changes = sync.changes_since(since, limit)
+    return selection_response({"cursor": cursor, "has_more": has_more, "changes": changes})
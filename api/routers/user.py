@@ -1,15 +1,20 @@
 from ninja import Router
 from django.db.models import Q
 from api.schemas import UserSchema, UserCreateSchema, UserUpdateSchema, ErrorSchema
-from api.utils import is_authenticated, is_admin, order_queryset, paginate_queryset, add_user_cache_key, clear_list_users_cache
+from api.utils import aload_user, is_authenticated, is_admin, order_queryset, paginate_queryset, clear_list_users_cache, encode_cached_json, cached_json_response
 from ninja.errors import HttpError
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from api.fieldsets import selection_response, serializer
+from api.list_cache import aget_cached_list
+from api.replica import replica_reads
 
 User = get_user_model()
 
 router = Router(tags=["Users"])
 
+# Chave de uma página da listagem no cache (também usada pelo aquecimento, api/warming.py).
+LIST_USERS_KEY = "list_users:{}:{}:{}:{}"
+
 @router.post("/", response={201: UserSchema, 401: ErrorSchema, 403: ErrorSchema, 422: ErrorSchema})
 def create_user(request, payload: UserCreateSchema):
     """Cria um usuário com perfil
@@ -33,7 +38,8 @@ def create_user(request, payload: UserCreateSchema):
     return 201, UserSchema.model_validate(user)
 
 @router.get("/", response={200: list[UserSchema], 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
-def list_users(
+@replica_reads
+async def list_users(
     request, 
     query: str = None, 
     order_by: str = "-username", 
@@ -47,20 +53,20 @@ def list_users(
     A busca por string é feita pelo campo text e pode ser testada acessando a rota: /api/users/?query=
     Apenas administradores podem ver a lista de usuários.
     """
+    await aload_user(request)
     is_authenticated(request)
     is_admin(request)
 
-    cache_key = f"list_users:{query}:{order_by}:{page}:{page_size}"
-    cached_data = cache.get(cache_key)
+    cache_key = LIST_USERS_KEY.format(query, order_by, page, page_size)
+    payload = await aget_cached_list(
+        "users", cache_key, build_users_page, query=query, order_by=order_by, page=page, page_size=page_size
+    )
+    return cached_json_response(request, payload)
+
+async def build_users_page(query, order_by, page, page_size):
+    """Monta uma página da listagem de usuários, pronta para o cache (api/list_cache.py)."""
+    users = User.objects.all()
 
-    if cached_data:
-        return cached_data
-    try:
-        users = User.objects.all()
-    except User.DoesNotExist:
-        raise HttpError(404, "Nenhum usuário encontrado")
-    
-    
     if query:
         users = users.filter(Q(username__icontains=query) | Q(email__icontains=query))
 
@@ -68,10 +74,8 @@ def list_users(
 
     users = paginate_queryset(users, page, page_size)
 
-    results = [UserSchema.model_validate(user) for user in users]
-    cache.set(cache_key, results, timeout=300)
-    add_user_cache_key(cache_key)
-    return results
+    serialize = serializer("user")
+    return encode_cached_json([serialize(user) async for user in users])
 
 @router.get("/{user_id}/", response={200: UserSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema})
 def get_user_details(request, user_id: int):
@@ -83,7 +87,7 @@ def get_user_details(request, user_id: int):
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
         raise HttpError(404, "Usuário não encontrado")
-    return UserSchema.model_validate(user)
+    return selection_response(serializer("user")(user))
 
 @router.patch("/{user_id}/", response={200: UserSchema, 401: ErrorSchema, 403: ErrorSchema, 404: ErrorSchema, 422: ErrorSchema})
 def partial_update_user(request, user_id: int, payload: UserUpdateSchema):
@@ -66,6 +66,16 @@ class ExamSchema(BaseModel):
 class ExamCreateSchema(BaseModel):
     name: str
 
+class ExamCloneSchema(BaseModel):
+    name: Optional[str] = None
+    deep: bool = False
+
+class ExamAssembleSchema(BaseModel):
+    name: str
+    size: int
+    stratify_by: Optional[str] = None
+    seed: Optional[int] = None
+
 class ParticipationCreateSchema(BaseModel):
     user_id: int
     exam_id: int
@@ -97,6 +107,8 @@ class ParticipationUpdateSchema(BaseModel):
 class QuestionSchema(BaseModel):
     id: int
     text: str
+    tag: str
+    difficulty: Optional[int]
     created_at: datetime
     choices: List["ChoiceSchema"]
     exam_ids: List[int]
@@ -106,17 +118,23 @@ class QuestionSchema(BaseModel):
         return cls(
             id=obj.id,
             text=obj.text,
+            tag=obj.tag,
+            difficulty=obj.difficulty,
             created_at=obj.created_at,
             choices=[ChoiceSchema.model_validate(c) for c in obj.choices.all()],
-            exam_ids=list(obj.exams.values_list("id", flat=True)),
+            exam_ids=[exam.id for exam in obj.exams.all()],
         )
 
 class QuestionCreateSchema(BaseModel):
     text: str
+    tag: str = ""
+    difficulty: Optional[int] = None
     choices: List["ChoiceCreateSchema"]
 
 class QuestionUpdateSchema(BaseModel):
     text: Optional[str] = None
+    tag: Optional[str] = None
+    difficulty: Optional[int] = None
     exam_ids: Optional[List[int]] = None 
     choices: Optional[List["ChoiceUpdateSchema"]] = None 
     
@@ -170,6 +188,50 @@ class AnswerUpdateSchema(BaseModel):
     question_id: Optional[int] = None
     choice_id: Optional[int] = None
 
+class PaperChoiceSchema(BaseModel):
+    id: int
+    text: str
+
+class PaperQuestionSchema(BaseModel):
+    id: int
+    text: str
+    choices: List[PaperChoiceSchema]
+
+class ExamPaperSchema(BaseModel):
+    id: int
+    name: str
+    version: int
+    questions: List[PaperQuestionSchema]
+
+class ExamBundleSchema(BaseModel):
+    participation_id: int
+    expires_at: datetime
+    token: str
+    paper: ExamPaperSchema
+
+class SheetAnswerSchema(BaseModel):
+    question_id: int
+    choice_id: int
+
+class AnswerSheetSchema(BaseModel):
+    token: str
+    answers: List[SheetAnswerSchema]
+
+class SubmissionSchema(BaseModel):
+    participation_id: int
+    score: float
+    answered: int
+
+class SyncChangeSchema(BaseModel):
+    entity: str
+    deleted: bool
+    data: dict
+
+class SyncFeedSchema(BaseModel):
+    cursor: int
+    has_more: bool
+    changes: List[SyncChangeSchema]
+
 class ErrorSchema(BaseModel):
     detail: str
 
@@ -0,0 +1,191 @@
+"""
+Geração rápida de dados sintéticos para testes de desempenho.
+
+Todos os registros são criados com bulk_create em lotes, dentro de uma transação
+por lote, e os usuários compartilham uma única senha já processada. Com a mesma
+semente, a mesma configuração gera sempre o mesmo conjunto de dados. Como o
+bulk_create não dispara sinais, as questões, alternativas e vínculos criados são
+registrados em lote no log da sincronização incremental (api/sync.py).
+"""
+import random
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import router, transaction
+from django.utils.timezone import now
+
+from api.models import ModelAnswer, ModelChange, ModelChoice, ModelExam, ModelParticipation, ModelQuestion, ModelRanking
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def iter_chunks(iterable, size):
+    """Divide um iterável em listas de até `size` itens, sem materializá-lo por completo."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_insert(model, objects, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Insere os objetos em lotes de `chunk_size`, uma transação por lote, e retorna os IDs criados.
+    """
+    ids = []
+    using = router.db_for_write(model)
+    for chunk in iter_chunks(objects, chunk_size):
+        with transaction.atomic(using=using):
+            created = model.objects.bulk_create(chunk, batch_size=chunk_size)
+        ids.extend(obj.pk for obj in created)
+    return ids
+
+
+def create_users(count, prefix, password="seed123", chunk_size=DEFAULT_CHUNK_SIZE, **fields):
+    """
+    Cria `count` usuários `{prefix}-{i}` com a mesma senha, processada uma única vez.
+    """
+    hashed = make_password(password)
+    return bulk_insert(User, (
+        User(username=f"{prefix}-{i}", email=f"{prefix}-{i}@example.com", password=hashed, **fields)
+        for i in range(count)
+    ), chunk_size)
+
+
+def create_questions(count, choices_per_question=4, text="Questão", chunk_size=DEFAULT_CHUNK_SIZE, rng=None):
+    """
+    Cria `count` questões com `choices_per_question` alternativas, uma delas correta.
+    Retorna os IDs das questões e, para cada questão, os IDs das alternativas e o da correta.
+    """
+    rng = rng or random.Random(0)
+    question_ids = bulk_insert(ModelQuestion, (ModelQuestion(text=f"{text} {i}") for i in range(count)), chunk_size)
+
+    correct_positions = [rng.randrange(choices_per_question) for _ in question_ids]
+    choice_ids = bulk_insert(ModelChoice, (
+        ModelChoice(question_id=question_id, text=f"Alternativa {j}", is_correct=j == correct)
+        for question_id, correct in zip(question_ids, correct_positions)
+        for j in range(choices_per_question)
+    ), chunk_size)
+    bulk_insert(ModelChange, (
+        ModelChange(entity=entity, object_id=object_id)
+        for entity, ids in ((ModelChange.QUESTION, question_ids), (ModelChange.CHOICE, choice_ids))
+        for object_id in ids
+    ), chunk_size)
+
+    choices = {}
+    for index, question_id in enumerate(question_ids):
+        ids = choice_ids[index * choices_per_question:(index + 1) * choices_per_question]
+        choices[question_id] = (ids, ids[correct_positions[index]])
+    return question_ids, choices
+
+
+def link_questions(exam_id, question_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Vincula as questões à prova com inserções em lote na tabela intermediária."""
+    Link = ModelExam.questions.through
+    bulk_insert(Link, (Link(modelexam_id=exam_id, modelquestion_id=question_id) for question_id in question_ids), chunk_size)
+    bulk_insert(ModelChange, (
+        ModelChange(entity=ModelChange.EXAM_QUESTION, object_id=exam_id, related_id=question_id)
+        for question_id in question_ids
+    ), chunk_size)
+
+
+def build_answer_sheet(rng, question_ids, choices, answers_min, answers_max, correct_rate):
+    """
+    Sorteia as questões respondidas por uma participação e a alternativa escolhida em cada uma.
+    """
+    sheet = []
+    for question_id in rng.sample(question_ids, rng.randint(answers_min, answers_max)):
+        options, correct = choices[question_id]
+        if rng.random() < correct_rate or len(options) == 1:
+            sheet.append((question_id, correct))
+        else:
+            sheet.append((question_id, rng.choice([option for option in options if option != correct])))
+    return sheet
+
+
+def seed_dataset(
+    users=1000,
+    admins=1,
+    exams=10,
+    questions_per_exam=50,
+    choices_per_question=4,
+    participations_per_exam=100,
+    answers_min=None,
+    answers_max=None,
+    correct_rate=0.6,
+    finished_rate=0.9,
+    prefix="seed",
+    password="seed123",
+    seed=0,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    log=None,
+):
+    """
+    Gera um conjunto de dados completo: administradores, participantes, provas, questões,
+    alternativas, participações, respostas e rankings.
+
+    Cada participação responde entre `answers_min` e `answers_max` questões (por padrão, todas),
+    acerta cada uma com probabilidade `correct_rate` e é finalizada com probabilidade
+    `finished_rate`. As finalizadas recebem a pontuação correspondente e entram no ranking.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    answers_min = questions_per_exam if answers_min is None else min(answers_min, questions_per_exam)
+    answers_max = questions_per_exam if answers_max is None else min(answers_max, questions_per_exam)
+    answers_max = max(answers_max, answers_min)
+    participations_per_exam = min(participations_per_exam, users)
+    counts = dict.fromkeys(("users", "exams", "questions", "choices", "participations", "answers", "rankings"), 0)
+
+    admin_ids = create_users(admins, f"{prefix}-admin", password, chunk_size, is_admin=True, is_participant=False)
+    user_ids = create_users(users, f"{prefix}-user", password, chunk_size)
+    counts["users"] = len(admin_ids) + len(user_ids)
+    log(f"{counts['users']} usuários criados")
+
+    started_at = now()
+    for exam_index in range(exams):
+        exam = ModelExam.objects.create(name=f"{prefix} prova {exam_index}", created_by_id=admin_ids[exam_index % len(admin_ids)])
+        question_ids, choices = create_questions(
+            questions_per_exam, choices_per_question, f"{prefix} prova {exam_index} questão", chunk_size, rng
+        )
+        link_questions(exam.id, question_ids, chunk_size)
+
+        participants = rng.sample(user_ids, participations_per_exam)
+        results = []
+        participation_count = answer_count = 0
+        for chunk in iter_chunks(participants, chunk_size):
+            sheets = [build_answer_sheet(rng, question_ids, choices, answers_min, answers_max, correct_rate) for _ in chunk]
+            finished = [rng.random() < finished_rate for _ in chunk]
+            scores = [
+                sum(1 for question_id, choice_id in sheet if choice_id == choices[question_id][1]) / questions_per_exam * 100
+                if done and questions_per_exam else 0.0
+                for sheet, done in zip(sheets, finished)
+            ]
+
+            participation_ids = bulk_insert(ModelParticipation, (
+                ModelParticipation(user_id=user_id, exam_id=exam.id, score=score, finished_at=started_at if done else None)
+                for user_id, score, done in zip(chunk, scores, finished)
+            ), chunk_size)
+            answer_count += len(bulk_insert(ModelAnswer, (
+                ModelAnswer(participation_id=participation_id, question_id=question_id, choice_id=choice_id)
+                for participation_id, sheet in zip(participation_ids, sheets)
+                for question_id, choice_id in sheet
+            ), chunk_size))
+            participation_count += len(participation_ids)
+            results.extend((user_id, score) for user_id, score, done in zip(chunk, scores, finished) if done)
+
+        results.sort(key=lambda result: -result[1])
+        ranking_count = len(bulk_insert(ModelRanking, (
+            ModelRanking(exam_id=exam.id, participant_id=user_id, score=score, position=position)
+            for position, (user_id, score) in enumerate(results, start=1)
+        ), chunk_size))
+
+        counts["exams"] += 1
+        counts["questions"] += len(question_ids)
+        counts["choices"] += len(question_ids) * choices_per_question
+        counts["participations"] += participation_count
+        counts["answers"] += answer_count
+        counts["rankings"] += ranking_count
+        log(f"Prova {exam_index + 1}/{exams}: {participation_count} participações, {answer_count} respostas")
+
+    return counts
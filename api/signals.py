@@ -0,0 +1,169 @@
+"""
+Exclusão em cascata do catálogo para participações e respostas, e versão das provas.
+
+Com o banco de respostas separado (api/answers_db.py), as chaves de
+participações e respostas para usuários, provas, questões e alternativas não
+têm restrição no banco nem CASCADE. Os dependentes são excluídos aqui, cada um
+no banco indicado pelo roteador; com um único banco, a exclusão feita aqui
+apenas antecipa a do CASCADE.
+
+Qualquer mudança no conteúdo de uma prova (nome, criador, questões vinculadas,
+texto das questões e alternativas) incrementa `ModelExam.version`, que
+identifica o caderno de prova em cache (api/papers.py) e o ETag da prova. O
+incremento é feito depois da mudança, para que um caderno montado no meio dela
+nunca fique guardado com a versão nova. Da mesma forma, mudanças nas
+alternativas e nos vínculos de uma questão atualizam `ModelQuestion.updated_at`.
+
+As mudanças de provas, questões, alternativas e vínculos também são registradas
+no log da sincronização incremental (api/sync.py).
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from api import sync
+from api.models import ModelAnswer, ModelChange, ModelChoice, ModelExam, ModelParticipation, ModelQuestion
+
+User = get_user_model()
+
+
+@receiver(pre_delete, sender=User)
+def delete_user_participations(sender, instance, **kwargs):
+    ModelParticipation.objects.filter(user_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=ModelExam)
+def delete_exam_participations(sender, instance, **kwargs):
+    ModelParticipation.objects.filter(exam_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=ModelQuestion)
+def delete_question_answers(sender, instance, **kwargs):
+    ModelAnswer.objects.filter(question_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=ModelChoice)
+def delete_choice_answers(sender, instance, **kwargs):
+    ModelAnswer.objects.filter(choice_id=instance.pk).delete()
+
+
+def bump_exam_versions(exam_ids):
+    """Incrementa a versão das provas indicadas, sem disparar novos sinais."""
+    exam_ids = set(exam_ids)
+    if exam_ids:
+        ModelExam.objects.filter(id__in=exam_ids).update(version=F("version") + 1)
+
+
+def touch_questions(question_ids):
+    """Atualiza o `updated_at` das questões indicadas, sem disparar novos sinais."""
+    question_ids = set(question_ids)
+    if question_ids and ModelQuestion.objects.filter(id__in=question_ids).update(updated_at=now()):
+        sync.record(ModelChange.QUESTION, question_ids)
+
+
+def exams_of_question(question_id):
+    return ModelExam.questions.through.objects.filter(modelquestion_id=question_id).values_list("modelexam_id", flat=True)
+
+
+def exams_of_questions(question_ids):
+    return ModelExam.questions.through.objects.filter(modelquestion_id__in=question_ids).values_list("modelexam_id", flat=True)
+
+
+def questions_of_exam(exam_id):
+    return ModelExam.questions.through.objects.filter(modelexam_id=exam_id).values_list("modelquestion_id", flat=True)
+
+
+def links_changed(question_ids, exam_ids=()):
+    """
+    Vínculos entre provas e questões mudaram. Uma questão aparece em todas as provas a que
+    está vinculada (com a lista `exam_ids`), então todas essas provas mudam junto com ela.
+    """
+    question_ids = set(question_ids)
+    bump_exam_versions({*exam_ids, *exams_of_questions(question_ids)})
+    touch_questions(question_ids)
+
+
+SYNC_ENTITIES = {ModelExam: ModelChange.EXAM, ModelQuestion: ModelChange.QUESTION, ModelChoice: ModelChange.CHOICE}
+
+
+@receiver(post_save, sender=ModelExam)
+@receiver(post_save, sender=ModelQuestion)
+@receiver(post_save, sender=ModelChoice)
+def record_catalog_change(sender, instance, **kwargs):
+    sync.record(SYNC_ENTITIES[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=ModelExam)
+@receiver(post_delete, sender=ModelQuestion)
+@receiver(post_delete, sender=ModelChoice)
+def record_catalog_deletion(sender, instance, **kwargs):
+    sync.record(SYNC_ENTITIES[sender], [instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # O criador vem embutido na prova; a gravação só do last_login no login não a altera.
+    if not created and (update_fields is None or set(update_fields) - {"last_login"}):
+        bump_exam_versions(ModelExam.objects.filter(created_by_id=instance.pk).values_list("id", flat=True))
+
+
+@receiver(post_save, sender=ModelExam)
+def exam_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_exam_versions([instance.pk])
+
+
+@receiver(post_save, sender=ModelQuestion)
+def question_changed(sender, instance, created, **kwargs):
+    if not created:
+        bump_exam_versions(exams_of_question(instance.pk))
+
+
+@receiver(pre_delete, sender=ModelQuestion)
+def remember_question_exams(sender, instance, **kwargs):
+    # Os vínculos somem junto com a questão; as provas afetadas são guardadas antes.
+    instance._exam_ids = list(exams_of_question(instance.pk))
+
+
+@receiver(post_delete, sender=ModelQuestion)
+def question_deleted(sender, instance, **kwargs):
+    exam_ids = getattr(instance, "_exam_ids", ())
+    bump_exam_versions(exam_ids)
+    sync.record_links([(exam_id, instance.pk) for exam_id in exam_ids], deleted=True)
+
+
+@receiver(pre_delete, sender=ModelExam)
+def remember_exam_questions(sender, instance, **kwargs):
+    instance._question_ids = list(questions_of_exam(instance.pk))
+
+
+@receiver(post_delete, sender=ModelExam)
+def exam_deleted(sender, instance, **kwargs):
+    question_ids = getattr(instance, "_question_ids", ())
+    links_changed(question_ids)
+    sync.record_links([(instance.pk, question_id) for question_id in question_ids], deleted=True)
+
+
+@receiver(post_save, sender=ModelChoice)
+@receiver(post_delete, sender=ModelChoice)
+def choice_changed(sender, instance, **kwargs):
+    bump_exam_versions(exams_of_question(instance.question_id))
+    touch_questions([instance.question_id])
+
+
+@receiver(m2m_changed, sender=ModelExam.questions.through)
+def exam_questions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse: `question.exams` (pk_set são provas); senão, `exam.questions` (pk_set são questões).
+    if action == "pre_clear":
+        instance._linked_ids = list(exams_of_question(instance.pk) if reverse else questions_of_exam(instance.pk))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        linked_ids = getattr(instance, "_linked_ids", ()) if action == "post_clear" else pk_set
+        if reverse:
+            links_changed([instance.pk], linked_ids)
+            pairs = [(exam_id, instance.pk) for exam_id in linked_ids]
+        else:
+            links_changed(linked_ids, [instance.pk])
+            pairs = [(instance.pk, question_id) for question_id in linked_ids]
+        sync.record_links(pairs, deleted=action != "post_add")
@@ -0,0 +1,158 @@
+"""
+Modo de escrita concorrente do SQLite.
+
+Cada nova conexão recebe os PRAGMAs de `settings.SQLITE_PRAGMAS` (WAL, nível de
+sincronismo, mmap, cache e busy_timeout). As escritas em rajada passam por uma
+fila com uma única thread escritora por processo, que agrupa as operações
+pendentes em transações curtas. Entre processos (workers do servidor e do
+Celery), a serialização fica a cargo do WAL, do busy_timeout e das transações
+IMMEDIATE configuradas em DATABASES.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    """Aplica os PRAGMAs configurados a cada nova conexão com o SQLite."""
+    if connection.vendor != "sqlite" or getattr(connection, "connection_reused", False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class WriteQueue:
+    """
+    Fila de escrita com uma única thread escritora.
+    Cada operação roda em um savepoint próprio dentro da transação do lote, de modo que
+    a falha de uma não desfaz as demais. O resultado só é entregue após o commit do lote.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=100, batch_delay=0.002):
+        self.using = using
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Enfileira a operação e aguarda o seu resultado (ou a sua exceção)."""
+        future = Future()
+        self._start()
+        self._queue.put((future, func, args, kwargs))
+        return future.result()
+
+    def in_writer_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def stop(self):
+        """Encerra a thread escritora após esvaziar a fila."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"sqlite-writer-{self.using}", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        job = self._queue.get()
+        if job is None:
+            return None
+        batch = [job]
+        deadline = time.monotonic() + self.batch_delay
+        while len(batch) < self.batch_size:
+            try:
+                job = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        try:
+            while (batch := self._next_batch()) is not None:
+                self._execute(batch)
+        finally:
+            connections.close_all()
+
+    def _execute(self, batch):
+        outcomes = []
+        try:
+            with transaction.atomic(using=self.using):
+                for future, func, args, kwargs in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            outcomes.append((future, func(*args, **kwargs), None))
+                    except Exception as error:
+                        outcomes.append((future, None, error))
+        except Exception as error:
+            logger.exception("Falha ao gravar um lote de %s escritas", len(batch))
+            for future, *_ in batch:
+                future.set_exception(error)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(using=DEFAULT_DB_ALIAS):
+    """Fila de escrita do processo para o banco `using`, criada sob demanda."""
+    with _writers_lock:
+        if using not in _writers:
+            _writers[using] = WriteQueue(
+                using=using,
+                batch_size=getattr(settings, "SQLITE_WRITE_BATCH_SIZE", 100),
+                batch_delay=getattr(settings, "SQLITE_WRITE_BATCH_DELAY", 0.002),
+            )
+        return _writers[using]
+
+
+def stop_writers():
+    """Encerra as threads escritoras de todos os bancos."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.stop()
+
+
+def run_write(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Executa uma escrita no banco `using` pela fila do processo, quando habilitada.
+    Dentro de uma transação já aberta (ou na própria thread escritora), a escrita roda
+    diretamente, pois a thread escritora não enxergaria os dados ainda não confirmados.
+    """
+    writer = get_writer(using)
+    if (
+        not getattr(settings, "SQLITE_WRITE_QUEUE", False)
+        or connections[using].in_atomic_block
+        or writer.in_writer_thread()
+    ):
+        with transaction.atomic(using=using):
+            return func(*args, **kwargs)
+    return writer.submit(func, *args, **kwargs)
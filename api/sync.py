@@ -0,0 +1,141 @@
+"""
+Sincronização incremental do catálogo (provas, questões, alternativas e vínculos).
+
+Cada criação, alteração ou exclusão registra uma linha em `ModelChange` pelos
+sinais de api/signals.py, na mesma transação da escrita. O ID do registro é o
+cursor: o cliente guarda o último cursor recebido e pede `?since=<cursor>`,
+recebendo só o que mudou depois dele, em ordem, em vez de percorrer o catálogo
+inteiro. Exclusões chegam como tombstones (`deleted`).
+
+Uma página traz cada registro uma única vez, na posição da sua primeira mudança
+na página e com o seu estado atual; um registro que não existe mais é enviado
+como excluído. Como as transações de escrita do SQLite são serializadas, os IDs
+ficam visíveis em ordem e nenhum cursor pula mudanças ainda não confirmadas.
+Escritas em massa (`update()`, `bulk_create`) não disparam sinais e, portanto,
+não entram no feed.
+
+O log é compactado periodicamente (`compact`, pela task `compact_sync_log`):
+abaixo de um piso, as mudanças anteriores a `SYNC_RETENTION` segundos, cada
+registro fica só com a sua última linha, o que não muda o que o feed entrega, e
+os registros que não existem mais saem do log. Como essas exclusões deixam de
+ser anunciadas, um cursor abaixo do piso é recusado com 410: o cliente descarta
+a cópia local e sincroniza tudo de novo a partir de `since=0`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils.timezone import now
+from ninja.errors import HttpError
+
+from api.models import ModelChange, ModelChangeCompaction, ModelChoice, ModelExam, ModelQuestion
+
+EXAM_FIELDS = ("id", "name", "created_by_id", "created_at", "updated_at")
+QUESTION_FIELDS = ("id", "text", "tag", "difficulty", "created_at", "updated_at")
+CHOICE_FIELDS = ("id", "question_id", "text", "is_correct", "updated_at")
+
+SOURCES = {
+    ModelChange.EXAM: (ModelExam, EXAM_FIELDS),
+    ModelChange.QUESTION: (ModelQuestion, QUESTION_FIELDS),
+    ModelChange.CHOICE: (ModelChoice, CHOICE_FIELDS),
+}
+
+
+def record(entity, object_ids, deleted=False):
+    """Registra mudanças (ou exclusões) de provas, questões ou alternativas."""
+    ModelChange.objects.bulk_create(
+        ModelChange(entity=entity, object_id=object_id, deleted=deleted) for object_id in sorted(set(object_ids))
+    )
+
+
+def record_links(pairs, deleted=False):
+    """Registra vínculos criados ou removidos, como pares (prova, questão)."""
+    ModelChange.objects.bulk_create(
+        ModelChange(entity=ModelChange.EXAM_QUESTION, object_id=exam_id, related_id=question_id, deleted=deleted)
+        for exam_id, question_id in sorted(set(pairs))
+    )
+
+
+def _existing_links(pairs):
+    exam_ids = {exam_id for exam_id, _ in pairs}
+    question_ids = {question_id for _, question_id in pairs}
+    links = ModelExam.questions.through.objects.filter(
+        modelexam_id__in=exam_ids, modelquestion_id__in=question_ids
+    ).values_list("modelexam_id", "modelquestion_id")
+    return set(links)
+
+
+def floor():
+    """Menor cursor aceito pelo feed: o piso da última compactação (0 se nunca houve uma)."""
+    return ModelChangeCompaction.objects.aggregate(floor=Max("floor"))["floor"] or 0
+
+
+def compact():
+    """
+    Compacta o log até o piso: a última mudança anterior a `SYNC_RETENTION` segundos. Linhas
+    com uma mudança posterior do mesmo registro e linhas de registros excluídos são removidas.
+    Retorna o piso e o número de linhas removidas, ou None se não há nada novo a compactar.
+    """
+    cutoff = now() - timedelta(seconds=settings.SYNC_RETENTION)
+    new_floor = ModelChange.objects.filter(changed_at__lt=cutoff).order_by("-id").values_list("id", flat=True).first()
+    if new_floor is None or new_floor <= floor():
+        return None
+
+    later = ModelChange.objects.filter(entity=OuterRef("entity"), object_id=OuterRef("object_id"), id__gt=OuterRef("id"))
+    superseded = (
+        Q(~Q(entity=ModelChange.EXAM_QUESTION), Exists(later))
+        | Q(Exists(later.filter(related_id=OuterRef("related_id"))), entity=ModelChange.EXAM_QUESTION)
+    )
+    links = ModelExam.questions.through.objects.filter(
+        modelexam_id=OuterRef("object_id"), modelquestion_id=OuterRef("related_id")
+    )
+    gone = Q(~Exists(links), entity=ModelChange.EXAM_QUESTION)
+    for entity, (model, _) in SOURCES.items():
+        gone |= Q(~Exists(model.objects.filter(id=OuterRef("object_id"))), entity=entity)
+
+    old = ModelChange.objects.filter(id__lte=new_floor)
+    removed = old.filter(superseded).delete()[0]
+    # O que sobrou abaixo do piso é a última linha de cada registro.
+    removed += old.filter(gone).delete()[0]
+    ModelChangeCompaction.objects.create(floor=new_floor, removed=removed)
+    return new_floor, removed
+
+
+def changes_since(since=0, limit=None):
+    """
+    Retorna `(cursor, has_more, changes)`: as mudanças depois de `since`, até `limit` registros
+    do log, com o cursor a ser usado na próxima chamada.
+    """
+    if 0 < since < floor():
+        raise HttpError(410, "O cursor é anterior à compactação do log: sincronize tudo de novo com since=0")
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_MAX_PAGE_SIZE)
+    entries = list(
+        ModelChange.objects.filter(id__gt=since).order_by("id")
+        .values_list("id", "entity", "object_id", "related_id")[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    cursor = entries[-1][0] if entries else since
+
+    # Uma entrada por registro, na ordem da primeira mudança.
+    keys = list(dict.fromkeys((entity, object_id, related_id) for _, entity, object_id, related_id in entries))
+
+    rows = {}
+    for entity, (model, fields) in SOURCES.items():
+        ids = [object_id for key_entity, object_id, _ in keys if key_entity == entity]
+        if ids:
+            rows[entity] = {row["id"]: row for row in model.objects.filter(id__in=ids).values(*fields)}
+    link_pairs = [(object_id, related_id) for entity, object_id, related_id in keys if entity == ModelChange.EXAM_QUESTION]
+    links = _existing_links(link_pairs) if link_pairs else set()
+
+    changes = []
+    for entity, object_id, related_id in keys:
+        if entity == ModelChange.EXAM_QUESTION:
+            data = {"exam_id": object_id, "question_id": related_id}
+            deleted = (object_id, related_id) not in links
+        else:
+            row = rows.get(entity, {}).get(object_id)
+            data = row or {"id": object_id}
+            deleted = row is None
+        changes.append({"entity": entity, "deleted": deleted, "data": data})
+    return cursor, has_more, changes
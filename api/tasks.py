@@ -1,6 +1,8 @@
 from celery import shared_task
 from api.models import ModelParticipation, ModelExam, ModelRanking
 from django.utils.timezone import now
+from api.sqlite import run_write
+from api import list_cache, papers, replica, sync, warming
 
 
 @shared_task
@@ -14,9 +16,12 @@ def calculate_score(participation_id):
         if participation.finished_at:
             return f"Participação {participation_id} já foi finalizada."
         
-        answers = participation.answers.all()
-        total_questions = participation.exam.questions.count()
-        correct_answers = sum(1 for answer in answers if answer.choice.is_correct)
+        # As respostas podem estar em outro banco: as alternativas corretas vão como lista de IDs,
+        # lidas do gabarito em cache da versão atual da prova (api/papers.py).
+        total_questions, correct_choices = papers.get_answer_key(
+            participation.exam_id, papers.exam_version(participation.exam_id)
+        )
+        correct_answers = participation.answers.filter(choice_id__in=correct_choices).count()
 
         score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
 
@@ -24,7 +29,7 @@ def calculate_score(participation_id):
         participation.finished_at = now()
         participation.save()
 
-        generate_ranking.delay(participation.exam.id)
+        generate_ranking.delay(participation.exam_id)
 
         return f"Score calculado com sucesso para a participação {participation_id}: {score}%"
     
@@ -34,6 +39,14 @@ def calculate_score(participation_id):
     except Exception as e:
         return f"Erro ao calcular score para a participação {participation_id}: {str(e)}"
     
+def replace_rankings(exam, rankings):
+    """
+    Substitui o ranking da prova em uma única escrita.
+    """
+    ModelRanking.objects.filter(exam=exam).delete()
+    ModelRanking.objects.bulk_create(rankings)
+
+
 @shared_task
 def generate_ranking(exam_id):
     """
@@ -49,19 +62,17 @@ def generate_ranking(exam_id):
 
         print(f"Participações encontradas para o ranking: {participations.count()}")
 
-        ModelRanking.objects.filter(exam=exam).delete()
-
         rankings = [
             ModelRanking(
                 exam=exam,
-                participant=participation.user,
+                participant_id=participation.user_id,
                 score=participation.score,
                 position=position,
             )
             for position, participation in enumerate(participations, start=1)
         ]
 
-        ModelRanking.objects.bulk_create(rankings)
+        run_write(replace_rankings, exam, rankings)
         print(f"Ranking criado com sucesso para o exame {exam_id}: {len(rankings)} entradas.")
 
         return f"Ranking gerado com sucesso para a prova {exam_id}."
@@ -70,4 +81,42 @@ def generate_ranking(exam_id):
         return f"Prova {exam_id} não encontrada."
 
     except Exception as e:
-        return f"Erro ao gerar ranking para a prova {exam_id}: {str(e)}"
\ No newline at end of file
+        return f"Erro ao gerar ranking para a prova {exam_id}: {str(e)}"
+
+@shared_task
+def sync_replica():
+    """
+    Copia o banco principal para a réplica de leitura local.
+    """
+    pages = replica.sync_replica()
+    return f"Réplica sincronizada: {pages} páginas."
+
+
+@shared_task
+def refresh_list_cache(family, key, build_path, params):
+    """
+    Reconstrói uma entrada vencida do cache das listagens (api/list_cache.py).
+    """
+    if list_cache.refresh(family, key, build_path, params):
+        return f"Listagem {key} atualizada."
+    return f"Listagem {key} foi invalidada; nada a atualizar."
+
+
+@shared_task
+def warm_cache(exam_ids=None):
+    """
+    Monta as entradas ausentes do cache das listagens e das provas em aberto (api/warming.py).
+    """
+    result = warming.warm(exam_ids)
+    return f"Cache aquecido: {result['built']} entradas montadas, {result['failed']} falhas."
+
+
+@shared_task
+def compact_sync_log():
+    """
+    Compacta o log de mudanças da sincronização incremental (api/sync.py).
+    """
+    result = run_write(sync.compact)
+    if result is None:
+        return "Log de mudanças sem nada a compactar."
+    return f"Log de mudanças compactado até {result[0]}: {result[1]} linhas removidas."
@@ -11,6 +11,8 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 class TestAnswerEndpoints(APITestCase):
+    databases = "__all__"
+
     def setUp(self):
         self.participant_user = User.objects.create_user(
             username="participant",
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework_simplejwt.tokens import AccessToken
+from api.answers_db import AnswersRouter
+from api.models import ModelAnswer, ModelChoice, ModelExam, ModelParticipation, ModelQuestion, ModelRanking
+from api.tasks import calculate_score, generate_ranking
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class AnswersFixtureMixin:
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(username="participante", email="participante@example.com")
+        self.exam = ModelExam.objects.create(name="Prova", created_by=self.admin_user)
+        self.question = ModelQuestion.objects.create(text="Quanto é 2 + 2?")
+        self.exam.questions.add(self.question)
+        self.correct = ModelChoice.objects.create(question=self.question, text="Quatro", is_correct=True)
+        self.wrong = ModelChoice.objects.create(question=self.question, text="Cinco")
+
+    def headers_for(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+
+class TestAnswersRouter(AnswersFixtureMixin, TestCase):
+    databases = "__all__"
+
+    @override_settings(ANSWERS_DATABASE="answers")
+    def test_router_places_only_answers_models_in_answers_database(self):
+        router = AnswersRouter()
+
+        self.assertEqual(router.db_for_read(ModelAnswer), "answers")
+        self.assertEqual(router.db_for_write(ModelParticipation), "answers")
+        self.assertIsNone(router.db_for_read(ModelExam))
+        self.assertTrue(router.allow_migrate("answers", "api", "modelanswer"))
+        self.assertFalse(router.allow_migrate("answers", "api", "modelexam"))
+        self.assertFalse(router.allow_migrate("default", "api", "modelparticipation"))
+        self.assertIsNone(router.allow_migrate("default", "api", "modelexam"))
+
+    @override_settings(ANSWERS_DATABASE=None)
+    def test_router_is_inactive_without_answers_database(self):
+        self.assertIsNone(AnswersRouter().db_for_write(ModelAnswer))
+
+    def test_deleting_catalog_rows_deletes_participations_and_answers(self):
+        participation = ModelParticipation.objects.create(user=self.participant, exam=self.exam)
+        ModelAnswer.objects.create(participation=participation, question=self.question, choice=self.wrong)
+
+        self.wrong.delete()
+        self.assertFalse(ModelAnswer.objects.exists())
+
+        ModelAnswer.objects.create(participation=participation, question=self.question, choice=self.correct)
+        self.participant.delete()
+        self.assertFalse(ModelParticipation.objects.exists())
+        self.assertFalse(ModelAnswer.objects.exists())
+
+
+@unittest.skipUnless(
+    getattr(settings, "ANSWERS_DATABASE", None),
+    "Defina DATABASE_ANSWERS_NAME para testar o banco separado de respostas."
+)
+class TestSeparateAnswersDatabase(AnswersFixtureMixin, TestCase):
+    databases = "__all__"
+
+    def test_exam_day_flow_across_databases(self):
+        response = self.client.post(
+            f"/api/exams/{self.exam.id}/participants/",
+            {"user_id": self.participant.id, "exam_id": self.exam.id},
+            content_type="application/json",
+            **self.headers_for(self.admin_user),
+        )
+        self.assertEqual(response.status_code, 201)
+        participation_id = response.json()["id"]
+
+        response = self.client.post(
+            "/api/answers/",
+            {"participation_id": participation_id, "question_id": self.question.id, "choice_id": self.correct.id},
+            content_type="application/json",
+            **self.headers_for(self.participant),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["choice"]["text"], "Quatro")
+
+        response = self.client.get(
+            f"/api/answers/participants/{participation_id}/?query=Quatro", **self.headers_for(self.participant)
+        )
+        self.assertEqual(len(response.json()), 1)
+        response = self.client.get(
+            f"/api/exams/{self.exam.id}/participants/?query=participante", **self.headers_for(self.admin_user)
+        )
+        self.assertEqual([item["id"] for item in response.json()], [participation_id])
+
+        with patch("api.tasks.generate_ranking.delay"):
+            calculate_score(participation_id)
+        generate_ranking(self.exam.id)
+        self.assertEqual(ModelRanking.objects.get(exam=self.exam).score, 100.0)
+
+        self.assertTrue(ModelAnswer.objects.using("answers").filter(participation_id=participation_id).exists())
+        self.assertNotIn("api_modelanswer", connections["default"].introspection.table_names())
@@ -0,0 +1,161 @@
+from collections import Counter
+from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from api.assembly import MAX_ROUNDS, allocate
+from api.models import ModelChange, ModelChoice, ModelExam, ModelQuestion
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestExamAssembly(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        ModelQuestion.objects.bulk_create(
+            ModelQuestion(text=f"Questão {i}", tag=tag, difficulty=i % 3 + 1)
+            for tag, count in (("algebra", 60), ("geometria", 40), ("logica", 20))
+            for i in range(count)
+        )
+        self.tags = dict(ModelQuestion.objects.values_list("id", "tag"))
+
+    def assemble(self, headers=None, **payload):
+        return self.client.post(
+            "/api/exams/random/", {"name": "Prova sorteada", **payload},
+            content_type="application/json", **(headers or self.admin_headers),
+        )
+
+    def test_allocation_is_proportional(self):
+        self.assertEqual(allocate({"a": 60, "b": 40, "c": 20}, 12), {"a": 6, "b": 4, "c": 2})
+        self.assertEqual(allocate({"a": 1, "b": 1, "c": 1}, 2), {"a": 1, "b": 1, "c": 0})
+        self.assertEqual(sum(allocate({"a": 7, "b": 5, "c": 3}, 10).values()), 10)
+
+    def test_stratified_assembly_without_sorting_the_bank(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.assemble(size=12, stratify_by="tag")
+
+        self.assertEqual(response.status_code, 201)
+        question_ids = [question["id"] for question in response.json()["questions"]]
+        self.assertEqual(len(set(question_ids)), 12)
+        self.assertEqual(Counter(self.tags[question_id] for question_id in question_ids), {"algebra": 6, "geometria": 4, "logica": 2})
+
+        sql = [query["sql"] for query in context.captured_queries]
+        self.assertFalse(any("RANDOM()" in statement for statement in sql))
+        links = [statement for statement in sql if statement.startswith("INSERT") and '"api_modelexam_questions"' in statement]
+        self.assertEqual(len(links), 1)
+
+    def test_probes_are_batched(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.assemble(size=25)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len({question["id"] for question in response.json()["questions"]}), 25)
+        draws = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith("SELECT") and '"api_modelquestion"' in query["sql"]
+            and '"api_modelexam_questions"' not in query["sql"]
+        ]
+        # Contagem do banco e agregação do estrato, mais as rodadas e a eventual leitura do restante.
+        self.assertLessEqual(len(draws), 2 + MAX_ROUNDS + 1)
+
+    def test_same_seed_draws_the_same_questions(self):
+        def draw(seed):
+            return sorted(question["id"] for question in self.assemble(size=5, seed=seed).json()["questions"])
+
+        self.assertEqual(draw(7), draw(7))
+        self.assertNotEqual(draw(7), draw(8))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.assemble(size=121).status_code, 422)
+        self.assertEqual(self.assemble(size=0).status_code, 422)
+        self.assertEqual(self.assemble(size=3, stratify_by="text").status_code, 422)
+        participant_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.participant)}"}
+        self.assertEqual(self.assemble(participant_headers, size=3).status_code, 403)
+
+
+class TestExamCloning(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        self.small = self.create_exam("Prova pequena", 3)
+        self.large = self.create_exam("Prova grande", 30)
+
+    def create_exam(self, name, size):
+        exam = ModelExam.objects.create(name=name, created_by=self.admin_user)
+        questions = ModelQuestion.objects.bulk_create(ModelQuestion(text=f"{name} {i}", tag="algebra") for i in range(size))
+        ModelChoice.objects.bulk_create(
+            ModelChoice(question=question, text=text, is_correct=text == "Certa")
+            for question in questions for text in ("Certa", "Errada")
+        )
+        exam.questions.add(*questions)
+        return exam
+
+    def clone(self, exam, **payload):
+        return self.client.post(
+            f"/api/exams/{exam.id}/clone/", payload, content_type="application/json", **self.admin_headers
+        )
+
+    def test_clone_shares_the_questions(self):
+        response = self.clone(self.small)
+
+        self.assertEqual(response.status_code, 201)
+        clone = response.json()
+        self.assertEqual(clone["name"], "Prova pequena (cópia)")
+        self.assertEqual(
+            sorted(question["id"] for question in clone["questions"]),
+            sorted(self.small.questions.values_list("id", flat=True)),
+        )
+
+    def test_deep_clone_copies_questions_and_choices(self):
+        response = self.clone(self.small, name="Prova de recuperação", deep=True)
+
+        self.assertEqual(response.status_code, 201)
+        clone = ModelExam.objects.get(id=response.json()["id"])
+        originals = set(self.small.questions.values_list("id", flat=True))
+        copies = list(clone.questions.order_by("id"))
+        self.assertEqual(len(copies), 3)
+        self.assertFalse(originals & {question.id for question in copies})
+        for question in copies:
+            self.assertEqual(question.tag, "algebra")
+            self.assertEqual(sorted(question.choices.values_list("text", "is_correct")), [("Certa", True), ("Errada", False)])
+
+        ModelChoice.objects.filter(question__in=copies).update(text="Alterada")
+        self.assertFalse(ModelChoice.objects.filter(question_id__in=originals, text="Alterada").exists())
+
+    def test_deep_clone_records_each_copy_once_in_the_feed(self):
+        since = ModelChange.objects.order_by("-id").values_list("id", flat=True).first()
+        clone = ModelExam.objects.get(id=self.clone(self.small, deep=True).json()["id"])
+
+        copies = set(clone.questions.values_list("id", flat=True))
+        changes = ModelChange.objects.filter(id__gt=since)
+        questions = list(changes.filter(entity=ModelChange.QUESTION).values_list("object_id", flat=True))
+        self.assertEqual(sorted(questions), sorted(copies))
+        self.assertEqual(changes.filter(entity=ModelChange.CHOICE).count(), 6)
+
+    def test_query_count_does_not_grow_with_the_exam(self):
+        counts = []
+        for exam in (self.small, self.large):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.clone(exam, deep=True).status_code, 201)
+            counts.append(len(context.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_missing_exam(self):
+        self.assertEqual(self.client.post("/api/exams/999/clone/", {}, content_type="application/json", **self.admin_headers).status_code, 404)
@@ -0,0 +1,50 @@
+from django.test import TransactionTestCase, AsyncClient
+from django.core.cache import cache
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import ModelExam, ModelParticipation
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestAsyncReadPath(TransactionTestCase):
+    """Percorre as rotas assíncronas pela pilha ASGI, com os middlewares de JWT e métricas."""
+
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(username="participante", email="participante@example.com")
+        self.exam = ModelExam.objects.create(name="Prova assíncrona", created_by=self.admin_user)
+        self.participation = ModelParticipation.objects.create(user=self.participant, exam=self.exam)
+        self.client = AsyncClient()
+
+    def headers_for(self, user):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+    async def test_async_routes_authenticate_and_respond(self):
+        admin = await sync_to_async(self.headers_for)(self.admin_user)
+        participant = await sync_to_async(self.headers_for)(self.participant)
+
+        response = await self.client.get("/api/exams/", headers=admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["name"], "Prova assíncrona")
+
+        response = await self.client.get(f"/api/exams/{self.exam.id}/", headers=participant)
+        self.assertEqual(response.status_code, 200)
+
+        response = await self.client.get(f"/api/exams/{self.exam.id}/progresses/", headers=participant)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "in_progress")
+
+    async def test_async_routes_reject_missing_or_forbidden_user(self):
+        response = await self.client.get("/api/exams/")
+        self.assertEqual(response.status_code, 401)
+
+        participant = await sync_to_async(self.headers_for)(self.participant)
+        response = await self.client.get(f"/api/rankings/exams/{self.exam.id}/", headers=participant)
+        self.assertEqual(response.status_code, 403)
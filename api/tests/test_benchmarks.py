@@ -0,0 +1,46 @@
+from django.test import TestCase
+from django.core.cache import cache
+from api.benchmarks import compare, run_benchmarks
+
+
+class TestBenchmarks(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_run_benchmarks_reports_every_case(self):
+        report = run_benchmarks(size=5, rounds=2, warmup=0)
+
+        names = [result["name"] for result in report["results"]]
+        self.assertEqual(names, [
+            "exam_schema",
+            "question_schema",
+            "answer_schema",
+            "exam_validate",
+            "exam_project",
+            "question_page_validate",
+            "question_page_project",
+            "answer_page_validate",
+            "answer_page_project",
+            "exam_render_json",
+            "exam_render_orjson",
+            "exam_parse_json",
+            "exam_parse_orjson",
+            "paginate_queryset",
+            "cache_helpers",
+            "calculate_score",
+            "generate_ranking",
+        ])
+        self.assertEqual(report["meta"]["size"], 5)
+        for result in report["results"]:
+            self.assertEqual(result["rounds"], 2)
+            self.assertLessEqual(result["min"], result["median"])
+            self.assertLessEqual(result["median"], result["max"])
+            self.assertGreater(result["peak_memory"], 0)
+
+    def test_compare_reports_relative_change(self):
+        baseline = {"results": [{"name": "exam_schema", "median": 0.2}]}
+        current = {"results": [{"name": "exam_schema", "median": 0.1}, {"name": "novo", "median": 0.1}]}
+
+        self.assertEqual(compare(current, baseline), [("exam_schema", 0.2, 0.1, -0.5)])
@@ -0,0 +1,122 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import ModelAnswer, ModelExam, ModelParticipation, ModelQuestion, ModelChoice
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestOfflineBundle(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.outsider = User.objects.create(
+            username="outsider", email="outsider@example.com", is_admin=False, is_participant=True
+        )
+        self.exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+        self.questions = []
+        for i in range(2):
+            question = ModelQuestion.objects.create(text=f"Questão {i}")
+            correct = ModelChoice.objects.create(question=question, text="Certa", is_correct=True)
+            wrong = ModelChoice.objects.create(question=question, text="Errada", is_correct=False)
+            self.questions.append((question, correct, wrong))
+        self.exam.questions.add(*(question for question, _, _ in self.questions))
+        self.participation = ModelParticipation.objects.create(user=self.participant, exam=self.exam)
+
+        ranking = patch("api.routers.exam.generate_ranking.delay")
+        self.generate_ranking = ranking.start()
+        self.addCleanup(ranking.stop)
+
+    def headers_for(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+    def get_bundle(self, user=None):
+        return self.client.get(f"/api/exams/{self.exam.id}/bundle/", **self.headers_for(user or self.participant))
+
+    def submit(self, token, answers):
+        # Sem JWT: o token do pacote identifica a participação.
+        return self.client.post(
+            f"/api/exams/{self.exam.id}/submissions/",
+            {"token": token, "answers": [{"question_id": q.id, "choice_id": c.id} for q, c in answers]},
+            content_type="application/json",
+        )
+
+    def test_bundle_carries_the_paper_and_a_token(self):
+        response = self.get_bundle()
+
+        self.assertEqual(response.status_code, 200)
+        bundle = response.json()
+        self.assertEqual(bundle["participation_id"], self.participation.id)
+        self.assertEqual(sorted(question["id"] for question in bundle["paper"]["questions"]), [q.id for q, _, _ in self.questions])
+        self.assertTrue(bundle["token"])
+        self.assertIn("expires_at", bundle)
+        self.assertNotIn(b"is_correct", response.content)
+
+    def test_only_enrolled_participants_get_a_bundle(self):
+        self.assertEqual(self.get_bundle(self.outsider).status_code, 403)
+        self.assertEqual(self.client.get("/api/exams/999/bundle/", **self.headers_for(self.participant)).status_code, 404)
+
+    def test_single_submission_is_graded_directly(self):
+        token = self.get_bundle().json()["token"]
+        (first, right, _), (second, second_right, wrong) = self.questions
+
+        response = self.submit(token, [(first, right), (second, wrong)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"participation_id": self.participation.id, "score": 50.0, "answered": 2})
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.score, 50.0)
+        self.assertIsNotNone(self.participation.finished_at)
+        self.assertEqual(ModelAnswer.objects.filter(participation=self.participation).count(), 2)
+        self.generate_ranking.assert_called_once_with(self.exam.id)
+
+        self.assertEqual(self.submit(token, [(first, right), (second, second_right)]).status_code, 403)
+        self.participation.refresh_from_db()
+        self.assertEqual(self.participation.score, 50.0)
+
+    def test_invalid_sheets_are_rejected(self):
+        token = self.get_bundle().json()["token"]
+        (first, right, _), (second, other_right, _) = self.questions
+
+        self.assertEqual(self.submit(token, [(first, other_right)]).status_code, 422)
+        self.assertEqual(self.submit(token, [(first, right), (first, right)]).status_code, 422)
+        self.assertEqual(self.submit(token[:-2] + "xx", [(first, right)]).status_code, 403)
+        self.participation.refresh_from_db()
+        self.assertIsNone(self.participation.finished_at)
+
+    def test_expired_or_outdated_bundles_are_rejected(self):
+        token = self.get_bundle().json()["token"]
+        first, right, _ = self.questions[0]
+
+        with override_settings(EXAM_BUNDLE_MAX_AGE=-1):
+            self.assertEqual(self.submit(token, [(first, right)]).status_code, 403)
+
+        first.choices.create(text="Nova alternativa", is_correct=False)
+        self.assertEqual(self.submit(token, [(first, right)]).status_code, 409)
+
+    def test_changes_outside_the_paper_keep_the_bundle_valid(self):
+        token = self.get_bundle().json()["token"]
+        first, right, _ = self.questions[0]
+        version = ModelExam.objects.get(id=self.exam.id).version
+
+        # A cópia rasa vincula as mesmas questões a outra prova, o que muda a versão desta.
+        clone = self.client.post(
+            f"/api/exams/{self.exam.id}/clone/", {}, content_type="application/json", **self.headers_for(self.admin_user)
+        )
+        self.assertEqual(clone.status_code, 201)
+        self.exam.name = "Prova renomeada"
+        self.exam.save()
+        self.assertNotEqual(ModelExam.objects.get(id=self.exam.id).version, version)
+
+        response = self.submit(token, [(first, right)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["score"], 50.0)
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from rest_framework_simplejwt.tokens import AccessToken
+from api.cache_backends import tiered
+from api.models import ModelExam
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class UnreliableRedis(LocMemCache):
+    """Cache local que, com `down`, simula um Redis travado: cada chamada espera o timeout e falha."""
+
+    down = False
+    stall = 0.2
+
+    def _check(self):
+        if UnreliableRedis.down:
+            time.sleep(self.stall)
+            raise RedisTimeoutError("Timeout reading from socket")
+
+    def get(self, *args, **kwargs):
+        self._check()
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        self._check()
+        return super().set(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        self._check()
+        return super().add(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._check()
+        return super().delete(*args, **kwargs)
+
+    def clear(self):
+        self._check()
+        return super().clear()
+
+
+CACHES = {
+    **settings.CACHES,
+    "default": {
+        **settings.CACHES["default"],
+        "OPTIONS": {**settings.CACHES["default"]["OPTIONS"], "BREAKER_FAILURES": 3, "BREAKER_COOLDOWN": 0.5},
+    },
+    "redis": {"BACKEND": "api.tests.test_cache_breaker.UnreliableRedis"},
+}
+
+
+@override_settings(CACHES=CACHES)
+class TestCacheOutage(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        UnreliableRedis.down = False
+        tiered.reset()
+        self.addCleanup(tiered.reset)
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        ModelExam.objects.bulk_create(ModelExam(name=f"Prova {i}", created_by=self.admin_user) for i in range(5))
+
+    def tearDown(self):
+        UnreliableRedis.down = False
+
+    def timed_get(self, url):
+        start = time.perf_counter()
+        response = self.client.get(url, **self.admin_headers)
+        return response, time.perf_counter() - start
+
+    def test_requests_keep_bounded_latency_while_redis_is_down(self):
+        UnreliableRedis.down = True
+
+        with self.assertLogs("api.cache_backends.tiered", level="WARNING"):
+            results = [self.timed_get(f"/api/exams/?page={page % 3 + 1}&page_size=2") for page in range(10)]
+
+        for response, _ in results:
+            self.assertEqual(response.status_code, 200)
+        # Só as primeiras chamadas esperam o timeout; com o circuito aberto, o Redis não é consultado.
+        self.assertTrue(cache.bus.breaker.open)
+        self.assertLess(max(duration for _, duration in results[1:]), UnreliableRedis.stall)
+        self.assertLess(sum(duration for _, duration in results), 4 * UnreliableRedis.stall)
+
+    def test_local_tier_serves_lists_during_the_outage(self):
+        UnreliableRedis.down = True
+        with self.assertLogs("api.cache_backends.tiered", level="WARNING"):
+            first, _ = self.timed_get("/api/exams/")
+            ModelExam.objects.filter(name="Prova 4").update(name="Renomeada sem invalidar")
+            second, _ = self.timed_get("/api/exams/")
+
+        self.assertEqual(second.content, first.content)
+
+    def test_circuit_closes_and_discards_the_local_copies_after_the_cooldown(self):
+        UnreliableRedis.down = True
+        with self.assertLogs("api.cache_backends.tiered", level="WARNING"):
+            self.timed_get("/api/exams/")
+        self.assertTrue(cache.bus.breaker.open)
+
+        UnreliableRedis.down = False
+        time.sleep(0.5)
+        ModelExam.objects.filter(name="Prova 4").update(name="Prova renomeada")
+        with self.assertLogs("api.cache_backends.tiered", level="WARNING"):
+            # Qualquer acesso ao Redis depois do prazo testa a conexão.
+            cache.get("replica_pin:1")
+
+        self.assertFalse(cache.bus.breaker.open)
+        self.assertEqual(len(cache.l1), 0)
+        response, _ = self.timed_get("/api/exams/")
+        self.assertIn("Prova renomeada", [exam["name"] for exam in response.json()])
+
+    def test_a_cancelled_probe_does_not_keep_the_circuit_open(self):
+        UnreliableRedis.down = True
+        with self.assertLogs("api.cache_backends.tiered", level="WARNING"):
+            self.timed_get("/api/exams/")
+        self.assertTrue(cache.bus.breaker.open)
+
+        UnreliableRedis.down = False
+        time.sleep(0.5)
+        # O cliente desconecta durante a chamada de teste, e a requisição é cancelada.
+        with patch.object(UnreliableRedis, "get", side_effect=asyncio.CancelledError):
+            with self.assertRaises(asyncio.CancelledError):
+                async_to_sync(cache.aget)("replica_pin:1")
+
+        with self.assertLogs("api.cache_backends.tiered", level="WARNING"):
+            cache.get("replica_pin:1")
+        self.assertFalse(cache.bus.breaker.open)
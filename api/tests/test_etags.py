@@ -0,0 +1,97 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import ModelExam, ModelParticipation, ModelQuestion, ModelChoice, ModelRanking
+from api.tasks import generate_ranking
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestConditionalGet(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        self.exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+        self.other_exam = ModelExam.objects.create(name="Prova 2", created_by=self.admin_user)
+        self.question = ModelQuestion.objects.create(text="Quanto é 2 + 2?")
+        self.choice = ModelChoice.objects.create(question=self.question, text="4", is_correct=True)
+        self.exam.questions.add(self.question)
+
+    def get(self, url, etag=None):
+        headers = dict(self.admin_headers)
+        if etag:
+            headers["HTTP_IF_NONE_MATCH"] = etag
+        return self.client.get(url, **headers)
+
+    def assertRevalidates(self, url, change):
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        with CaptureQueriesContext(connection) as context:
+            cached = self.get(url, etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(cached["ETag"], etag)
+
+        change()
+        changed = self.get(url, etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        return context.captured_queries
+
+    def test_exam_details(self):
+        def link_question_elsewhere():
+            # A questão da prova passa a listar outra prova em exam_ids.
+            self.question.exams.add(self.other_exam)
+
+        queries = self.assertRevalidates(f"/api/exams/{self.exam.id}/", link_question_elsewhere)
+        sql = " ".join(query["sql"] for query in queries)
+        self.assertNotIn("api_modelquestion", sql)
+
+    def test_exam_details_depend_on_the_selection(self):
+        full = self.get(f"/api/exams/{self.exam.id}/")
+        sparse = self.get(f"/api/exams/{self.exam.id}/?fields=id,name", full["ETag"])
+        self.assertEqual(sparse.status_code, 200)
+
+    def test_question_details(self):
+        def change_choice():
+            self.choice.text = "Quatro"
+            self.choice.save()
+
+        self.assertRevalidates(f"/api/questions/{self.question.id}", change_choice)
+
+    def test_question_list(self):
+        self.assertRevalidates("/api/questions/", lambda: self.question.exams.remove(self.exam))
+        self.assertRevalidates("/api/questions/", lambda: ModelQuestion.objects.filter(id=self.question.id).delete())
+
+    def test_question_list_sees_links_removed_by_exam_deletion(self):
+        self.question.exams.add(self.other_exam)
+        self.assertRevalidates("/api/questions/", lambda: self.other_exam.delete())
+
+    def test_ranking(self):
+        ModelParticipation.objects.create(user=self.participant, exam=self.exam, score=50, finished_at="2026-01-01T10:00Z")
+        generate_ranking(self.exam.id)
+
+        def regenerate():
+            ModelRanking.objects.filter(exam=self.exam).update(created_at="2020-01-01T00:00Z")
+            generate_ranking(self.exam.id)
+
+        self.assertRevalidates(f"/api/rankings/exams/{self.exam.id}/", regenerate)
+
+    def test_wildcard_and_weak_tags_match(self):
+        etag = self.get(f"/api/exams/{self.exam.id}/")["ETag"]
+
+        self.assertEqual(self.get(f"/api/exams/{self.exam.id}/", "*").status_code, 304)
+        self.assertEqual(self.get(f"/api/exams/{self.exam.id}/", f'"outro", W/{etag}').status_code, 304)
@@ -0,0 +1,113 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api.fieldsets import serializer
+from api.models import ModelExam, ModelParticipation, ModelQuestion, ModelChoice, ModelAnswer
+from api.schemas import AnswerSchema, ExamSchema, ParticipationSchema, QuestionSchema, UserSchema
+from api.utils import answers_with_details, exams_with_details, participations_with_details, questions_with_details
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestSparseFieldsets(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        self.participant_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.participant)}"}
+
+        self.exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+        self.questions = []
+        for i in range(3):
+            question = ModelQuestion.objects.create(text=f"Questão {i}")
+            ModelChoice.objects.create(question=question, text="Certa", is_correct=True)
+            ModelChoice.objects.create(question=question, text="Errada", is_correct=False)
+            self.exam.questions.add(question)
+            self.questions.append(question)
+        self.participation = ModelParticipation.objects.create(user=self.participant, exam=self.exam)
+        self.answer = ModelAnswer.objects.create(
+            participation=self.participation, question=self.questions[0], choice=self.questions[0].choices.first()
+        )
+
+    def test_full_serializer_matches_the_schemas(self):
+        cases = [
+            ("user", UserSchema, User.objects.get(id=self.participant.id)),
+            ("question", QuestionSchema, questions_with_details().get(id=self.questions[0].id)),
+            ("exam", ExamSchema, exams_with_details().get(id=self.exam.id)),
+            ("participation", ParticipationSchema, participations_with_details().get(id=self.participation.id)),
+            ("answer", AnswerSchema, answers_with_details().get(id=self.answer.id)),
+        ]
+        for resource, schema, obj in cases:
+            with self.subTest(resource=resource):
+                data = serializer(resource)(obj)
+                expected = schema.model_validate(obj).model_dump()
+                self.assertEqual(data, expected)
+                self.assertEqual(list(data), list(expected))
+
+    def test_participants_without_nested_exam(self):
+        url = f"/api/exams/{self.exam.id}/participants/?fields=id,score,exam,user.username"
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {"id": self.participation.id, "user": {"username": "participant"}, "exam": self.exam.id, "score": 0.0},
+        ])
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        self.assertNotIn("api_modelquestion", sql)
+        self.assertNotIn("api_modelchoice", sql)
+        self.assertNotIn('"started_at"', sql)
+
+    def test_expand_embeds_nested_relations(self):
+        response = self.client.get(
+            f"/api/exams/{self.exam.id}/?fields=id,questions&expand=questions.choices", **self.admin_headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        question = response.json()["questions"][0]
+        self.assertEqual(set(response.json()), {"id", "questions"})
+        self.assertEqual(set(question), {"id", "text", "tag", "difficulty", "created_at", "choices", "exam_ids"})
+        self.assertEqual(question["exam_ids"], [self.exam.id])
+        self.assertEqual({choice["text"] for choice in question["choices"]}, {"Certa", "Errada"})
+
+    def test_unexpanded_relations_are_ids(self):
+        response = self.client.get(f"/api/questions/{self.questions[0].id}?expand=", **self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(response.json()["choices"]), sorted(self.questions[0].choices.values_list("id", flat=True))
+        )
+
+    def test_list_cache_is_keyed_by_selection(self):
+        full = self.client.get("/api/exams/", **self.admin_headers)
+        sparse = self.client.get("/api/exams/?fields=id,name", **self.admin_headers)
+
+        self.assertIn("questions", full.json()[0])
+        self.assertEqual(sparse.json(), [{"id": self.exam.id, "name": "Prova 1"}])
+
+    def test_answer_details_check_the_author(self):
+        url = f"/api/answers/{self.answer.id}/?fields=id,choice&expand=choice"
+
+        response = self.client.get(url, **self.participant_headers)
+        forbidden = self.client.get(url, **self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["choice"]["text"], "Certa")
+        self.assertEqual(forbidden.status_code, 403)
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ("fields=id,senha", "expand=name", "fields=created_by.senha"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/exams/?{query}", **self.admin_headers)
+                self.assertEqual(response.status_code, 422)
@@ -0,0 +1,96 @@
+import time
+from unittest.mock import patch
+from django.test import TestCase
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api import list_cache, tasks
+from api.models import ModelExam
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+CACHE_KEY = "list_exams:None:-name:1:10"
+BUILD_PATH = "api.routers.exam.build_exams_page"
+PARAMS = {"query": None, "order_by": "-name", "page": 1, "page_size": 10, "fields": None, "expand": None}
+
+
+class TestStaleWhileRevalidate(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        self.exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+
+    def list_exams(self):
+        return self.client.get("/api/exams/", **self.admin_headers)
+
+    def expire(self):
+        """Torna a entrada em cache vencida, sem alterar o seu conteúdo."""
+        _, payload = cache.get(CACHE_KEY)
+        cache.set(CACHE_KEY, (time.time() - 1, payload))
+
+    def rename_without_invalidating(self, name):
+        ModelExam.objects.filter(id=self.exam.id).update(name=name)
+
+    def test_fresh_entries_do_not_schedule_a_refresh(self):
+        with patch.object(tasks.refresh_list_cache, "delay") as delay:
+            self.list_exams()
+            self.rename_without_invalidating("Prova renomeada")
+            response = self.list_exams()
+
+        self.assertEqual(response.json()[0]["name"], "Prova 1")
+        delay.assert_not_called()
+
+    def test_stale_entries_are_served_while_one_refresh_is_scheduled(self):
+        self.list_exams()
+        self.expire()
+        self.rename_without_invalidating("Prova renomeada")
+
+        with patch.object(tasks.refresh_list_cache, "delay") as delay:
+            first = self.list_exams()
+            second = self.list_exams()
+
+        self.assertEqual(first.json()[0]["name"], "Prova 1")
+        self.assertEqual(second.json()[0]["name"], "Prova 1")
+        delay.assert_called_once_with("exams", CACHE_KEY, BUILD_PATH, PARAMS)
+
+    def test_refresh_rebuilds_the_entry_and_releases_the_lock(self):
+        self.list_exams()
+        self.expire()
+        self.rename_without_invalidating("Prova renomeada")
+        with patch.object(tasks.refresh_list_cache, "delay") as delay:
+            self.list_exams()
+
+        tasks.refresh_list_cache(*delay.call_args.args)
+
+        self.assertIsNone(cache.get(list_cache.REFRESH_LOCK_KEY.format(CACHE_KEY)))
+        soft_expires_at, _ = cache.get(CACHE_KEY)
+        self.assertGreater(soft_expires_at, time.time())
+        self.assertEqual(self.list_exams().json()[0]["name"], "Prova renomeada")
+
+    def test_refresh_does_not_resurrect_invalidated_entries(self):
+        self.list_exams()
+        self.expire()
+        with patch.object(tasks.refresh_list_cache, "delay") as delay:
+            self.list_exams()
+
+        self.client.post("/api/exams/", {"name": "Prova 2"}, content_type="application/json", **self.admin_headers)
+
+        self.assertFalse(list_cache.refresh(*delay.call_args.args))
+        self.assertIsNone(cache.get(CACHE_KEY))
+        self.assertIsNone(cache.get(list_cache.REFRESH_LOCK_KEY.format(CACHE_KEY)))
+
+    def test_broker_failures_keep_serving_the_stale_entry(self):
+        self.list_exams()
+        self.expire()
+
+        with patch.object(tasks.refresh_list_cache, "delay", side_effect=ConnectionError), \
+                self.assertLogs("api.list_cache", level="ERROR"):
+            response = self.list_exams()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(list_cache.REFRESH_LOCK_KEY.format(CACHE_KEY)))
@@ -0,0 +1,72 @@
+from django.test import SimpleTestCase
+from api.loadtest import ExamDaySimulation, StepStats, percentile
+
+
+class TestLoadTestStats(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summary_reports_throughput_and_error_rate(self):
+        stats = StepStats()
+        stats.record("answer", 0.1, 201, True)
+        stats.record("answer", 0.3, 201, True)
+        stats.record("answer", 0.2, 403, False)
+        stats.record("answer", 0.4, "connection_error", False)
+
+        summary = stats.summary(elapsed=2.0)["answer"]
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["errors"], 2)
+        self.assertEqual(summary["error_rate"], 0.5)
+        self.assertEqual(summary["throughput"], 2.0)
+        self.assertEqual(summary["p50"], 0.2)
+        self.assertEqual(summary["statuses"], {"201": 2, "403": 1, "connection_error": 1})
+
+
+class FakeClient:
+    """Responde ao fluxo do participante com um caderno de duas questões, sem gabarito."""
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, path, payload=None, token=None):
+        self.requests.append((method, path, payload))
+        if path == "/api/token/":
+            return 200, {"access": "token"}
+        if path == "/api/exams/1/paper/":
+            return 200, {"id": 1, "questions": [
+                {"id": 10, "choices": [{"id": 101}, {"id": 102}, {"id": 103}]},
+                {"id": 20, "choices": [{"id": 201}, {"id": 202}, {"id": 203}]},
+            ]}
+        if path == "/api/answers/":
+            return 201, {}
+        if path.endswith("/progresses/"):
+            return 200, {"status": "completed"}
+        return 200, {}
+
+
+class TestParticipantJourney(SimpleTestCase):
+    plan = {"exam_id": 1, "password": "senha", "correct_choice_ids": [102, 203], "participants": []}
+
+    def answers(self, correct_rate):
+        simulation = ExamDaySimulation(self.plan, "http://localhost:8000", correct_rate=correct_rate, poll_interval=0)
+        simulation.client = FakeClient()
+        simulation.participant_journey(0, "participante", 7, start_at=0)
+        return simulation.client.requests, [
+            payload["choice_id"] for _, path, payload in simulation.client.requests if path == "/api/answers/"
+        ]
+
+    def test_journey_reads_the_paper_and_answers_from_the_plan(self):
+        requests, choices = self.answers(correct_rate=1.0)
+
+        self.assertIn(("GET", "/api/exams/1/paper/", None), requests)
+        self.assertEqual(choices, [102, 203])
+
+    def test_correct_rate_zero_answers_wrong_choices(self):
+        _, choices = self.answers(correct_rate=0.0)
+
+        self.assertEqual(len(choices), 2)
+        self.assertFalse({102, 203} & set(choices))
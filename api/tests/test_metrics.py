@@ -0,0 +1,80 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from api import metrics
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestMetricsEndpoint(APITestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            password="admin123",
+            email="admin@example.com",
+            is_admin=True,
+            is_participant=False
+        )
+        response = self.client.post(
+            "/api/token/",
+            {"username": "admin", "password": "admin123"},
+            format="json"
+        )
+        self.admin_headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {response.json().get('access')}"
+        }
+
+    def test_metrics_reports_route_latency_and_status(self):
+        self.client.get("/api/users/")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+        body = response.content.decode()
+        self.assertIn('api_requests_total{route="api/users/",method="GET",status="401"} 1.0', body)
+        self.assertIn('api_request_duration_seconds_count{route="api/users/",method="GET"} 1', body)
+        self.assertIn('api_request_duration_seconds_bucket{route="api/users/",method="GET",le="+Inf"} 1', body)
+
+    def test_metrics_reports_cache_events(self):
+        self.client.get("/api/users/", **self.admin_headers)
+        self.client.get("/api/users/", **self.admin_headers)
+        self.client.post(
+            "/api/users/",
+            {"username": "novo", "password": "novo123", "email": "novo@example.com", "is_admin": False, "is_participant": True},
+            **self.admin_headers,
+            format="json"
+        )
+
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('api_cache_events_total{family="users",event="miss"} 1.0', body)
+        self.assertIn('api_cache_events_total{family="users",event="hit"} 1.0', body)
+        self.assertIn('api_cache_events_total{family="users",event="invalidate"} 1.0', body)
+
+    def test_metrics_aggregates_worker_processes(self):
+        metrics.observe_request("api/exams/", "GET", 200, 0.02)
+        metrics.observe_task("api.tasks.calculate_score", duration=0.5, lag=1.5)
+
+        histogram = metrics._new_histogram()
+        histogram[0] = 2
+        histogram[-2] = 0.004
+        histogram[-1] = 2
+        cache.set(metrics.METRICS_PROCESS_KEY.format("worker:1"), {
+            "histograms": {("api/exams/", "GET"): histogram},
+            "counters": {("api_requests_total", (("route", "api/exams/"), ("method", "GET"), ("status", "200"))): 2.0},
+            "gauges": {},
+        })
+        cache.set(metrics.METRICS_PROCESS_SET, {"worker:1"})
+
+        body = metrics.render()
+        self.assertIn('api_requests_total{route="api/exams/",method="GET",status="200"} 3.0', body)
+        self.assertIn('api_request_duration_seconds_bucket{route="api/exams/",method="GET",le="0.005"} 2', body)
+        self.assertIn('api_request_duration_seconds_bucket{route="api/exams/",method="GET",le="0.025"} 3', body)
+        self.assertIn('celery_task_duration_seconds{task="api.tasks.calculate_score"} 0.5', body)
+        self.assertIn('celery_task_queue_lag_seconds{task="api.tasks.calculate_score"} 1.5', body)
@@ -0,0 +1,198 @@
+import asyncio
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api import papers
+from api.models import ModelExam, ModelParticipation, ModelQuestion, ModelChoice
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestExamPaper(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.outsider = User.objects.create(
+            username="outsider", email="outsider@example.com", is_admin=False, is_participant=True
+        )
+        self.exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+        self.question = ModelQuestion.objects.create(text="Quanto é 2 + 2?")
+        ModelChoice.objects.create(question=self.question, text="4", is_correct=True)
+        ModelChoice.objects.create(question=self.question, text="5", is_correct=False)
+        self.exam.questions.add(self.question)
+        ModelParticipation.objects.create(user=self.participant, exam=self.exam)
+
+    def headers_for(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+    def get_paper(self, user=None):
+        return self.client.get(f"/api/exams/{self.exam.id}/paper/", **self.headers_for(user or self.participant))
+
+    def version(self):
+        return ModelExam.objects.get(id=self.exam.id).version
+
+    @override_settings(EXAM_PAPER_SHUFFLE=False)
+    def test_paper_hides_the_correct_choices(self):
+        response = self.get_paper()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "id": self.exam.id,
+            "name": "Prova 1",
+            "version": self.version(),
+            "questions": [{
+                "id": self.question.id,
+                "text": "Quanto é 2 + 2?",
+                "choices": [
+                    {"id": choice.id, "text": choice.text} for choice in self.question.choices.order_by("id")
+                ],
+            }],
+        })
+        self.assertNotIn(b"is_correct", response.content)
+
+    def test_exam_details_hide_the_correct_choices_from_participants(self):
+        url = f"/api/exams/{self.exam.id}/"
+        for query in ("", "?fields=questions.choices.is_correct,questions.choices.text"):
+            response = self.client.get(url + query, **self.headers_for(self.participant))
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(b"is_correct", response.content)
+
+        participant = self.client.get(url, **self.headers_for(self.participant))
+        admin = self.client.get(url, **self.headers_for(self.admin_user))
+        self.assertEqual(
+            sorted(choice["is_correct"] for choice in admin.json()["questions"][0]["choices"]), [False, True]
+        )
+        self.assertNotEqual(participant["ETag"], admin["ETag"])
+
+    def test_only_enrolled_participants_and_admins(self):
+        self.assertEqual(self.get_paper(self.outsider).status_code, 403)
+        self.assertEqual(self.get_paper(self.admin_user).status_code, 200)
+        missing = self.client.get("/api/exams/999/paper/", **self.headers_for(self.participant))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_paper_is_built_once_per_version(self):
+        with patch.object(papers, "abuild_exam_paper", wraps=papers.abuild_exam_paper) as build:
+            first = self.get_paper()
+            second = self.get_paper()
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(first.content, second.content)
+
+            self.question.text = "Quanto é 3 + 3?"
+            self.question.save()
+            third = self.get_paper()
+
+        self.assertEqual(build.call_count, 2)
+        self.assertEqual(third.json()["questions"][0]["text"], "Quanto é 3 + 3?")
+
+    def test_content_changes_bump_the_version(self):
+        other = ModelQuestion.objects.create(text="Outra questão")
+        changes = [
+            lambda: self.exam.questions.add(other),
+            lambda: other.exams.remove(self.exam),
+            lambda: ModelChoice.objects.create(question=self.question, text="6"),
+            lambda: self.question.choices.filter(text="6").delete(),
+            lambda: ModelExam.objects.get(id=self.exam.id).save(),
+            lambda: self.question.exams.clear(),
+        ]
+        for change in changes:
+            before = self.version()
+            change()
+            self.assertGreater(self.version(), before)
+
+    def test_stale_instances_do_not_overwrite_the_version(self):
+        stale = ModelExam.objects.get(id=self.exam.id)
+        self.question.save()
+        current = self.version()
+
+        stale.name = "Prova renomeada"
+        stale.save()
+
+        self.assertGreater(self.version(), current)
+
+    def test_each_participant_gets_a_stable_order_of_the_shared_paper(self):
+        for i in range(7):
+            question = ModelQuestion.objects.create(text=f"Questão {i}")
+            ModelChoice.objects.bulk_create(ModelChoice(question=question, text=str(j)) for j in range(4))
+            self.exam.questions.add(question)
+        other = User.objects.create(username="other", email="other@example.com", is_admin=False, is_participant=True)
+        ModelParticipation.objects.create(user=other, exam=self.exam)
+
+        def order(response):
+            return [(q["id"], [c["id"] for c in q["choices"]]) for q in response.json()["questions"]]
+
+        def normalized(response):
+            return sorted((question_id, sorted(choice_ids)) for question_id, choice_ids in order(response))
+
+        with patch.object(papers, "abuild_exam_paper", wraps=papers.abuild_exam_paper) as build:
+            mine, again, theirs, base = self.get_paper(), self.get_paper(), self.get_paper(other), self.get_paper(self.admin_user)
+        self.assertEqual(build.call_count, 1)
+
+        self.assertEqual(order(mine), order(again))
+        self.assertNotEqual(order(mine), order(theirs))
+        self.assertEqual(normalized(mine), normalized(theirs))
+        self.assertEqual(order(base), normalized(base))
+        self.assertNotEqual(mine["ETag"], theirs["ETag"])
+
+    def test_exam_details_follow_the_participant_paper_order(self):
+        for i in range(7):
+            question = ModelQuestion.objects.create(text=f"Questão {i}")
+            ModelChoice.objects.bulk_create(ModelChoice(question=question, text=f"{i}.{j}") for j in range(4))
+            self.exam.questions.add(question)
+        url = f"/api/exams/{self.exam.id}/"
+
+        def order(response):
+            return [(q["id"], [c["id"] for c in q["choices"]]) for q in response.json()["questions"]]
+
+        def texts(response):
+            return [[c["text"] for c in q["choices"]] for q in response.json()["questions"]]
+
+        paper = self.get_paper()
+        details = self.client.get(url, **self.headers_for(self.participant))
+        sparse = self.client.get(url + "?fields=questions.choices.text", **self.headers_for(self.participant))
+
+        self.assertEqual(order(details), order(paper))
+        self.assertEqual(texts(sparse), texts(paper))
+        self.assertNotEqual(order(paper), sorted((q, sorted(c)) for q, c in order(paper)))
+
+    def test_answer_key_follows_the_exam_version(self):
+        correct = self.question.choices.get(is_correct=True)
+        self.assertEqual(papers.get_answer_key(self.exam.id, self.version()), (1, (correct.id,)))
+
+        other = self.question.choices.get(is_correct=False)
+        other.is_correct = True
+        other.save()
+
+        self.assertEqual(
+            papers.get_answer_key(self.exam.id, self.version()), (1, tuple(sorted((correct.id, other.id))))
+        )
+
+    def test_concurrent_misses_build_the_paper_once(self):
+        build = papers.abuild_exam_paper
+        calls = []
+
+        async def slow_build(exam_id):
+            calls.append(exam_id)
+            await asyncio.sleep(0.1)
+            return await build(exam_id)
+
+        version = self.version()
+
+        async def start_exam():
+            return await asyncio.gather(*(papers.aget_exam_paper(self.exam.id, version) for _ in range(50)))
+
+        with patch.object(papers, "abuild_exam_paper", slow_build), \
+                self.settings(EXAM_PAPER_WAIT_INTERVAL=0.01):
+            payloads = async_to_sync(start_exam)()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(payloads)), 1)
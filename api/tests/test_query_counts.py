@@ -0,0 +1,167 @@
+from unittest.mock import patch
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.contrib.auth.hashers import make_password
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import (
+    ModelExam,
+    ModelParticipation,
+    ModelQuestion,
+    ModelChoice,
+    ModelAnswer,
+    ModelRanking,
+)
+from api.tasks import calculate_score, generate_ranking
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+SIZES = (10, 100, 1000)
+PASSWORD = make_password("seed123")
+
+
+class TestQueryCounts(TestCase):
+    """
+    Garante que o número de consultas de cada endpoint e tarefa não cresce com o volume de dados.
+    Cada cenário é semeado com 10, 100 e 1000 linhas/questões e o número de consultas deve ser o mesmo.
+    """
+
+    databases = "__all__"
+
+    def setUp(self):
+        self.admin_user = User.objects.create(
+            username="admin",
+            password=PASSWORD,
+            email="admin@example.com",
+            is_admin=True,
+            is_participant=False
+        )
+        self.admin_headers = self.headers_for(self.admin_user)
+
+    def headers_for(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+    def seed(self, size):
+        """
+        Cria uma prova com `size` questões, `size` participantes que a finalizaram, `size` respostas
+        do primeiro participante, `size` provas extras e o ranking da prova.
+        """
+        users = User.objects.bulk_create(
+            User(username=f"user-{size}-{i}", email=f"user-{size}-{i}@example.com", password=PASSWORD)
+            for i in range(size)
+        )
+        exam = ModelExam.objects.create(name=f"Principal {size}", created_by=self.admin_user)
+        extra_exams = ModelExam.objects.bulk_create(
+            ModelExam(name=f"Prova {size}-{i}", created_by=self.admin_user) for i in range(size)
+        )
+        questions = ModelQuestion.objects.bulk_create(
+            ModelQuestion(text=f"Questão {size}-{i}") for i in range(size)
+        )
+        choices = ModelChoice.objects.bulk_create(
+            ModelChoice(question=question, text=f"Opção {j}", is_correct=j == 0)
+            for question in questions
+            for j in range(3)
+        )
+
+        Link = ModelExam.questions.through
+        Link.objects.bulk_create(
+            [Link(modelexam_id=exam.id, modelquestion_id=question.id) for question in questions]
+            + [Link(modelexam_id=extra.id, modelquestion_id=questions[0].id) for extra in extra_exams]
+            + [Link(modelexam_id=extra.id, modelquestion_id=questions[1].id) for extra in extra_exams]
+        )
+
+        participations = ModelParticipation.objects.bulk_create(
+            ModelParticipation(user=user, exam=exam, score=float(i % 100), finished_at=now())
+            for i, user in enumerate(users)
+        )
+        ModelAnswer.objects.bulk_create(
+            ModelAnswer(participation=participations[0], question=question, choice=choices[3 * i])
+            for i, question in enumerate(questions)
+        )
+        ModelRanking.objects.bulk_create(
+            ModelRanking(exam=exam, participant=user, score=float(i), position=i + 1)
+            for i, user in enumerate(users)
+        )
+
+        participant = users[0]
+        return {
+            "size": size,
+            "exam": exam,
+            "question": questions[0],
+            "participant": participant,
+            "participation": participations[0],
+            "answer": ModelAnswer.objects.filter(participation=participations[0]).first(),
+        }
+
+    def count_queries(self, func, ignore_bulk_inserts=False):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            func()
+        queries = context.captured_queries
+        if ignore_bulk_inserts:
+            # O bulk_create divide as inserções em lotes pelo limite de parâmetros do SQLite.
+            queries = [query for query in queries if not query["sql"].startswith("INSERT")]
+        return len(queries)
+
+    def get_status_ok(self, url, headers):
+        def request():
+            response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 200, url)
+        return request
+
+    def assertConstantQueries(self, name, build, ignore_bulk_inserts=False):
+        counts = {}
+        for size in SIZES:
+            with self.subTest(endpoint=name, size=size):
+                counts[size] = self.count_queries(build(self.datasets[size]), ignore_bulk_inserts)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"{name}: número de consultas cresce com o volume de dados {counts}"
+        )
+
+    def test_query_counts_are_constant(self):
+        self.datasets = {size: self.seed(size) for size in SIZES}
+        admin = self.admin_headers
+
+        def participant(data):
+            return self.headers_for(data["participant"])
+
+        endpoints = {
+            "list_users": lambda d: self.get_status_ok(f"/api/users/?query=user-{d['size']}-&page_size={d['size']}", admin),
+            "get_user_details": lambda d: self.get_status_ok(f"/api/users/{d['participant'].id}/", admin),
+            "list_exams": lambda d: self.get_status_ok(f"/api/exams/?query=Prova {d['size']}-&page_size={d['size']}", admin),
+            "get_exam_details": lambda d: self.get_status_ok(f"/api/exams/{d['exam'].id}/", admin),
+            "list_participants": lambda d: self.get_status_ok(f"/api/exams/{d['exam'].id}/participants/?page_size={d['size']}", admin),
+            "get_participation_details": lambda d: self.get_status_ok(
+                f"/api/exams/{d['exam'].id}/participants/{d['participant'].id}/", admin
+            ),
+            "check_progress": lambda d: self.get_status_ok(f"/api/exams/{d['exam'].id}/progresses/", participant(d)),
+            "list_questions": lambda d: self.get_status_ok(
+                f"/api/questions/?query=Questão {d['size']}-&page_size={d['size']}", admin
+            ),
+            "get_question_details": lambda d: self.get_status_ok(f"/api/questions/{d['question'].id}", admin),
+            "list_answers": lambda d: self.get_status_ok(
+                f"/api/answers/participants/{d['participation'].id}/?page_size={d['size']}", participant(d)
+            ),
+            "get_answer_details": lambda d: self.get_status_ok(f"/api/answers/{d['answer'].id}/", participant(d)),
+            "get_ranking": lambda d: self.get_status_ok(f"/api/rankings/exams/{d['exam'].id}/", admin),
+        }
+        for name, build in endpoints.items():
+            self.assertConstantQueries(name, build)
+
+    def test_task_query_counts_are_constant(self):
+        self.datasets = {size: self.seed(size) for size in SIZES}
+        ModelParticipation.objects.filter(
+            id__in=[data["participation"].id for data in self.datasets.values()]
+        ).update(finished_at=None)
+
+        with patch("api.tasks.generate_ranking.delay"):
+            self.assertConstantQueries(
+                "calculate_score", lambda d: lambda: calculate_score(d["participation"].id)
+            )
+        self.assertConstantQueries(
+            "generate_ranking", lambda d: lambda: generate_ranking(d["exam"].id), ignore_bulk_inserts=True
+        )
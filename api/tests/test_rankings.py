@@ -7,6 +7,8 @@ User = get_user_model()
 
 
 class TestRankings(TestCase):
+    databases = "__all__"
+
     def setUp(self):
         self.admin_user = User.objects.create_user(
             username="admin",
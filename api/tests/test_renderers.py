@@ -0,0 +1,54 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from api import renderers
+from api.models import ModelExam
+from api.schemas import UserSchema
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestORJSONRenderer(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+
+    def test_dumps_handles_native_and_fallback_types(self):
+        body = renderers.dumps({
+            "when": datetime(2024, 11, 29, 16, 0, 0, tzinfo=timezone.utc),
+            "score": Decimal("9.50"),
+            "user": UserSchema.model_validate(self.admin_user),
+            1: "chave numérica",
+        })
+
+        self.assertEqual(json.loads(body), {
+            "when": "2024-11-29T16:00:00Z",
+            "score": "9.50",
+            "user": {"id": self.admin_user.id, "username": "admin", "email": "admin@example.com",
+                     "is_admin": True, "is_participant": False},
+            "1": "chave numérica",
+        })
+
+    def test_api_responses_are_rendered_with_orjson(self):
+        exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+
+        response = self.client.get(f"/api/exams/{exam.id}/", **self.admin_headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["created_at"].endswith("Z"))
+        self.assertEqual(response.content, renderers.dumps(response.json()))
+
+    def test_invalid_body_is_rejected(self):
+        response = self.client.post(
+            "/api/exams/", data="{nome: ", content_type="application/json", **self.admin_headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ModelExam.objects.exists())
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import tempfile
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import ModelExam
+from api.replica import ReplicaRouter, copy_sqlite, is_pinned, pinned_to_primary, reading_from_replica
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASE="replica")
+class TestReplicaRouting(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+
+    def test_router_sends_only_marked_reads_to_replica(self):
+        router = ReplicaRouter()
+
+        self.assertEqual(router.db_for_read(ModelExam), "default")
+        with reading_from_replica():
+            self.assertEqual(router.db_for_read(ModelExam), "replica")
+            self.assertEqual(router.db_for_write(ModelExam), "default")
+            with pinned_to_primary():
+                self.assertEqual(router.db_for_read(ModelExam), "default")
+
+        with override_settings(REPLICA_DATABASE=None), reading_from_replica():
+            self.assertEqual(router.db_for_read(ModelExam), "default")
+
+    def test_user_reads_own_writes_after_write(self):
+        response = self.client.post("/api/exams/", {"name": "Nova prova"}, content_type="application/json", **self.admin_headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(is_pinned(self.admin_user.id))
+
+        # Fixado no principal, o administrador não depende da réplica para ver a prova criada.
+        response = self.client.get("/api/exams/", **self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([exam["name"] for exam in response.json()], ["Nova prova"])
+
+
+class TestReplicaSync(TestCase):
+    databases = "__all__"
+
+    def test_copy_sqlite_copies_schema_and_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary, replica = os.path.join(directory, "primary.sqlite3"), os.path.join(directory, "replica.sqlite3")
+            with sqlite3.connect(primary) as database:
+                database.execute("CREATE TABLE exam (name TEXT)")
+                database.execute("INSERT INTO exam VALUES ('Prova')")
+
+            self.assertGreater(copy_sqlite(primary, replica), 0)
+
+            database = sqlite3.connect(replica)
+            self.assertEqual(database.execute("SELECT name FROM exam").fetchall(), [("Prova",)])
+            database.close()
@@ -0,0 +1,49 @@
+import gzip
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import ModelExam
+from api.utils import CACHED_JSON_GZIP, CACHED_JSON_RAW
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestPreRenderedResponseCache(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        ModelExam.objects.bulk_create(ModelExam(name=f"Prova {i}", created_by=self.admin_user) for i in range(20))
+
+    @override_settings(LIST_CACHE_COMPRESS_MIN_BYTES=1024 * 1024)
+    def test_cache_hit_returns_the_same_body_as_the_miss(self):
+        miss = self.client.get("/api/exams/?page_size=5", **self.admin_headers)
+        hit = self.client.get("/api/exams/?page_size=5", **self.admin_headers)
+
+        self.assertEqual(hit.status_code, 200)
+        self.assertEqual(hit["Content-Type"], "application/json; charset=utf-8")
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(len(hit.json()), 5)
+        self.assertEqual(set(hit.json()[0]), {"id", "name", "created_by", "created_at", "questions"})
+
+        _, cached = cache.get("list_exams:None:-name:1:5")
+        self.assertIsInstance(cached, bytes)
+        self.assertEqual(cached[:1], CACHED_JSON_RAW)
+
+    @override_settings(LIST_CACHE_COMPRESS_MIN_BYTES=100)
+    def test_large_bodies_are_cached_compressed(self):
+        plain = self.client.get("/api/exams/?page_size=20", **self.admin_headers)
+        self.assertEqual(cache.get("list_exams:None:-name:1:20")[1][:1], CACHED_JSON_GZIP)
+
+        compressed = self.client.get("/api/exams/?page_size=20", HTTP_ACCEPT_ENCODING="gzip", **self.admin_headers)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+        again = self.client.get("/api/exams/?page_size=20", **self.admin_headers)
+        self.assertFalse(again.has_header("Content-Encoding"))
+        self.assertEqual(again.content, plain.content)
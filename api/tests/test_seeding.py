@@ -0,0 +1,58 @@
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from api.models import ModelAnswer, ModelChoice, ModelExam, ModelParticipation, ModelQuestion, ModelRanking
+from api.seeding import seed_dataset
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestSeeding(TestCase):
+    databases = "__all__"
+
+    def test_seed_dataset_creates_every_entity(self):
+        counts = seed_dataset(
+            users=20,
+            admins=2,
+            exams=3,
+            questions_per_exam=5,
+            choices_per_question=3,
+            participations_per_exam=10,
+            answers_min=2,
+            answers_max=4,
+            finished_rate=1.0,
+            chunk_size=7,
+        )
+
+        self.assertEqual(counts["users"], User.objects.count())
+        self.assertEqual(User.objects.filter(is_admin=True).count(), 2)
+        self.assertEqual(ModelExam.objects.count(), 3)
+        self.assertEqual(ModelQuestion.objects.count(), 15)
+        self.assertEqual(ModelChoice.objects.count(), 45)
+        self.assertEqual(ModelChoice.objects.filter(is_correct=True).count(), 15)
+        self.assertEqual(ModelParticipation.objects.count(), 30)
+        self.assertEqual(ModelRanking.objects.count(), 30)
+        self.assertEqual(counts["answers"], ModelAnswer.objects.count())
+        for participation in ModelParticipation.objects.all():
+            self.assertIn(participation.answers.count(), range(2, 5))
+
+    def test_seed_dataset_is_deterministic_and_scores_match_answers(self):
+        seed_dataset(users=10, exams=1, questions_per_exam=4, participations_per_exam=10, correct_rate=0.5, finished_rate=1.0, seed=42)
+        first = list(ModelParticipation.objects.order_by("id").values_list("score", flat=True))
+
+        correct_ids = list(ModelChoice.objects.filter(is_correct=True).values_list("id", flat=True))
+        for participation in ModelParticipation.objects.all():
+            correct = participation.answers.filter(choice_id__in=correct_ids).count()
+            self.assertAlmostEqual(participation.score, correct / 4 * 100)
+
+        seed_dataset(users=10, exams=1, questions_per_exam=4, participations_per_exam=10, correct_rate=0.5, finished_rate=1.0, seed=42, prefix="again")
+        second = list(ModelParticipation.objects.order_by("id").values_list("score", flat=True))[10:]
+        self.assertEqual(first, second)
+
+    def test_seed_command(self):
+        out = StringIO()
+        call_command("seed", users=5, exams=1, questions_per_exam=3, participations_per_exam=5, stdout=out)
+
+        self.assertEqual(ModelParticipation.objects.count(), 5)
+        self.assertIn("registros criados", out.getvalue())
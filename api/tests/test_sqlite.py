@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+from django.test import TestCase, TransactionTestCase
+from django.db import OperationalError, connection
+from api.models import ModelExam
+from api.sqlite import WriteQueue, run_write
+from api.db_backends.sqlite_pool.base import ConnectionPool
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestSQLitePragmas(TestCase):
+    databases = "__all__"
+
+    def test_connection_applies_configured_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_run_write_inside_transaction_runs_inline(self):
+        admin = User.objects.create(username="admin", email="admin@example.com", is_admin=True)
+
+        exam = run_write(ModelExam.objects.create, name="Prova", created_by=admin)
+
+        self.assertTrue(ModelExam.objects.filter(id=exam.id).exists())
+
+
+class TestWriteQueue(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", email="admin@example.com", is_admin=True)
+        self.writer = WriteQueue(batch_size=50, batch_delay=0.05)
+
+    def tearDown(self):
+        self.writer.stop()
+
+    def test_concurrent_writes_are_batched_and_failures_isolated(self):
+        batches = []
+        execute = self.writer._execute
+        self.writer._execute = lambda batch: batches.append(len(batch)) or execute(batch)
+        results = {}
+        barrier = threading.Barrier(10)
+
+        def create(index):
+            if index == 3:
+                ModelExam.objects.create(name="Desfeita", created_by=self.admin)
+                raise ValueError("falha")
+            return ModelExam.objects.create(name=f"Prova {index}", created_by=self.admin).id
+
+        def submit(index):
+            barrier.wait()
+            try:
+                results[index] = self.writer.submit(create, index)
+            except ValueError as error:
+                results[index] = error
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIsInstance(results.pop(3), ValueError)
+        self.assertEqual(set(ModelExam.objects.values_list("id", flat=True)), set(results.values()))
+        self.assertFalse(ModelExam.objects.filter(name="Desfeita").exists())
+        self.assertEqual(sum(batches), 10)
+        self.assertLess(len(batches), 10)
+
+
+class TestConnectionPool(TestCase):
+    databases = "__all__"
+
+    def make_pool(self, max_size=2):
+        return ConnectionPool(lambda: sqlite3.connect(":memory:", check_same_thread=False), max_size=max_size, timeout=0.05)
+
+    def test_pool_reuses_returned_connections(self):
+        pool = self.make_pool()
+        first, reused = pool.getconn()
+        self.assertFalse(reused)
+        first.execute("BEGIN")
+        pool.putconn(first)
+
+        second, reused = pool.getconn()
+        self.assertIs(second, first)
+        self.assertTrue(reused)
+        self.assertFalse(second.in_transaction)
+
+    def test_pool_is_bounded(self):
+        pool = self.make_pool(max_size=1)
+        connection, _ = pool.getconn()
+
+        with self.assertRaises(OperationalError):
+            pool.getconn()
+
+        pool.putconn(connection)
+        self.assertIs(pool.getconn()[0], connection)
+
+    def test_pool_discards_unhealthy_connections(self):
+        pool = self.make_pool()
+        broken, _ = pool.getconn()
+        pool.putconn(broken)
+        broken.close()
+
+        connection, reused = pool.getconn()
+        self.assertIsNot(connection, broken)
+        self.assertFalse(reused)
@@ -0,0 +1,148 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from api import sync
+from api.models import ModelChange, ModelExam, ModelQuestion, ModelChoice
+from api.seeding import create_questions, link_questions
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestSyncFeed(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.admin_user)}"}
+        self.exam = ModelExam.objects.create(name="Prova 1", created_by=self.admin_user)
+        self.question = ModelQuestion.objects.create(text="Quanto é 2 + 2?")
+        self.choice = ModelChoice.objects.create(question=self.question, text="4", is_correct=True)
+        self.exam.questions.add(self.question)
+
+    def feed(self, since=0, **params):
+        response = self.client.get("/api/sync/", {"since": since, **params}, **self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def summary(self, feed):
+        return [
+            (change["entity"], change["data"].get("id", (change["data"].get("exam_id"), change["data"].get("question_id"))), change["deleted"])
+            for change in feed["changes"]
+        ]
+
+    def test_full_feed_lists_each_record_once_in_order(self):
+        feed = self.feed()
+
+        self.assertFalse(feed["has_more"])
+        self.assertEqual(self.summary(feed), [
+            ("exam", self.exam.id, False),
+            ("question", self.question.id, False),
+            ("choice", self.choice.id, False),
+            ("exam_question", (self.exam.id, self.question.id), False),
+        ])
+        choice = feed["changes"][2]["data"]
+        self.assertEqual(choice["question_id"], self.question.id)
+        self.assertTrue(choice["is_correct"])
+        self.assertEqual(self.feed(feed["cursor"])["changes"], [])
+
+    def test_incremental_feed_returns_only_changes_and_tombstones(self):
+        cursor = self.feed()["cursor"]
+        choice_id = self.choice.id
+
+        self.exam.name = "Prova renomeada"
+        self.exam.save()
+        self.question.exams.remove(self.exam)
+        self.choice.delete()
+
+        feed = self.feed(cursor)
+        self.assertEqual(self.summary(feed), [
+            ("exam", self.exam.id, False),
+            ("question", self.question.id, False),
+            ("exam_question", (self.exam.id, self.question.id), True),
+            ("choice", choice_id, True),
+        ])
+        self.assertEqual(feed["changes"][0]["data"]["name"], "Prova renomeada")
+        self.assertEqual(feed["changes"][3]["data"], {"id": choice_id})
+
+    def test_deleting_an_exam_removes_its_links(self):
+        cursor = self.feed()["cursor"]
+        exam_id = self.exam.id
+
+        self.exam.delete()
+
+        changes = self.summary(self.feed(cursor))
+        self.assertIn(("exam", exam_id, True), changes)
+        self.assertIn(("exam_question", (exam_id, self.question.id), True), changes)
+
+    @override_settings(SYNC_MAX_PAGE_SIZE=3)
+    def test_pages_follow_the_cursor(self):
+        pages = []
+        cursor, has_more = 0, True
+        while has_more:
+            feed = self.feed(cursor, limit=10)
+            pages.append(len(feed["changes"]))
+            cursor, has_more = feed["cursor"], feed["has_more"]
+
+        # Seis registros no log: a questão, tocada pela alternativa e pelo vínculo, volta na segunda página.
+        self.assertEqual(pages, [3, 2])
+
+    def test_seeded_catalog_enters_the_feed(self):
+        cursor = self.feed()["cursor"]
+        question_ids, choices = create_questions(2, choices_per_question=2)
+        link_questions(self.exam.id, question_ids)
+
+        entities = [entity for entity, _, _ in self.summary(self.feed(cursor))]
+        self.assertEqual(entities, ["question"] * 2 + ["choice"] * 4 + ["exam_question"] * 2)
+
+    @override_settings(SYNC_RETENTION=-1)
+    def test_compaction_keeps_the_latest_row_of_each_record(self):
+        removed_question = ModelQuestion.objects.create(text="Questão removida")
+        self.exam.questions.add(removed_question)
+        for name in ("Prova 2", "Prova 3"):
+            self.exam.name = name
+            self.exam.save()
+        removed_question.delete()
+        before = self.summary(self.feed())
+        last = ModelChange.objects.order_by("-id").values_list("id", flat=True).first()
+
+        floor, removed = sync.compact()
+
+        self.assertEqual(floor, last)
+        self.assertGreater(removed, 0)
+        keys = list(ModelChange.objects.values_list("entity", "object_id", "related_id"))
+        self.assertEqual(len(keys), len(set(keys)))
+        # Só os registros que ainda existem continuam no log, cada um com o seu estado atual.
+        self.assertEqual(sorted(self.summary(self.feed()), key=str), sorted(
+            [change for change in before if not change[2]], key=str
+        ))
+        self.assertIsNone(sync.compact())
+
+    def test_cursors_below_the_floor_must_resync(self):
+        cursor = self.feed()["cursor"]
+        self.exam.name = "Prova renomeada"
+        self.exam.save()
+        with override_settings(SYNC_RETENTION=-1):
+            floor, _ = sync.compact()
+
+        response = self.client.get("/api/sync/", {"since": cursor}, **self.admin_headers)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.feed(floor)["changes"], [])
+        resync = self.feed()
+        exams = [change["data"] for change in resync["changes"] if change["entity"] == "exam"]
+        self.assertEqual(exams, [{**exams[0], "name": "Prova renomeada"}])
+
+        self.question.text = "Quanto é 3 + 3?"
+        self.question.save()
+        self.assertEqual(self.summary(self.feed(resync["cursor"])), [("question", self.question.id, False)])
+
+    def test_participants_cannot_sync(self):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.participant)}"}
+        self.assertEqual(self.client.get("/api/sync/", **headers).status_code, 403)
+        self.assertEqual(self.client.get("/api/sync/?since=-1", **self.admin_headers).status_code, 422)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from api import metrics, renderers
+from api.cache_backends import tiered
+from api.cache_backends.tiered import LocalTier
+
+PAPER_KEY = "exam_paper:1:1"
+
+
+class TestTieredCache(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_l1_keys_are_served_without_reaching_the_l2(self):
+        cache.set(PAPER_KEY, b"caderno")
+        cache.set("list_refresh_lock:x", True)
+        caches["redis"].clear()
+
+        self.assertEqual(cache.get(PAPER_KEY), b"caderno")
+        self.assertEqual(async_to_sync(cache.aget)(PAPER_KEY), b"caderno")
+        self.assertIsNone(cache.get("list_refresh_lock:x"))
+
+    def test_reads_fill_the_l1(self):
+        caches["redis"].set(PAPER_KEY, b"caderno")
+
+        self.assertEqual(cache.get(PAPER_KEY), b"caderno")
+        caches["redis"].delete(PAPER_KEY)
+        self.assertEqual(cache.get(PAPER_KEY), b"caderno")
+
+    def test_writes_and_deletes_replace_the_l1_copy(self):
+        cache.set(PAPER_KEY, b"v1")
+        cache.set(PAPER_KEY, b"v2")
+        self.assertEqual(cache.get(PAPER_KEY), b"v2")
+
+        cache.delete(PAPER_KEY)
+        self.assertIsNone(cache.get(PAPER_KEY))
+
+    def test_invalidations_from_other_processes_drop_the_l1_copy(self):
+        cache.set(PAPER_KEY, b"v1")
+        caches["redis"].set(PAPER_KEY, b"v2")
+
+        cache.bus.handle(renderers.dumps({"sender": "outro-processo", "keys": [PAPER_KEY]}))
+
+        self.assertEqual(cache.get(PAPER_KEY), b"v2")
+
+    def test_per_tier_metrics(self):
+        def tier_events():
+            counters = metrics._snapshot()["counters"]
+            return {labels: value for (name, labels), value in counters.items() if name == "api_cache_tier_total"}
+
+        cache.set(PAPER_KEY, b"caderno")
+        before = tier_events()
+        cache.get(PAPER_KEY)
+        cache.get("exam_paper:2:1")
+        after = tier_events()
+
+        def delta(tier, event):
+            labels = (("tier", tier), ("event", event))
+            return after.get(labels, 0) - before.get(labels, 0)
+
+        self.assertEqual(delta("l1", "hit"), 1)
+        self.assertEqual(delta("l1", "miss"), 1)
+        self.assertEqual(delta("l2", "miss"), 1)
+        self.assertIn('api_cache_tier_total{tier="l1",event="hit"} 1.0', metrics.render())
+
+
+def on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class PublishingRedis(LocMemCache):
+    """Cache local com um `client` no formato do django-redis, que anota se foi usado no event loop."""
+
+    used_on_loop = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = self
+
+    def get_client(self, write=True):
+        PublishingRedis.used_on_loop.append(on_event_loop())
+        return self
+
+    def publish(self, channel, message):
+        PublishingRedis.used_on_loop.append(on_event_loop())
+
+
+@override_settings(CACHES={**settings.CACHES, "redis": {"BACKEND": "api.tests.test_tiered_cache.PublishingRedis"}})
+class TestAsyncInvalidation(SimpleTestCase):
+    def setUp(self):
+        PublishingRedis.used_on_loop = []
+        tiered.reset()
+        self.addCleanup(tiered.reset)
+        # Sem a thread de inscrição: o teste só observa as publicações.
+        active = patch.object(tiered.InvalidationBus, "active", return_value=True)
+        active.start()
+        self.addCleanup(active.stop)
+
+    def test_async_writes_publish_off_the_event_loop(self):
+        async def write():
+            await cache.aset(PAPER_KEY, b"caderno")
+            await cache.aadd("exam_paper:2:1", b"outro")
+            await cache.adelete(PAPER_KEY)
+
+        async_to_sync(write)()
+
+        self.assertTrue(PublishingRedis.used_on_loop)
+        self.assertNotIn(True, PublishingRedis.used_on_loop)
+        self.assertEqual(cache.get("exam_paper:2:1"), b"outro")
+
+
+class TestLocalTier(SimpleTestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        tier = LocalTier(max_entries=2, timeout=30)
+        tier.set("a", 1)
+        tier.set("b", 2)
+        tier.get("a")
+        tier.set("c", 3)
+
+        self.assertEqual(len(tier), 2)
+        self.assertEqual(tier.get("a"), 1)
+        self.assertEqual(tier.get("c"), 3)
+        self.assertIsNot(tier.get("b"), 2)
+
+    def test_entries_expire(self):
+        tier = LocalTier(max_entries=10, timeout=30)
+        tier.set("a", 1, timeout=0.01)
+        time.sleep(0.02)
+
+        self.assertIsNot(tier.get("a"), 1)
+        self.assertEqual(len(tier), 0)
+
+    def test_reads_that_raced_an_invalidation_are_not_stored(self):
+        tier = LocalTier(max_entries=10, timeout=30)
+        generation = tier.generation
+        tier.delete(["a"])
+        tier.set("a", "antigo", generation=generation)
+
+        self.assertIsNot(tier.get("a"), "antigo")
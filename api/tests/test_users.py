@@ -6,6 +6,8 @@ User = get_user_model()
 
 
 class TestUserEndpoints(APITestCase):
+    databases = "__all__"
+
     def setUp(self):
         # Criação de usuários
         self.admin_user = User.objects.create_user(
@@ -0,0 +1,88 @@
+import threading
+from io import StringIO
+import time
+from unittest.mock import patch
+from django.test import TransactionTestCase
+from django.core.cache import cache
+from django.db import connections, router
+from django.core.management import CommandError, call_command
+from django.test.utils import CaptureQueriesContext
+from api import papers, warming
+from api.models import ModelExam, ModelParticipation, ModelQuestion, ModelChoice
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class TestCacheWarming(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create(
+            username="admin", email="admin@example.com", is_admin=True, is_participant=False
+        )
+        self.participant = User.objects.create(
+            username="participant", email="participant@example.com", is_admin=False, is_participant=True
+        )
+        self.open_exam = ModelExam.objects.create(name="Prova aberta", created_by=self.admin_user)
+        self.closed_exam = ModelExam.objects.create(name="Prova encerrada", created_by=self.admin_user)
+        question = ModelQuestion.objects.create(text="Quanto é 2 + 2?")
+        self.correct = ModelChoice.objects.create(question=question, text="4", is_correct=True)
+        ModelChoice.objects.create(question=question, text="5", is_correct=False)
+        self.open_exam.questions.add(question)
+        ModelParticipation.objects.create(user=self.participant, exam=self.open_exam)
+
+    def exam_keys(self, exam):
+        version = papers.exam_version(exam.id)
+        return papers.EXAM_PAPER_KEY.format(exam.id, version), papers.EXAM_ANSWER_KEY.format(exam.id, version)
+
+    def test_warming_builds_the_missing_entries_once(self):
+        result = warming.warm(pages=1)
+
+        # Uma página de cada listagem, mais o caderno e o gabarito da prova em aberto.
+        self.assertEqual(result, {"built": 5, "failed": 0})
+        paper_key, answer_key = self.exam_keys(self.open_exam)
+        self.assertIsNotNone(cache.get(paper_key))
+        self.assertEqual(cache.get(answer_key), (1, (self.correct.id,)))
+        self.assertIsNotNone(cache.get("list_exams:None:-name:1:10"))
+        self.assertFalse(any(cache.get(key) for key in self.exam_keys(self.closed_exam)))
+
+        self.assertEqual(warming.warm(pages=1), {"built": 0, "failed": 0})
+
+    def test_open_exams_are_deduplicated_by_the_database(self):
+        for i in range(3):
+            user = User.objects.create(username=f"p{i}", email=f"p{i}@example.com", is_admin=False, is_participant=True)
+            ModelParticipation.objects.create(user=user, exam=self.open_exam)
+        ModelParticipation.objects.create(user=self.participant, exam=self.closed_exam, finished_at="2024-01-01T00:00:00Z")
+
+        with CaptureQueriesContext(connections[router.db_for_read(ModelParticipation)]) as context:
+            self.assertEqual(warming.open_exam_ids(), [self.open_exam.id])
+        self.assertIn("DISTINCT", context.captured_queries[0]["sql"])
+
+    def test_jobs_run_with_bounded_parallelism(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_warm(exam_id):
+            with lock:
+                running.append(exam_id)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(exam_id)
+            return 1
+
+        with patch.object(papers, "warm_exam", slow_warm):
+            result = warming.warm(exam_ids=list(range(8)), pages=0, concurrency=2)
+
+        self.assertEqual(result, {"built": 8, "failed": 0})
+        self.assertEqual(max(peak), 2)
+
+    def test_command_rejects_unknown_exams(self):
+        with self.assertRaises(CommandError):
+            call_command("warm_cache", exam=[999])
+
+        call_command("warm_cache", exam=[self.closed_exam.id], pages=0, stdout=StringIO())
+        self.assertTrue(all(cache.get(key) for key in self.exam_keys(self.closed_exam)))
@@ -1,3 +1,5 @@
+import gzip
+import hashlib
 import jwt
 from datetime import datetime, timedelta, timezone
 from django.conf import settings
@@ -5,6 +7,11 @@ from django.contrib.auth.models import AnonymousUser
 from ninja.errors import HttpError
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from api import renderers
+from api.metrics import record_cache_event
+from api.models import ModelExam, ModelParticipation, ModelQuestion, ModelAnswer
 
 User = get_user_model()
 
@@ -27,6 +34,13 @@ def decode_jwt(token):
     except jwt.InvalidTokenError:
         raise ValueError("Token inválido")
     
+async def aload_user(request):
+    """
+    Resolve o usuário do token sem bloquear o loop de eventos.
+    As views assíncronas devem chamá-la antes de is_authenticated e is_admin.
+    """
+    request.user = await request.auser()
+
 def is_authenticated(request):
     if isinstance(request.user, AnonymousUser):
         raise HttpError(401, "Authentication required")
@@ -50,6 +64,117 @@ def paginate_queryset(queryset, page, page_size):
     return queryset[start:end]
 
 
+def questions_with_details():
+    """
+    Questões com as relações usadas pelo QuestionSchema já carregadas.
+    """
+    return ModelQuestion.objects.prefetch_related("choices", "exams")
+
+def exams_with_details():
+    """
+    Provas com as relações usadas pelo ExamSchema já carregadas.
+    """
+    return ModelExam.objects.select_related("created_by").prefetch_related(
+        "questions__choices",
+        "questions__exams",
+    )
+
+def participations_with_details():
+    """
+    Participações com as relações usadas pelo ParticipationSchema já carregadas.
+    Usuário e prova vêm por prefetch, pois podem estar em outro banco (api/answers_db.py).
+    """
+    return ModelParticipation.objects.prefetch_related(
+        "user",
+        "exam__created_by",
+        "exam__questions__choices",
+        "exam__questions__exams",
+    )
+
+def answers_with_details():
+    """
+    Respostas com as relações usadas pelo AnswerSchema já carregadas.
+    Só a participação, que fica no mesmo banco, vem por JOIN; o catálogo vem por prefetch.
+    """
+    return ModelAnswer.objects.select_related("participation").prefetch_related(
+        "participation__user",
+        "participation__exam__created_by",
+        "question",
+        "choice",
+        "participation__exam__questions__choices",
+        "participation__exam__questions__exams",
+        "question__choices",
+        "question__exams",
+    )
+
+# Prefixo das respostas guardadas no cache: corpo JSON puro ou comprimido com gzip.
+CACHED_JSON_RAW = b"j"
+CACHED_JSON_GZIP = b"g"
+
+def encode_cached_json(results):
+    """
+    Serializa a lista de schemas (ou de dicionários já montados, como os de api/fieldsets.py)
+    no mesmo JSON que o renderer da API geraria e o prepara para o cache.
+    Corpos maiores que LIST_CACHE_COMPRESS_MIN_BYTES são guardados comprimidos.
+    """
+    return encode_cached_body(
+        renderers.dumps([result if isinstance(result, dict) else result.model_dump() for result in results])
+    )
+
+def encode_cached_body(body):
+    """Prepara um corpo JSON já renderizado para o cache, comprimindo-o quando grande."""
+    if len(body) >= getattr(settings, "LIST_CACHE_COMPRESS_MIN_BYTES", 1024):
+        return CACHED_JSON_GZIP + gzip.compress(body, compresslevel=1, mtime=0)
+    return CACHED_JSON_RAW + body
+
+def decode_cached_body(payload):
+    """Corpo JSON guardado pelo encode_cached_body, já descomprimido."""
+    kind, body = payload[:1], payload[1:]
+    return gzip.decompress(body) if kind == CACHED_JSON_GZIP else body
+
+def cached_json_response(request, payload):
+    """
+    Responde com o corpo guardado pelo encode_cached_json, sem desserializar nem renderizar de novo.
+    Clientes que aceitam gzip recebem o corpo comprimido como está.
+    """
+    kind, body = payload[:1], payload[1:]
+    headers = {}
+    if kind == CACHED_JSON_GZIP:
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+        else:
+            body = gzip.decompress(body)
+    return HttpResponse(body, content_type="application/json; charset=utf-8", headers=headers)
+
+def make_etag(*parts):
+    """
+    ETag forte derivado das partes que identificam a representação: versões ou datas de
+    atualização das entidades e os parâmetros da consulta (campos, página, ordenação).
+    """
+    return '"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def not_modified(request, etag):
+    """
+    Resposta 304 quando o If-None-Match da requisição contém o ETag (comparação fraca, como
+    manda a RFC 9110), ou None. Deve ser chamada antes de montar o corpo da resposta.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+    tags = parse_etags(header)
+    if tags != ["*"] and etag not in (tag.removeprefix("W/") for tag in tags):
+        return None
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
+
+def with_etag(response, etag):
+    """Anexa o ETag à resposta. Um corpo comprimido com gzip recebe o ETag fraco, pois os bytes diferem."""
+    response["ETag"] = f"W/{etag}" if response.has_header("Content-Encoding") else etag
+    return response
+
+
 CACHE_KEY_SET = "list_exam_keys"
 
 def add_cache_key(key):
@@ -61,9 +186,8 @@ def add_cache_key(key):
 def clear_list_exams_cache():
     """Limpa todas as chaves relacionadas ao cache de listagem de provas."""
     keys = cache.get(CACHE_KEY_SET, set())
-    for key in keys:
-        cache.delete(key)
-    cache.delete(CACHE_KEY_SET)
+    cache.delete_many([*keys, CACHE_KEY_SET])
+    record_cache_event("exams", "invalidate")
 
 QUESTION_CACHE_KEY_SET = "list_question_keys"
 
@@ -76,9 +200,8 @@ def add_question_cache_key(key):
 def clear_list_questions_cache():
     """Limpa todas as chaves relacionadas ao cache de listagem de questões."""
     keys = cache.get(QUESTION_CACHE_KEY_SET, set())
-    for key in keys:
-        cache.delete(key)
-    cache.delete(QUESTION_CACHE_KEY_SET)
+    cache.delete_many([*keys, QUESTION_CACHE_KEY_SET])
+    record_cache_event("questions", "invalidate")
 
 CACHE_USER_KEY_SET = "list_user_keys"
 
@@ -91,9 +214,8 @@ def add_user_cache_key(key):
 def clear_list_users_cache():
     """Limpa todas as chaves relacionadas ao cache de listagem de usuários."""
     keys = cache.get(CACHE_USER_KEY_SET, set())
-    for key in keys:
-        cache.delete(key)
-    cache.delete(CACHE_USER_KEY_SET)
+    cache.delete_many([*keys, CACHE_USER_KEY_SET])
+    record_cache_event("users", "invalidate")
 
 CACHE_ANSWER_KEY_SET = "list_answer_keys"
 
@@ -106,6 +228,5 @@ def add_answer_cache_key(key):
 def clear_list_answers_cache():
     """Limpa todas as chaves relacionadas ao cache de listagem de respostas."""
     keys = cache.get(CACHE_ANSWER_KEY_SET, set())
-    for key in keys:
-        cache.delete(key)
-    cache.delete(CACHE_ANSWER_KEY_SET)
\ No newline at end of file
+    cache.delete_many([*keys, CACHE_ANSWER_KEY_SET])
+    record_cache_event("answers", "invalidate")
\ No newline at end of file
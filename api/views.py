@@ -1,14 +1,20 @@
+from django.http import HttpResponse
 from ninja import NinjaAPI
+from api import metrics as api_metrics
+from api.renderers import ORJSONParser, ORJSONRenderer
 from api.routers.user import router as user_router
 from api.routers.exam import router as exam_router
 from api.routers.question import router as question_router
 from api.routers.answer import router as answer_router
 from api.routers.ranking import router as ranking_router
+from api.routers.sync import router as sync_router
 
 api = NinjaAPI(
     title="Exams Management API",
     version="1.0",
     description="API RESTful para gerenciamento de provas de múltipla escolha. Consulte os Schemas para detalhes de como devem ser as requisições.",
+    renderer=ORJSONRenderer(),
+    parser=ORJSONParser(),
 )
 
 api.add_router("/users", user_router)
@@ -16,6 +22,7 @@ api.add_router("/exams", exam_router)
 api.add_router("/questions", question_router)
 api.add_router("/answers", answer_router)
 api.add_router("/rankings", ranking_router)
+api.add_router("/sync", sync_router)
 
 
 @api.get("/docs", include_in_schema=False)
@@ -24,3 +31,10 @@ def documentation(request):
     Redireciona para a documentação gerada automaticamente.
     """
     return api.openapi_schema
+
+
+def metrics(request):
+    """
+    Expõe as métricas agregadas de todos os processos no formato texto do Prometheus.
+    """
+    return HttpResponse(api_metrics.render(), content_type=api_metrics.CONTENT_TYPE)
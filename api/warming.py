@@ -0,0 +1,95 @@
+"""
+Aquecimento do cache para as aberturas de prova e depois de deploys.
+
+Depois de um deploy ou de um flush do Redis, a primeira leva de administradores e
+participantes remontaria ao mesmo tempo todas as páginas e cadernos. O
+aquecimento monta antes as entradas que estiverem ausentes:
+
+- as primeiras `CACHE_WARM_LIST_PAGES` páginas das listagens de provas, questões
+  e usuários, com os parâmetros padrão das rotas;
+- o caderno e o gabarito das provas indicadas ou, por padrão, das provas com
+  participações em aberto (participantes inscritos que ainda não terminaram).
+
+Cada entrada é um trabalho independente, executado em um pool de no máximo
+`CACHE_WARM_CONCURRENCY` threads, cada uma com a sua conexão e lendo da réplica
+quando houver, para que o aquecimento não sobrecarregue o banco.
+"""
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from api import list_cache, papers
+from api.models import ModelParticipation
+from api.replica import reading_from_replica
+
+logger = logging.getLogger(__name__)
+
+# Listagens aquecidas: família, router (com a chave e o builder da página) e a ordenação
+# padrão da rota. Os routers são resolvidos pelo caminho, pois importam api.tasks.
+LIST_PAGES = (
+    ("exams", "api.routers.exam", "LIST_EXAMS_KEY", "build_exams_page", "-name"),
+    ("questions", "api.routers.question", "LIST_QUESTIONS_KEY", "build_questions_page", "-created_at"),
+    ("users", "api.routers.user", "LIST_USERS_KEY", "build_users_page", "-username"),
+)
+LIST_PAGE_SIZE = 10
+
+
+def open_exam_ids():
+    """Provas com participações em aberto, cujos participantes ainda vão buscar o caderno."""
+    return list(
+        ModelParticipation.objects.filter(finished_at__isnull=True)
+        .values_list("exam_id", flat=True).distinct().order_by("exam_id")
+    )
+
+
+def list_jobs(pages):
+    jobs = []
+    for family, module, key_name, build_name, order_by in LIST_PAGES:
+        key_format = import_string(f"{module}.{key_name}")
+        build = import_string(f"{module}.{build_name}")
+        for page in range(1, pages + 1):
+            key = key_format.format(None, order_by, page, LIST_PAGE_SIZE)
+            params = {"query": None, "order_by": order_by, "page": page, "page_size": LIST_PAGE_SIZE}
+            jobs.append((key, functools.partial(list_cache.warm, family, key, build, **params)))
+    return jobs
+
+
+def exam_jobs(exam_ids):
+    return [(f"prova {exam_id}", functools.partial(papers.warm_exam, exam_id)) for exam_id in exam_ids]
+
+
+def _run(job):
+    name, function = job
+    try:
+        with reading_from_replica():
+            return function()
+    except Exception:
+        logger.exception("Falha ao aquecer %s", name)
+        return None
+    finally:
+        # Cada thread do pool devolve a sua conexão ao terminar o trabalho.
+        connections.close_all()
+
+
+def warm(exam_ids=None, pages=None, concurrency=None):
+    """
+    Monta as entradas ausentes das listagens e das provas. Retorna um dicionário com o número
+    de entradas montadas (`built`) e de trabalhos que falharam (`failed`).
+    """
+    if exam_ids is None:
+        exam_ids = open_exam_ids()
+    pages = settings.CACHE_WARM_LIST_PAGES if pages is None else pages
+    concurrency = concurrency or settings.CACHE_WARM_CONCURRENCY
+
+    jobs = list_jobs(pages) + exam_jobs(exam_ids)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cache-warming") as executor:
+        results = list(executor.map(_run, jobs))
+
+    return {
+        "built": sum(result for result in results if result is not None),
+        "failed": sum(1 for result in results if result is None),
+    }
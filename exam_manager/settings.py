@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import os
 import sys
 from datetime import timedelta
 
@@ -64,10 +65,25 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Recife'
-CELERY_TASK_ALWAYS_EAGER = False
+# Com CELERY_TASK_ALWAYS_EAGER=1 as tarefas rodam no próprio processo web (útil para o simulador de carga).
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER') == '1'
 CELERY_TASK_EAGER_PROPAGATES = True
+# Conexões com o Redis reaproveitadas pelo broker e pelo backend de resultados.
+CELERY_BROKER_POOL_LIMIT = int(os.environ.get('CELERY_BROKER_POOL_LIMIT', 10))
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'health_check_interval': 30,
+    'socket_keepalive': True,
+    'socket_connect_timeout': 2,
+}
+CELERY_REDIS_MAX_CONNECTIONS = int(os.environ.get('CELERY_REDIS_MAX_CONNECTIONS', 20))
+CELERY_REDIS_BACKEND_HEALTH_CHECK_INTERVAL = 30
+CELERY_REDIS_SOCKET_KEEPALIVE = True
+
+# Intervalo (em segundos) entre as gravações das métricas de cada processo no cache.
+METRICS_FLUSH_INTERVAL = 5
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +92,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'api.middleware.JWTMiddleware',
+    'api.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'exam_manager.urls'
@@ -102,12 +119,85 @@ TESTING = 'test' in sys.argv
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite com pool de conexões por processo (api/db_backends/sqlite_pool). Com o pool, o
+# Django "fecha" a conexão ao fim de cada requisição ou tarefa devolvendo-a ao pool; um
+# CONN_MAX_AGE maior mantém a conexão presa à thread, como nas conexões persistentes comuns.
+SQLITE_ENGINE = 'api.db_backends.sqlite_pool'
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 0))
+DB_POOL = {
+    'max_size': int(os.environ.get('DB_POOL_SIZE', 20)),
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': SQLITE_ENGINE,
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Transações IMMEDIATE pegam o lock de escrita no BEGIN e respeitam o busy_timeout.
+            'transaction_mode': 'IMMEDIATE',
+            'pool': DB_POOL,
+        },
+    }
+}
+
+# Réplica de leitura opcional: com DATABASE_REPLICA_NAME definido, listagens e ranking
+# leem de um segundo arquivo SQLite, sincronizado por `manage.py sync_replica`.
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': SQLITE_ENGINE,
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': DB_POOL},
+        'TEST': {'MIRROR': 'default'},
     }
+# Banco próprio opcional para participações e respostas (api/answers_db.py), com suas
+# próprias configurações de conexão. Crie as tabelas com `migrate --database answers`.
+if os.environ.get('DATABASE_ANSWERS_NAME'):
+    DATABASES['answers'] = {
+        'ENGINE': SQLITE_ENGINE,
+        'NAME': os.environ['DATABASE_ANSWERS_NAME'],
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pool': DB_POOL,
+        },
+    }
+ANSWERS_DATABASE = 'answers' if 'answers' in DATABASES else None
+DATABASE_ROUTERS = ['api.answers_db.AnswersRouter', 'api.replica.ReplicaRouter']
+REPLICA_DATABASE = 'replica' if 'replica' in DATABASES else None
+# Tempo (em segundos) em que o usuário lê do banco principal depois de uma escrita.
+REPLICA_STICKY_SECONDS = 10
+REPLICA_SYNC_INTERVAL = 5
+# Aquecimento periódico do cache (api/warming.py); só as entradas ausentes são montadas.
+CACHE_WARM_INTERVAL = int(os.environ.get('CACHE_WARM_INTERVAL', 60))
+# Compactação periódica do log da sincronização incremental (api/sync.py).
+SYNC_COMPACT_INTERVAL = int(os.environ.get('SYNC_COMPACT_INTERVAL', 3600))
+CELERY_BEAT_SCHEDULE = {
+    'warm-cache': {'task': 'api.tasks.warm_cache', 'schedule': CACHE_WARM_INTERVAL},
+    'compact-sync-log': {'task': 'api.tasks.compact_sync_log', 'schedule': SYNC_COMPACT_INTERVAL},
 }
+if REPLICA_DATABASE:
+    CELERY_BEAT_SCHEDULE['sync-replica'] = {'task': 'api.tasks.sync_replica', 'schedule': REPLICA_SYNC_INTERVAL}
+
+# PRAGMAs aplicados a cada nova conexão com o SQLite (api/sqlite.py).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 268435456,
+    'cache_size': -65536,
+    'temp_store': 'MEMORY',
+}
+
+# Fila de escrita: rajadas de respostas e rankings são agrupadas em transações curtas.
+SQLITE_WRITE_QUEUE = 'sqlite' in DATABASES['default']['ENGINE']
+SQLITE_WRITE_BATCH_SIZE = 100
+SQLITE_WRITE_BATCH_DELAY = 0.002
 
 AUTH_USER_MODEL = 'api.User'
 
@@ -187,20 +277,74 @@ LOGGING = {
     },
 }
 
+# O cache padrão é um L1 em memória por processo na frente do Redis (api/cache_backends/tiered.py).
+# Só as chaves com os prefixos abaixo, de valores imutáveis já renderizados, ficam no L1; as
+# invalidações são propagadas entre os processos pelo pub/sub do Redis. A listagem de respostas fica
+# fora do L1: ela muda a cada resposta enviada e é invalidada o tempo todo no dia de prova.
 CACHES = {
     "default": {
+        "BACKEND": "api.cache_backends.tiered.TieredCache",
+        "LOCATION": "redis",
+        "OPTIONS": {
+            "L1_PREFIXES": ["exam_paper:", "exam_answer_key:", "exam_choices:", "list_exams:", "list_questions:", "list_users:"],
+            "L1_MAX_ENTRIES": int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1024)),
+            "L1_TIMEOUT": int(os.environ.get('CACHE_L1_TIMEOUT', 30)),
+            "CHANNEL": "desafio_django:cache_invalidation",
+            # Após BREAKER_FAILURES falhas seguidas do Redis, ele deixa de ser consultado por
+            # BREAKER_COOLDOWN segundos, e o L1 serve de fallback local.
+            "BREAKER_FAILURES": int(os.environ.get('CACHE_BREAKER_FAILURES', 3)),
+            "BREAKER_COOLDOWN": float(os.environ.get('CACHE_BREAKER_COOLDOWN', 10)),
+        },
+    },
+    "redis": {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": "redis://redis:6379/1",  
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Um pool limitado de conexões por processo, compartilhado pelas threads.
+            "CONNECTION_POOL_KWARGS": {
+                "max_connections": int(os.environ.get('REDIS_MAX_CONNECTIONS', 50)),
+                "health_check_interval": 30,
+                "socket_keepalive": True,
+                # Timeouts curtos: um Redis travado vira uma falha do cache, não uma requisição parada.
+                "socket_connect_timeout": float(os.environ.get('CACHE_SOCKET_TIMEOUT', 0.25)),
+                "socket_timeout": float(os.environ.get('CACHE_SOCKET_TIMEOUT', 0.25)),
+                "retry_on_timeout": False,
+            },
         },
         "KEY_PREFIX": "desafio_django"  
     }
 }
 
+# Listagens são guardadas no cache já serializadas; acima deste tamanho, comprimidas com gzip.
+LIST_CACHE_COMPRESS_MIN_BYTES = 1024
+# Até o prazo brando a listagem é servida do cache; até o prazo final ela ainda é servida,
+# enquanto uma tarefa do Celery a reconstrói (api/list_cache.py).
+LIST_CACHE_SOFT_TTL = 300
+LIST_CACHE_HARD_TTL = 900
+LIST_CACHE_REFRESH_LOCK_TIMEOUT = 60
+
+# Aquecimento do cache (api/warming.py): páginas de cada listagem e trabalhos simultâneos.
+CACHE_WARM_LIST_PAGES = int(os.environ.get('CACHE_WARM_LIST_PAGES', 3))
+CACHE_WARM_CONCURRENCY = int(os.environ.get('CACHE_WARM_CONCURRENCY', 4))
+
+# Caderno de prova (api/papers.py): guardado por versão da prova, montado por um processo de cada vez.
+EXAM_PAPER_CACHE_TIMEOUT = 60 * 60 * 24
+EXAM_PAPER_LOCK_TIMEOUT = 10
+EXAM_PAPER_WAIT_INTERVAL = 0.05
+# Questões e alternativas em uma ordem própria de cada participante, derivada do SECRET_KEY.
+EXAM_PAPER_SHUFFLE = os.environ.get('EXAM_PAPER_SHUFFLE', '1') == '1'
+# Pacote offline da prova (api/bundles.py): validade do token assinado da folha de respostas.
+EXAM_BUNDLE_MAX_AGE = int(os.environ.get('EXAM_BUNDLE_MAX_AGE', 60 * 60 * 6))
+
+# Sincronização incremental (api/sync.py): registros do log por página do feed.
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+# Mudanças mais antigas que SYNC_RETENTION segundos são compactadas (api/sync.py).
+SYNC_RETENTION = int(os.environ.get('SYNC_RETENTION', 7 * 24 * 3600))
+
 if 'test' in sys.argv:
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        }
+    # Nos testes o L2 é um cache local: sem Redis, a invalidação do L1 é apenas no processo.
+    CACHES["redis"] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
\ No newline at end of file